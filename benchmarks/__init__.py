@@ -0,0 +1,4 @@
+"""Performance benchmarks of the download engines against a local fake backend.
+
+Run ``python -m benchmarks.bench_downloads --help`` from the repository root.
+"""
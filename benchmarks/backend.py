@@ -0,0 +1,340 @@
+"""Local HTTP server serving synthetic YouTube streams.
+
+:class:`FakeBackend` answers two kinds of requests on ``127.0.0.1``:
+
+``/player/<video_id>``
+    The metadata of a video, fetched when a :class:`FakeYouTube` is created,
+    like the player response ``pytubefix`` downloads.
+``/videos/<video_id>?size=<bytes>``
+    ``size`` bytes of stream data, with ``Range`` support so that the
+    resumable and segmented transfer engines can be measured too.
+
+Every request waits ``latency`` seconds before answering and bodies are sent
+at most at ``bandwidth`` bytes per second per connection. A ``failure_rate``
+share of stream requests fail with ``503`` so that retries are part of the
+measure. Whether a request fails only depends on the seed, the video, the
+start of the requested range and how many times that range was requested
+before, so the failures of a batch do not depend on thread scheduling as
+long as the ranges requested do not: a segmented retry only requests the
+ranges missing when its failed attempt stopped.
+
+:meth:`FakeBackend.youtube_cls` returns the factory to pass as ``youtube_cls``
+to :class:`~program_youtube_downloader.downloader.YoutubeDownloader`.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlparse
+
+from program_youtube_downloader.utils import shorten_url
+
+CHUNK_SIZE = 64 * 1024
+# Stream data is a repeated pattern: generating it must not cost more CPU
+# than the client under test spends receiving it.
+_PATTERN = bytes(range(256)) * (CHUNK_SIZE // 256)
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+@dataclass(frozen=True)
+class BackendConfig:
+    """Behaviour of a :class:`FakeBackend`.
+
+    Attributes:
+        latency: Seconds waited before answering each request.
+        bandwidth: Bytes per second sent on each connection, ``0`` for no
+            limit.
+        failure_rate: Share, between ``0`` and ``1``, of stream requests
+            answered with ``503 Service Unavailable``.
+        seed: Seed of the draws deciding which requests fail.
+    """
+
+    latency: float = 0.0
+    bandwidth: float = 0.0
+    failure_rate: float = 0.0
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if self.latency < 0 or self.bandwidth < 0:
+            raise ValueError("latency and bandwidth must be >= 0")
+        if not 0 <= self.failure_rate <= 1:
+            raise ValueError("failure_rate must be between 0 and 1")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        config = self.server.backend.config
+        if config.latency:
+            time.sleep(config.latency)
+        url = urlparse(self.path)
+        kind, _, video_id = url.path.strip("/").partition("/")
+        if kind == "player" and video_id:
+            self._send_player(video_id)
+        elif kind == "videos" and video_id:
+            size = int(parse_qs(url.query).get("size", ["0"])[0])
+            self._send_stream(video_id, size)
+        else:
+            self.send_error(404)
+
+    def _send_player(self, video_id: str) -> None:
+        body = json.dumps({"video_id": video_id, "title": f"Video {video_id}"})
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, video_id: str, size: int) -> None:
+        start, end = 0, size - 1
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+        if self.server.backend.should_fail(video_id, start):
+            self.send_error(503)
+            return
+        if match:
+            if match.group(2):
+                end = min(int(match.group(2)), size - 1)
+            if start > end:
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self._write_body(end - start + 1)
+
+    def _write_body(self, length: int) -> None:
+        bandwidth = self.server.backend.config.bandwidth
+        started = time.monotonic()
+        sent = 0
+        try:
+            while sent < length:
+                chunk = _PATTERN[: min(CHUNK_SIZE, length - sent)]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if bandwidth:
+                    ahead = sent / bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up, as it may after a timeout.
+            self.close_connection = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Large batches open many connections at once.
+    request_queue_size = 128
+    backend: "FakeBackend"
+
+
+class FakeBackend:
+    """Threaded HTTP server behaving as configured by :class:`BackendConfig`.
+
+    Use it as a context manager, or call :meth:`start` and :meth:`stop`.
+
+    Args:
+        config: Latency, bandwidth and failure rate of the server.
+        host: Address the server listens on.
+        port: Port the server listens on, ``0`` for any free port.
+    """
+
+    def __init__(
+        self,
+        config: BackendConfig | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config or BackendConfig()
+        self._address = (host, port)
+        self._attempts: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def base_url(self) -> str:
+        """URL of the running server, without trailing slash.
+
+        Raises:
+            RuntimeError: If the server is not started.
+        """
+        if self._server is None:
+            raise RuntimeError("FakeBackend is not started")
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> "FakeBackend":
+        """Start serving from a daemon thread and return ``self``."""
+        server = _Server(self._address, _Handler)
+        server.backend = self
+        threading.Thread(
+            target=server.serve_forever, name="fake-backend", daemon=True
+        ).start()
+        self._server = server
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and close its socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeBackend":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def should_fail(self, video_id: str, start: int) -> bool:
+        """Count a request for the range of ``video_id`` starting at ``start``
+        and return whether it must fail."""
+        with self._lock:
+            self.requests += 1
+            attempt = self._attempts.get((video_id, start), 0)
+            self._attempts[video_id, start] = attempt + 1
+            failed = self.fails(video_id, start, attempt)
+            if failed:
+                self.failures += 1
+            return failed
+
+    def fails(self, video_id: str, start: int, attempt: int) -> bool:
+        """Return whether request number ``attempt``, from ``0``, for the range
+        of ``video_id`` starting at ``start`` fails."""
+        draw = random.Random(f"{self.config.seed}:{video_id}:{start}:{attempt}")
+        return draw.random() < self.config.failure_rate
+
+    def youtube_cls(self, size: int) -> Callable[[str], "FakeYouTube"]:
+        """Return a ``youtube_cls`` factory whose videos weigh ``size`` bytes."""
+        return youtube_factory(self.base_url, size)
+
+
+def youtube_factory(base_url: str, size: int) -> Callable[[str], "FakeYouTube"]:
+    """Return a ``youtube_cls`` factory for the backend running at ``base_url``.
+
+    Unlike :meth:`FakeBackend.youtube_cls` the result can be built in another
+    process than the server's.
+    """
+
+    def create(url: str) -> FakeYouTube:
+        return FakeYouTube(url, base_url, size)
+
+    return create
+
+
+class FakeStream:
+    """Progressive MP4 stream downloaded from a :class:`FakeBackend`.
+
+    Provides the attributes of a ``pytubefix`` stream read by the downloader,
+    including ``url`` for its own HTTP transfer engines.
+    """
+
+    itag = 18
+    resolution = "360p"
+    abr = "96kbps"
+    mime_type = "video/mp4"
+    is_progressive = True
+
+    def __init__(self, video: "FakeYouTube", url: str, filesize: int) -> None:
+        self.video = video
+        self.url = url
+        self.filesize = filesize
+        self.default_filename = f"{video.video_id}.mp4"
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        """Fetch the stream into ``output_path`` and return the file path.
+
+        Raises:
+            urllib.error.HTTPError: If the backend answers with an error.
+        """
+        path = Path(output_path) / (filename or self.default_filename)
+        with urllib.request.urlopen(self.url, timeout=30) as response, path.open(
+            "wb"
+        ) as f:
+            remaining = self.filesize
+            while chunk := response.read(CHUNK_SIZE):
+                f.write(chunk)
+                remaining -= len(chunk)
+                self.video.on_progress(self, chunk, remaining)
+        return str(path)
+
+
+class FakeStreamQuery(list):  # type: ignore[type-arg]
+    """List of streams answering the ``StreamQuery`` calls of the downloader."""
+
+    def filter(self, **criteria: Any) -> "FakeStreamQuery":
+        return self
+
+    def order_by(self, attribute: str) -> "FakeStreamQuery":
+        return self
+
+    def desc(self) -> "FakeStreamQuery":
+        return self
+
+    def first(self) -> FakeStream | None:
+        return self[0] if self else None
+
+    def get_by_itag(self, itag: int) -> FakeStream | None:
+        return next((s for s in self if s.itag == itag), None)
+
+
+class FakeYouTube:
+    """Video following the :class:`~program_youtube_downloader.types.YouTubeVideo`
+    protocol whose metadata and stream come from a :class:`FakeBackend`.
+
+    Creating it fetches ``/player/<video_id>``, so resolution pays the backend
+    latency like a real player request.
+    """
+
+    def __init__(self, url: str, base_url: str, size: int) -> None:
+        self.video_id = shorten_url(url)
+        with urllib.request.urlopen(
+            f"{base_url}/player/{self.video_id}", timeout=30
+        ) as response:
+            player = json.loads(response.read())
+        self._title = player["title"]
+        self.on_progress: Callable[[Any, bytes, int], None] = lambda *a: None
+        stream_url = f"{base_url}/videos/{self.video_id}?size={size}"
+        self.streams = FakeStreamQuery([FakeStream(self, stream_url, size)])
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    def register_on_progress_callback(
+        self, cb: Callable[[Any, bytes, int], None]
+    ) -> None:
+        self.on_progress = cb
+
+
+__all__ = [
+    "BackendConfig",
+    "FakeBackend",
+    "FakeStream",
+    "FakeStreamQuery",
+    "FakeYouTube",
+    "youtube_factory",
+]
@@ -0,0 +1,356 @@
+"""Benchmark ``download_multiple_videos`` against a :class:`FakeBackend`.
+
+Each scenario (engine, ``max_workers`` and batch size) downloads a batch of
+synthetic videos in a fresh process, so that its CPU time and peak resident
+memory are not mixed with the server's or another scenario's. The report
+gives, per scenario, the throughput, the p50 and p99 latency of an item
+(resolution and download, retries included), the CPU time and the peak RSS.
+
+Example::
+
+    python -m benchmarks.bench_downloads --workers 1,4,16 --batch-sizes 20,100 \\
+        --latency 0.05 --bandwidth 5M --json results.json
+
+A previous ``--json`` report passed to ``--baseline`` makes the run fail
+when a scenario got slower than ``--tolerance`` allows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.progress import NullProgressHandler
+from program_youtube_downloader.ratelimit import parse_rate
+from program_youtube_downloader.retry import RetryPolicy
+
+from .backend import BackendConfig, FakeBackend, youtube_factory
+
+try:  # pragma: no cover - not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+ENGINES = ("threads", "asyncio")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One measured batch."""
+
+    engine: str
+    max_workers: int
+    batch_size: int
+    size: int
+    segments: int = 1
+
+    @property
+    def key(self) -> str:
+        """Identifier used to compare a scenario with a baseline."""
+        return (
+            f"{self.engine}/w{self.max_workers}/n{self.batch_size}"
+            f"/s{self.size}/seg{self.segments}"
+        )
+
+
+@dataclass
+class Report:
+    """Measures of one :class:`Scenario`.
+
+    Attributes:
+        wall_time: Seconds taken by ``download_multiple_videos``.
+        items_per_second: Videos downloaded per second of ``wall_time``.
+        mib_per_second: Mebibytes downloaded per second of ``wall_time``.
+        p50: Median latency of a video, in seconds.
+        p99: 99th percentile latency of a video, in seconds.
+        cpu_time: User and system CPU seconds of the benchmark process.
+        max_rss_mib: Peak resident memory of the benchmark process, ``None``
+            where the ``resource`` module is not available.
+        failed: Number of videos not downloaded.
+        retries: Number of download attempts retried.
+    """
+
+    scenario: Scenario
+    wall_time: float
+    items_per_second: float
+    mib_per_second: float
+    p50: float
+    p99: float
+    cpu_time: float
+    max_rss_mib: float | None
+    failed: int
+    retries: int
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["key"] = self.scenario.key
+        return data
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return the ``q`` percentile of ``values`` by the nearest-rank method."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def _cpu_time() -> float:
+    if resource is None:  # pragma: no cover
+        return time.process_time()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _max_rss_mib() -> float | None:
+    if resource is None:  # pragma: no cover
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kibibytes on Linux, bytes on macOS.
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _downloader(engine: str, youtube_cls: Any) -> YoutubeDownloader:
+    if engine == "asyncio":
+        from program_youtube_downloader.async_downloader import AsyncYoutubeDownloader
+
+        return AsyncYoutubeDownloader(NullProgressHandler(), youtube_cls)
+    return YoutubeDownloader(NullProgressHandler(), youtube_cls)
+
+
+def run_scenario(scenario: Scenario, base_url: str) -> Report:
+    """Download a batch described by ``scenario`` from the backend at ``base_url``.
+
+    Runs in the calling process: use :func:`run_isolated` for CPU and memory
+    figures that only account for the downloader.
+    """
+    urls = [f"https://youtu.be/{i:011d}" for i in range(scenario.batch_size)]
+    downloader = _downloader(
+        scenario.engine, youtube_factory(base_url, scenario.size)
+    )
+    with tempfile.TemporaryDirectory(prefix="pydl-bench-") as tmp:
+        # Explicit values so that PYDL_* variables cannot change the measure.
+        options = DownloadOptions(
+            save_path=Path(tmp),
+            progress_handler=NullProgressHandler(),
+            max_workers=scenario.max_workers,
+            resolve_workers=scenario.max_workers,
+            metadata_cache=None,
+            archive=None,
+            job_queue=None,
+            results_file=None,
+            segments=scenario.segments,
+            retry_policy=RetryPolicy(max_attempts=5, base_delay=0.0, jitter=0.0),
+            rate_limiter=None,
+            interactive=False,
+        )
+        cpu = _cpu_time()
+        started = time.perf_counter()
+        result = downloader.download_multiple_videos(urls, options)
+        wall_time = time.perf_counter() - started
+        cpu = _cpu_time() - cpu
+
+    latencies = [
+        (i.resolve_time or 0.0) + (i.download_time or 0.0) for i in result.items
+    ]
+    done = [i for i in result.items if i.ok]
+    elapsed = wall_time or float("inf")
+    return Report(
+        scenario=scenario,
+        wall_time=wall_time,
+        items_per_second=len(done) / elapsed,
+        mib_per_second=sum(i.bytes or 0 for i in done) / (1024 * 1024) / elapsed,
+        p50=percentile(latencies, 50),
+        p99=percentile(latencies, 99),
+        cpu_time=cpu,
+        max_rss_mib=_max_rss_mib(),
+        failed=len(result.failed),
+        retries=sum(i.retries for i in result.items),
+    )
+
+
+def _quiet() -> None:
+    """Silence the logs and console messages of a benchmark process."""
+    logging.disable(logging.CRITICAL)
+    sys.stdout = open(os.devnull, "w")
+
+
+def run_isolated(scenario: Scenario, base_url: str) -> Report:
+    """Run :func:`run_scenario` in a new, silent process and return its report."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=context, initializer=_quiet
+    ) as pool:
+        return pool.submit(run_scenario, scenario, base_url).result()
+
+
+def compare(
+    reports: Sequence[Report], baseline: dict[str, dict[str, Any]], tolerance: float
+) -> list[str]:
+    """Return a message for every scenario slower than in ``baseline``.
+
+    A scenario regresses when its throughput drops, or its p99 latency
+    grows, by more than ``tolerance`` (a fraction) of the baseline value.
+    Scenarios missing from ``baseline`` are not compared.
+    """
+    regressions = []
+    for report in reports:
+        reference = baseline.get(report.scenario.key)
+        if reference is None:
+            continue
+        floor = reference["items_per_second"] * (1 - tolerance)
+        if report.items_per_second < floor:
+            regressions.append(
+                f"{report.scenario.key}: débit {report.items_per_second:.2f}/s "
+                f"< {reference['items_per_second']:.2f}/s"
+            )
+        ceiling = reference["p99"] * (1 + tolerance)
+        if report.p99 > ceiling:
+            regressions.append(
+                f"{report.scenario.key}: p99 {report.p99:.3f}s "
+                f"> {reference['p99']:.3f}s"
+            )
+    return regressions
+
+
+def format_table(reports: Sequence[Report]) -> str:
+    """Return ``reports`` as a plain text table."""
+    header = (
+        f"{'scénario':<34} {'items/s':>8} {'Mio/s':>8} {'p50 s':>7} "
+        f"{'p99 s':>7} {'CPU s':>7} {'RSS Mio':>8} {'échecs':>6} {'reprises':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        rss = f"{r.max_rss_mib:.1f}" if r.max_rss_mib is not None else "-"
+        lines.append(
+            f"{r.scenario.key:<34} {r.items_per_second:>8.2f} "
+            f"{r.mib_per_second:>8.2f} {r.p50:>7.3f} {r.p99:>7.3f} "
+            f"{r.cpu_time:>7.2f} {rss:>8} {r.failed:>6} {r.retries:>8}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> list[int]:
+    try:
+        numbers = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"liste d'entiers invalide : {value}")
+    if not numbers or min(numbers) < 1:
+        raise argparse.ArgumentTypeError(f"liste d'entiers invalide : {value}")
+    return numbers
+
+
+def _size(value: str) -> int:
+    try:
+        return int(parse_rate(value))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.bench_downloads",
+        description="Mesure download_multiple_videos sur un serveur HTTP local simulé.",
+    )
+    parser.add_argument(
+        "--engine", choices=[*ENGINES, "all"], default="threads",
+        help="Moteur de téléchargement mesuré",
+    )
+    parser.add_argument(
+        "--workers", type=_int_list, default=[1, 4, 16],
+        help="Valeurs de max_workers, séparées par des virgules",
+    )
+    parser.add_argument(
+        "--batch-sizes", type=_int_list, default=[20, 100],
+        help="Nombres de vidéos par lot, séparés par des virgules",
+    )
+    parser.add_argument(
+        "--size", type=_size, default=1024 * 1024,
+        help="Taille de chaque flux (suffixes K, M, G acceptés)",
+    )
+    parser.add_argument(
+        "--segments", type=int, default=1,
+        help="Connexions par flux (moteur threads)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02,
+        help="Latence du serveur par requête, en secondes",
+    )
+    parser.add_argument(
+        "--bandwidth", type=_size, default=0,
+        help="Débit par connexion en octets/s (suffixes acceptés), 0 = illimité",
+    )
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0,
+        help="Part des requêtes de flux échouant en 503",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", type=Path, metavar="FICHIER",
+        help="Écrit les mesures dans ce fichier JSON",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, metavar="FICHIER",
+        help="Rapport JSON de référence ; échoue en cas de régression",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Dégradation tolérée par rapport à --baseline (fraction)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run every scenario of ``argv`` and return the exit status.
+
+    Returns ``1`` when ``--baseline`` is given and a scenario regressed.
+    """
+    args = parse_args(argv)
+    engines = ENGINES if args.engine == "all" else (args.engine,)
+    scenarios = [
+        Scenario(engine, workers, batch_size, args.size, args.segments)
+        for engine in engines
+        for batch_size in args.batch_sizes
+        for workers in args.workers
+    ]
+    config = BackendConfig(
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    reports = []
+    with FakeBackend(config) as backend:
+        for scenario in scenarios:
+            print(f"… {scenario.key}", file=sys.stderr, flush=True)
+            reports.append(run_isolated(scenario, backend.base_url))
+    print(format_table(reports))
+
+    if args.json:
+        document = {"backend": asdict(config), "reports": [r.to_dict() for r in reports]}
+        args.json.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    if args.baseline:
+        data = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline = {r["key"]: r for r in data["reports"]}
+        regressions = compare(reports, baseline, args.tolerance)
+        for message in regressions:
+            print(f"RÉGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
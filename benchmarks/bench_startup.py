@@ -0,0 +1,76 @@
+"""Benchmark of the CLI start-up time.
+
+Imports :mod:`program_youtube_downloader.main` in fresh interpreters with
+``python -X importtime`` and reports the cumulative import time of the
+fastest run. The first run only fills the bytecode cache and is ignored.
+Importing pytubefix, pytube and colorama up front took about 400 ms; the
+target of the lazy imports is 100 ms.
+
+Example::
+
+    python -m benchmarks.bench_startup --repeat 5 --max-ms 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+MODULE = "program_youtube_downloader.main"
+
+
+def import_times(pycache: Path) -> dict[str, int]:
+    """Return the cumulative import time of each module, in microseconds."""
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=str(pycache))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.bench_startup",
+        description="Mesure le temps d'import de la CLI.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures")
+    parser.add_argument(
+        "--max-ms", type=float, default=0.0,
+        help="Échoue si l'import dure plus longtemps (en ms)",
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pycache:
+        runs = [import_times(Path(pycache)) for _ in range(args.repeat + 1)][1:]
+    best = min(run[MODULE] for run in runs) / 1000
+    slowest = sorted(
+        (item for item in runs[0].items() if item[0] != MODULE),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    print(f"import de {MODULE} : {best:.1f} ms")
+    for name, micros in slowest[:5]:
+        print(f"  {name:<40} {micros / 1000:6.1f} ms")
+    return 1 if args.max_ms and best > args.max_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
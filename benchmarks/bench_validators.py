@@ -0,0 +1,110 @@
+"""Micro-benchmark of URL validation and video ID extraction.
+
+Compares, on a generated URL list, the former per-URL work of a batch --
+:func:`urllib.parse.urlparse`, :func:`~urllib.parse.parse_qs` and a regular
+expression to validate, then a second parse to extract the ID for logs and
+keys -- with :func:`~program_youtube_downloader.validators.validate_many`,
+which scans the common link forms once.
+
+Example::
+
+    python -m benchmarks.bench_validators --count 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from program_youtube_downloader.exceptions import InvalidURLError
+from program_youtube_downloader.validators import _parse_video_id, validate_many
+
+_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+_FORMS = (
+    "https://www.youtube.com/watch?v={}",
+    "https://www.youtube.com/watch?v={}&t=42",
+    "https://youtu.be/{}",
+    "https://youtu.be/{}?t=10",
+    "https://www.youtube.com/shorts/{}",
+    "https://youtube.com/watch?v={}&list=PL0123",
+    # Forms left to the full parser, and invalid lines.
+    "https://www.YouTube.com/watch?v={}",
+    "https://www.youtube.com/watch?t=5&v={}",
+    "https://example.com/watch?v={}",
+    "not a url {}",
+)
+_WEIGHTS = (30, 10, 25, 5, 10, 5, 5, 4, 3, 3)
+
+
+def make_urls(count: int, seed: int = 0) -> list[str]:
+    """Return ``count`` URLs mixing common, unusual and invalid forms."""
+    rng = random.Random(seed)
+    forms = rng.choices(_FORMS, _WEIGHTS, k=count)
+    return [
+        form.format("".join(rng.choices(_ALPHABET, k=11))) for form in forms
+    ]
+
+
+def _legacy_shorten(url: str) -> str:
+    parsed = urlparse(url.strip())
+    if parsed.netloc.lower() in {"youtu.be", "www.youtu.be"}:
+        return parsed.path.strip("/").split("/", 1)[0] or "<url>"
+    if parsed.path.startswith("/shorts/"):
+        return parsed.path.split("/")[2] or "<url>"
+    return parse_qs(parsed.query).get("v", [""])[0] or "<url>"
+
+
+def legacy(lines: Sequence[str]) -> list[str | None]:
+    """Validate then shorten each URL with the full parser, as before."""
+    ids: list[str | None] = []
+    for line in lines:
+        try:
+            _parse_video_id(line)
+        except InvalidURLError:
+            ids.append(None)
+            continue
+        ids.append(_legacy_shorten(line))
+    return ids
+
+
+def best_time(
+    func: Callable[[Sequence[str]], object], urls: Sequence[str], repeat: int
+) -> float:
+    """Return the fastest of ``repeat`` runs of ``func(urls)``, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(urls)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.bench_validators",
+        description="Compare la validation d'URL historique et validate_many.",
+    )
+    parser.add_argument("--count", type=int, default=200_000, help="Nombre d'URL")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures")
+    parser.add_argument(
+        "--min-speedup", type=float, default=0.0,
+        help="Échoue si l'accélération est inférieure à cette valeur",
+    )
+    args = parser.parse_args(argv)
+
+    urls = make_urls(args.count)
+    before = best_time(legacy, urls, args.repeat)
+    after = best_time(validate_many, urls, args.repeat)
+    speedup = before / after if after else float("inf")
+    for name, seconds in (("avant", before), ("validate_many", after)):
+        print(f"{name:<14} {seconds * 1e9 / len(urls):8.0f} ns/URL")
+    print(f"accélération   {speedup:8.1f}x")
+    return 1 if speedup < args.min_speedup else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
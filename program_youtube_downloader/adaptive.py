@@ -0,0 +1,135 @@
+"""Adaptive (DASH) downloads: separate video and audio streams muxed by ffmpeg."""
+
+from __future__ import annotations
+
+import logging
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any
+
+from .exceptions import MuxError, StreamAccessError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FFMPEG = "ffmpeg"
+
+
+def find_ffmpeg(ffmpeg: str = DEFAULT_FFMPEG) -> str | None:
+    """Return the full path of the ``ffmpeg`` executable, or ``None``."""
+    return shutil.which(ffmpeg)
+
+
+def output_extension(video_subtype: str, audio_subtype: str) -> str:
+    """Return the container able to hold both streams without re-encoding."""
+    if video_subtype == "mp4" and audio_subtype in {"mp4", "m4a"}:
+        return "mp4"
+    if video_subtype == audio_subtype == "webm":
+        return "webm"
+    return "mkv"
+
+
+def mux(
+    video_path: Path,
+    audio_path: Path,
+    output_path: Path,
+    ffmpeg: str = DEFAULT_FFMPEG,
+) -> Path:
+    """Merge ``video_path`` and ``audio_path`` into ``output_path``.
+
+    Streams are copied as they are (``-c copy``): no re-encoding takes place,
+    so muxing costs little more than writing the output file.
+
+    Raises:
+        MuxError: If ffmpeg exits with an error.
+        OSError: If ffmpeg cannot be started.
+    """
+    command = [
+        ffmpeg,
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        str(video_path),
+        "-i",
+        str(audio_path),
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c",
+        "copy",
+        str(output_path),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise MuxError(
+            f"ffmpeg a échoué ({completed.returncode}) : {completed.stderr.strip()}"
+        )
+    return output_path
+
+
+def best_audio_for(streams: Any, video: Any) -> Any:
+    """Return the best audio-only stream of ``streams`` to pair with ``video``.
+
+    Audio in the container of ``video`` is preferred so that the result can
+    keep that container.
+    """
+    audio = streams.filter(only_audio=True)
+    subtype = getattr(video, "subtype", None)
+    return (
+        audio.filter(subtype=subtype).order_by("abr").desc().first()
+        or audio.order_by("abr").desc().first()
+    )
+
+
+class AdaptiveStream:
+    """Video-only stream paired with the best matching audio-only stream.
+
+    Attributes of the video stream (``itag``, ``resolution`` ...) are exposed
+    unchanged. The audio stream is only looked up in ``source``, the real
+    video object, on first access, typically inside a download worker.
+    """
+
+    def __init__(self, video: Any, source: Any) -> None:
+        self.video = video
+        self.itag = video.itag
+        self.resolution = getattr(video, "resolution", None)
+        self._source = source
+        self._audio: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def audio(self) -> Any:
+        """Audio-only stream muxed with :attr:`video`."""
+        with self._lock:
+            if self._audio is None:
+                audio = best_audio_for(self._source.streams, self.video)
+                if audio is None:
+                    raise StreamAccessError("Aucun flux audio disponible")
+                self._audio = audio
+            return self._audio
+
+    @property
+    def default_filename(self) -> str:
+        """Name of the muxed file, with the extension of its container."""
+        video_name = Path(self.video.default_filename)
+        audio_subtype = getattr(self.audio, "subtype", "")
+        extension = output_extension(getattr(self.video, "subtype", ""), audio_subtype)
+        return f"{video_name.stem}.{extension}"
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.video, name)
+
+
+__all__ = [
+    "AdaptiveStream",
+    "best_audio_for",
+    "find_ffmpeg",
+    "mux",
+    "output_extension",
+    "DEFAULT_FFMPEG",
+]
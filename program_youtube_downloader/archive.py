@@ -0,0 +1,112 @@
+"""Append-only archive of completed downloads."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchiveEntry:
+    """A completed download as recorded in the archive."""
+
+    video_id: str
+    kind: str
+    itag: int
+    path: str
+    size: int
+    sha256: str
+    downloaded_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_file(
+        cls, video_id: str, kind: str, itag: int, path: Path
+    ) -> "ArchiveEntry":
+        """Describe ``path`` with its size and SHA-256 checksum."""
+        with path.open("rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        return cls(
+            video_id=video_id,
+            kind=kind,
+            itag=int(itag),
+            path=str(path),
+            size=path.stat().st_size,
+            sha256=digest,
+        )
+
+
+class DownloadArchive:
+    """Record of downloaded videos backed by a JSON Lines file.
+
+    Every completed download is appended to ``path`` as one line. The keys
+    ``(video_id, kind)`` are also kept in an in-memory set so that
+    :meth:`contains` answers in constant time without any network access.
+    ``kind`` distinguishes audio-only downloads (``"audio"``) from videos
+    (``"video"``).
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Use the archive stored at ``path``, loaded on first use."""
+        self.path = Path(path)
+        self._keys: set[str] = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._keys)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+
+    @staticmethod
+    def _key(video_id: str, kind: str) -> str:
+        return f"{kind}:{video_id}"
+
+    def _load(self) -> None:
+        try:
+            f = self.path.open("r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    self._keys.add(self._key(data["video_id"], data["kind"]))
+                except (ValueError, KeyError, TypeError):
+                    # A crash while appending can leave a truncated last line.
+                    logger.warning(
+                        "Ligne %d de l'archive ignorée : entrée invalide",
+                        line_number,
+                    )
+
+    def contains(self, video_id: str, kind: str) -> bool:
+        """Return ``True`` if ``video_id`` was already downloaded as ``kind``."""
+        self._ensure_loaded()
+        return self._key(video_id, kind) in self._keys
+
+    def add(self, entry: ArchiveEntry) -> None:
+        """Append ``entry`` to the archive file and the in-memory index."""
+        line = json.dumps(asdict(entry), ensure_ascii=False)
+        self._ensure_loaded()
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._keys.add(self._key(entry.video_id, entry.kind))
+
+
+__all__ = ["ArchiveEntry", "DownloadArchive"]
@@ -0,0 +1,509 @@
+"""Asyncio download engine running a whole batch on one event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from email.message import Message
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+from urllib.error import HTTPError
+
+from .adaptive import AdaptiveStream, mux
+from .config import DownloadOptions
+from .downloader import _DUPLICATE, YoutubeDownloader, pytubefix_youtube
+from .exceptions import DownloadError
+from .inflight import InFlightDownloads
+from .jobs import JobState
+from .metrics import Metrics
+from .progress import MultiProgressRenderer, ProgressHandler
+from .result import BatchResult
+from .selection import SelectionPolicy
+from .transfer import DEFAULT_CHUNK_SIZE, DEFAULT_TIMEOUT, PART_SUFFIX
+from .types import YouTubeVideo
+from .utils import root_cause, shorten_url
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Batch:
+    """State shared by the tasks of one asynchronous batch."""
+
+    options: DownloadOptions
+    save_path: Path
+    total_links: int | None
+    result: BatchResult
+    selection: SelectionPolicy | None = None
+    session: Any = None
+    seen: int = 0
+    header_logged: bool = False
+    resolving: asyncio.Semaphore = field(init=False)
+    downloading: asyncio.Semaphore = field(init=False)
+    choosing: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def __post_init__(self) -> None:
+        self.resolving = asyncio.Semaphore(self.options.resolve_workers)
+        self.downloading = asyncio.Semaphore(self.options.max_workers)
+
+
+class AsyncYoutubeDownloader(YoutubeDownloader):
+    """:class:`YoutubeDownloader` running its batches on one asyncio event loop.
+
+    Streams are fetched with plain HTTP requests through a single pooled
+    ``aiohttp`` session instead of blocking ``pytubefix`` downloads, so
+    ``DownloadOptions.max_workers`` bounds concurrent transfers with a
+    semaphore rather than with threads and can be raised to hundreds.
+    Progress events, rate limiting, retries, the archive and audio
+    conversion follow the same options as the threaded engine;
+    ``DownloadOptions.resumable`` and ``segments`` are not used.
+
+    ``pytubefix`` metadata lookups are blocking: they run in worker threads,
+    at most ``DownloadOptions.resolve_workers`` at a time, awaited by the
+    loop.
+    """
+
+    def __init__(
+        self,
+        progress_handler: ProgressHandler | None = None,
+        youtube_cls: Callable[[str], YouTubeVideo] = pytubefix_youtube,
+        metrics: Metrics | None = None,
+        in_flight: InFlightDownloads | None = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        """Create the downloader.
+
+        Args:
+            progress_handler: See :class:`YoutubeDownloader`.
+            youtube_cls: See :class:`YoutubeDownloader`.
+            metrics: See :class:`YoutubeDownloader`.
+            in_flight: See :class:`YoutubeDownloader`.
+            chunk_size: Number of bytes read per iteration of a transfer.
+            timeout: Connection and read timeout in seconds.
+
+        Raises:
+            ImportError: If ``aiohttp`` is not installed.
+        """
+
+        if aiohttp is None:
+            raise ImportError(
+                "Le moteur asyncio nécessite aiohttp : "
+                "pip install 'program_youtube_downloader[async]'"
+            )
+        super().__init__(progress_handler, youtube_cls, metrics, in_flight)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+    def download_multiple_videos(
+        self,
+        youtube_video_urls: Iterable[str],
+        options: DownloadOptions,
+    ) -> BatchResult:
+        """Run :meth:`download_multiple_videos_async` on a new event loop.
+
+        Must not be called from a running event loop; await
+        :meth:`download_multiple_videos_async` there instead.
+        """
+
+        return asyncio.run(
+            self.download_multiple_videos_async(youtube_video_urls, options)
+        )
+
+    async def download_multiple_videos_async(
+        self,
+        youtube_video_urls: Iterable[str],
+        options: DownloadOptions,
+    ) -> BatchResult:
+        """Download one or more videos or audio tracks concurrently.
+
+        Every video is handled by its own task: resolution, stream
+        selection, transfer and audio conversion. At most
+        ``options.max_workers + options.queue_size`` tasks exist at a time,
+        so a streamed source (``options.streaming``) is consumed lazily.
+
+        Returns:
+            The :class:`~program_youtube_downloader.result.BatchResult` of
+            the batch, as :meth:`YoutubeDownloader.download_multiple_videos`.
+
+        Raises:
+            ValueError: If ``options`` are invalid.
+            RuntimeError: If another batch is running on this instance.
+        """
+
+        with self._exclusive_batch():
+            return await self._download_batch_async(youtube_video_urls, options)
+
+    async def _download_batch_async(
+        self,
+        youtube_video_urls: Iterable[str],
+        options: DownloadOptions,
+    ) -> BatchResult:
+        """Run a batch of :meth:`download_multiple_videos_async`."""
+
+        self._check_options(options)
+        self._options = options
+        self._items = {}
+        self._claims = {}
+        self._adaptive = self._use_adaptive(options)
+        progress_handler = self._batch_progress_handler(options)
+        self._batch_progress = progress_handler
+
+        url_source: Iterable[str]
+        total_links: int | None
+        if options.streaming:
+            url_source = youtube_video_urls
+            total_links = None
+        else:
+            url_list = list(youtube_video_urls)
+            if not url_list:
+                logger.error("Il n'y a aucune vidéo à télécharger")
+                return BatchResult()
+            url_source = url_list
+            total_links = len(url_list)
+
+        result = BatchResult()
+        url_source = self._collapse_duplicates(url_source, result.duplicates)
+        if options.archive is not None:
+            url_source = self._skip_archived(
+                url_source,
+                options.archive,
+                "audio" if options.download_sound_only else "video",
+                result.skipped,
+            )
+        if options.job_queue is not None:
+            url_source = self._skip_done(url_source, options.job_queue, result.skipped)
+
+        batch = _Batch(
+            options,
+            options.save_path or Path.cwd(),
+            total_links,
+            result,
+            selection=options.selection,
+        )
+        if options.job_queue is not None:
+            self._save_job_settings(
+                options.job_queue,
+                batch.save_path,
+                options.download_sound_only,
+                batch.selection,
+            )
+        self._transcoder = self._use_transcoder(options)
+        try:
+            async with self._open_session(options) as session:
+                batch.session = session
+                await self._run_batch(batch, iter(url_source))
+        finally:
+            if isinstance(progress_handler, MultiProgressRenderer):
+                progress_handler.close()
+            self._batch_progress = None
+            if self._transcoder is not None:
+                await asyncio.to_thread(self._transcoder.close)
+                self._transcoder = None
+            self._release_all()
+
+        self._save_metadata_cache(options)
+        self._log_collapsed(result)
+        if not batch.seen and not result.skipped:
+            logger.error("Il n'y a aucune vidéo à télécharger")
+            return result
+
+        self._report_errors({}, result)
+        self._write_results(options, result)
+        if self.metrics:
+            self.metrics.flush(force=True)
+        return result
+
+    def _open_session(self, options: DownloadOptions) -> Any:
+        """Return the HTTP session whose connections every transfer reuses."""
+
+        # Adaptive videos transfer two streams at once.
+        connector = aiohttp.TCPConnector(
+            limit=options.max_workers * 2, ttl_dns_cache=300
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=self.timeout, sock_read=self.timeout
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def _run_batch(self, batch: _Batch, urls: Iterator[str]) -> None:
+        """Start one task per URL of ``urls`` and wait for all of them."""
+
+        options = batch.options
+        capacity = asyncio.Semaphore(options.max_workers + options.queue_size)
+        tasks: set[asyncio.Task[None]] = set()
+
+        def finished(task: asyncio.Task[None]) -> None:
+            tasks.discard(task)
+            capacity.release()
+            if self.metrics:
+                self.metrics.queue_depth.set(len(tasks))
+
+        try:
+            while True:
+                await capacity.acquire()
+                try:
+                    if options.streaming:
+                        # Paging through a playlist or a channel blocks.
+                        video_url = await asyncio.to_thread(next, urls, None)
+                    else:
+                        video_url = next(urls, None)
+                except Exception:
+                    logger.exception("Erreur lors de la lecture de la liste des vidéos")
+                    video_url = None
+                if video_url is None:
+                    capacity.release()
+                    break
+                batch.seen += 1
+                task = asyncio.create_task(self._process_video(batch, video_url))
+                tasks.add(task)
+                task.add_done_callback(finished)
+                if self.metrics:
+                    self.metrics.queue_depth.set(len(tasks))
+            if tasks:
+                await asyncio.wait(set(tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _process_video(self, batch: _Batch, video_url: str) -> None:
+        """Download ``video_url`` and record its outcome in ``batch.result``."""
+
+        try:
+            error = await self._download_video_async(batch, video_url)
+        except Exception as e:
+            self._release(video_url, False)
+            if not isinstance(e, DownloadError):  # pragma: no cover - defensive
+                logger.exception(
+                    "Erreur inattendue pendant le téléchargement de %s",
+                    shorten_url(video_url),
+                )
+            self._mark_job(video_url, JobState.FAILED, reason=self._failure_reason(e))
+            error = type(root_cause(e)).__name__
+        if error is _DUPLICATE:
+            self._record_duplicate(batch.result, video_url)
+            return
+        self._release(video_url, error is None)
+        self._finish_item(batch.result, video_url, error)
+
+    async def _download_video_async(
+        self, batch: _Batch, video_url: str
+    ) -> Any:
+        """Resolve, select, download and convert ``video_url``.
+
+        Returns ``None`` on success, the error recorded in the
+        :class:`~program_youtube_downloader.result.ItemRecord` of a video
+        that cannot be resolved or has no stream matching the selection
+        policy, or ``_DUPLICATE`` if another batch of the process downloaded
+        the video meanwhile.
+
+        Raises:
+            DownloadError: If the transfer or the audio conversion fails.
+        """
+
+        options = batch.options
+        sound_only = options.download_sound_only
+        # Wait on the loop rather than in the resolver thread.
+        while (owner := self._claim(video_url)) is not None:
+            if await asyncio.wrap_future(owner):
+                return _DUPLICATE
+        async with batch.resolving:
+            prepared = await asyncio.to_thread(
+                self._resolve_one, video_url, sound_only, None
+            )
+        if prepared is None:
+            self._mark_job(
+                video_url, JobState.FAILED, reason="métadonnées indisponibles"
+            )
+            return "unresolved"
+        streams, youtube_video, video_title = prepared
+
+        async with batch.choosing:
+            if batch.selection is None:
+                batch.selection = self._selection_from_choice(
+                    sound_only, streams, options.choice_callback
+                )
+            if not batch.header_logged:
+                batch.header_logged = True
+                self._log_batch_header(batch.total_links)
+                if options.job_queue is not None:
+                    self._save_job_settings(
+                        options.job_queue, batch.save_path, sound_only, batch.selection
+                    )
+
+        chosen = batch.selection.select(streams, sound_only)
+        if chosen is None:
+            logger.error(
+                "Aucun flux ne correspond à la qualité demandée pour %s",
+                shorten_url(video_url),
+            )
+            self._mark_job(
+                video_url,
+                JobState.FAILED,
+                reason="aucun flux ne correspond à la qualité demandée",
+            )
+            return "no_matching_stream"
+        stream = await asyncio.to_thread(self._stream_for, youtube_video, chosen.itag)
+        logger.info(f"Titre : {video_title[0:53]}")
+
+        item = self._item(video_url)
+        item.itag = chosen.itag
+        slots = options.download_slots
+        async with batch.downloading:
+            if slots is not None:
+                # Shared with other batches, which may run in other threads.
+                await asyncio.to_thread(slots.acquire)
+            started = time.perf_counter()
+            try:
+                with self._downloading_job(stream, video_url):
+                    out_file = await self._download_with_retries(
+                        batch, stream, video_url
+                    )
+            finally:
+                if slots is not None:
+                    slots.release()
+                item.download_time = time.perf_counter() - started
+                if self.metrics:
+                    self.metrics.download_seconds.observe(item.download_time)
+        item.bytes = out_file.stat().st_size
+
+        if sound_only:
+            extracted = self._extract_audio(stream, video_url, out_file)
+            if isinstance(extracted, Future):
+                # The conversion records the archive entry itself.
+                await asyncio.wrap_future(extracted)
+                return None
+            out_file = extracted
+        self._record_download(stream, video_url, sound_only, out_file)
+        return None
+
+    async def _download_with_retries(
+        self, batch: _Batch, stream: Any, video_url: str
+    ) -> Path:
+        """Download ``stream``, retrying as ``DownloadOptions.retry_policy`` allows.
+
+        Raises:
+            DownloadError: Once the policy gives up.
+        """
+
+        policy = batch.options.retry_policy
+        item = self._item(video_url)
+        attempt = 0
+        while True:
+            attempt += 1
+            item.retries = attempt - 1
+            try:
+                return await self._attempt_download_async(batch, stream)
+            except Exception as e:
+                logger.error(
+                    "Le téléchargement de %s a échoué : %s",
+                    shorten_url(video_url),
+                    e,
+                )
+                if attempt >= policy.max_attempts or not policy.is_retryable(e):
+                    raise DownloadError(
+                        f"Echec du téléchargement pour {video_url}"
+                    ) from e
+                if self.metrics:
+                    self.metrics.retries.inc(type(root_cause(e)).__name__)
+                delay = policy.delay(attempt, e)
+                logger.warning(
+                    "Nouvelle tentative pour %s dans %.1f s (%d/%d)",
+                    shorten_url(video_url),
+                    delay,
+                    attempt + 1,
+                    policy.max_attempts,
+                )
+                await asyncio.sleep(delay)
+
+    async def _attempt_download_async(self, batch: _Batch, stream: Any) -> Path:
+        """Download ``stream`` once, fetching and muxing both parts if adaptive."""
+
+        if not isinstance(stream, AdaptiveStream):
+            return await self._fetch(
+                batch, stream, batch.save_path / stream.default_filename
+            )
+
+        # Looking up the audio stream may query YouTube.
+        output, video_name, audio_name = await asyncio.to_thread(
+            self._adaptive_paths, stream, batch.save_path
+        )
+        async with asyncio.TaskGroup() as group:
+            video = group.create_task(
+                self._fetch(batch, stream.video, batch.save_path / video_name)
+            )
+            audio = group.create_task(
+                self._fetch(batch, stream.audio, batch.save_path / audio_name)
+            )
+        video_path, audio_path = video.result(), audio.result()
+        await asyncio.to_thread(
+            mux, video_path, audio_path, output, batch.options.ffmpeg
+        )
+        video_path.unlink(missing_ok=True)
+        audio_path.unlink(missing_ok=True)
+        return output
+
+    async def _fetch(self, batch: _Batch, stream: Any, destination: Path) -> Path:
+        """Stream ``stream.url`` into ``destination`` through a ``.part`` file.
+
+        Raises:
+            HTTPError: If the server answers with an error status.
+            DownloadError: If fewer bytes than the stream size are received.
+        """
+
+        # The size of a pytubefix stream may cost a HEAD request, and the URL
+        # of a cached stream looks the real stream up first.
+        url = await asyncio.to_thread(getattr, stream, "url")
+        tracker = await asyncio.to_thread(
+            self._progress_tracker,
+            stream,
+            self._batch_progress or self.progress_handler,
+        )
+        limiter = batch.options.rate_limiter
+        bucket = limiter.worker_bucket() if limiter else None
+        metrics = self.metrics
+        part = destination.with_name(destination.name + PART_SUFFIX)
+        downloaded = 0
+        try:
+            async with batch.session.get(url) as response:
+                if response.status >= 400:
+                    headers = Message()
+                    for name, value in response.headers.items():
+                        headers[name] = value
+                    raise HTTPError(
+                        url, response.status, response.reason or "", headers, None
+                    )
+                with part.open("wb") as f:
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        if metrics:
+                            metrics.bytes_downloaded.inc(amount=len(chunk))
+                        if tracker.total:
+                            tracker.update(downloaded)
+                        if limiter:
+                            delay = limiter.reserve(len(chunk), bucket)
+                            if delay > 0:
+                                await asyncio.sleep(delay)
+            if tracker.total and downloaded != tracker.total:
+                raise DownloadError(
+                    f"Transfert incomplet : {downloaded}/{tracker.total} octets"
+                )
+        except BaseException:
+            part.unlink(missing_ok=True)
+            raise
+        os.replace(part, destination)
+        return destination
+
+
+__all__ = ["AsyncYoutubeDownloader"]
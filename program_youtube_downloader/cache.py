@@ -0,0 +1,270 @@
+"""Persistent on-disk cache of resolved video metadata."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from .exceptions import StreamAccessError
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the on-disk layout changes; older files are ignored.
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class StreamInfo:
+    """Stream attributes that can be reused without contacting YouTube."""
+
+    itag: int
+    resolution: str | None = None
+    abr: str | None = None
+    filesize: int | None = None
+    default_filename: str = ""
+
+    @classmethod
+    def from_stream(cls, stream: Any) -> "StreamInfo":
+        """Build a :class:`StreamInfo` from a ``pytubefix`` stream."""
+        # ``Stream.filesize`` issues a HEAD request when the size was not part
+        # of the player response; only record what is already known.
+        filesize = getattr(stream, "_filesize", None)
+        if filesize is None:
+            filesize = getattr(stream, "filesize", None)
+        return cls(
+            itag=int(stream.itag),
+            resolution=getattr(stream, "resolution", None),
+            abr=getattr(stream, "abr", None),
+            filesize=int(filesize) if filesize else None,
+            default_filename=str(getattr(stream, "default_filename", "")),
+        )
+
+
+@dataclass
+class VideoMetadata:
+    """Cached description of a resolved video."""
+
+    video_id: str
+    title: str
+    streams: list[StreamInfo]
+    fetched_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "VideoMetadata":
+        """Rebuild an entry from its JSON representation."""
+        return cls(
+            video_id=data["video_id"],
+            title=data["title"],
+            streams=[StreamInfo(**s) for s in data["streams"]],
+            fetched_at=float(data["fetched_at"]),
+        )
+
+
+class MetadataCache:
+    """Thread-safe LRU cache of :class:`VideoMetadata` persisted as JSON.
+
+    Entries are keyed by video ID and expire ``ttl`` seconds after they were
+    fetched. When more than ``max_entries`` are stored the least recently
+    used ones are evicted. Changes are written to ``path`` by :meth:`save`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = 24 * 3600,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Create the cache; ``path`` is loaded, if it exists, on first use.
+
+        Args:
+            path: JSON file holding the cache.
+            ttl: Lifetime of an entry in seconds.
+            max_entries: Maximum number of entries kept.
+            clock: Function returning the current time, for tests.
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, VideoMetadata] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._loaded = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def _ensure_loaded(self) -> None:
+        """Load :attr:`path` on first use; called with the lock held."""
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+
+    def _load(self) -> None:
+        """Populate the cache from :attr:`path`, ignoring unreadable files."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Cache de métadonnées illisible, il sera reconstruit")
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_FORMAT_VERSION:
+            return
+        now = self._clock()
+        for raw in data.get("entries", []):
+            try:
+                entry = VideoMetadata.from_dict(raw)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if now - entry.fetched_at < self.ttl:
+                self._entries[entry.video_id] = entry
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def get(self, video_id: str) -> VideoMetadata | None:
+        """Return the entry for ``video_id`` or ``None`` if absent or expired."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(video_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self._clock() - entry.fetched_at >= self.ttl:
+                del self._entries[video_id]
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(video_id)
+            self.hits += 1
+            return entry
+
+    def put(self, entry: VideoMetadata) -> None:
+        """Store ``entry``, evicting the least recently used ones if needed."""
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[entry.video_id] = entry
+            self._entries.move_to_end(entry.video_id)
+            self._dirty = True
+            self._evict()
+
+    def save(self) -> None:
+        """Atomically write the cache to :attr:`path` if it changed.
+
+        The file is written under the lock, so that batches sharing the
+        cache and saving at once do not interleave their writes.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": CACHE_FORMAT_VERSION,
+                "entries": [asdict(e) for e in self._entries.values()],
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+
+class CachedStream:
+    """Stream proxy answering cached attributes without network access.
+
+    Attributes recorded in :class:`StreamInfo` are served directly. Any other
+    attribute (``download``, ``url`` ...) resolves the real stream from the
+    underlying video on first use, typically inside a download worker.
+    """
+
+    def __init__(self, info: StreamInfo, video: Any) -> None:
+        self.itag = info.itag
+        self.resolution = info.resolution
+        self.abr = info.abr
+        self.default_filename = info.default_filename
+        if info.filesize:
+            self.filesize = info.filesize
+        self._video = video
+        self._stream: Any = None
+        self._lock = threading.Lock()
+
+    def _resolve(self) -> Any:
+        with self._lock:
+            if self._stream is None:
+                stream = self._video.streams.get_by_itag(self.itag)
+                if stream is None:
+                    raise StreamAccessError(f"Flux {self.itag} introuvable")
+                self._stream = stream
+            return self._stream
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+
+class CachedStreams(list):  # type: ignore[type-arg]
+    """List of :class:`StreamInfo` mimicking ``StreamQuery.get_by_itag``."""
+
+    def __init__(self, infos: list[StreamInfo], video: Any) -> None:
+        super().__init__(infos)
+        self._video = video
+
+    def get_by_itag(self, itag: int) -> CachedStream | None:
+        """Return a lazy stream for ``itag`` or ``None`` if unknown."""
+        for info in self:
+            if info.itag == itag:
+                return CachedStream(info, self._video)
+        return None
+
+
+class CachedVideo:
+    """:class:`~program_youtube_downloader.types.YouTubeVideo` built from the cache.
+
+    ``title`` and ``streams`` come from :class:`VideoMetadata`; the wrapped
+    video object is only queried when a stream is actually downloaded.
+    """
+
+    def __init__(self, video: Any, metadata: VideoMetadata) -> None:
+        self._video = video
+        self._title = metadata.title
+        self.streams = CachedStreams(metadata.streams, video)
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @property
+    def source(self) -> Any:
+        """The wrapped video object, queried on access."""
+        return self._video
+
+    def register_on_progress_callback(
+        self, cb: Callable[[Any, bytes, int], None]
+    ) -> None:
+        self._video.register_on_progress_callback(cb)
+
+
+__all__ = [
+    "StreamInfo",
+    "VideoMetadata",
+    "MetadataCache",
+    "CachedStream",
+    "CachedStreams",
+    "CachedVideo",
+]
@@ -5,18 +5,25 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 from functools import partial
-
-from pytube import Playlist, Channel
-from pytube.exceptions import PytubeError
+from typing import TYPE_CHECKING, Iterable
 
 from . import cli_utils
 from .types import ConsoleIO, DefaultConsoleIO
 from .downloader import YoutubeDownloader
-from .exceptions import PlaylistConnectionError, ChannelConnectionError
+from .exceptions import (
+    PlaylistConnectionError,
+    ChannelConnectionError,
+    DirectoryCreationError,
+)
 from .config import DownloadOptions
+from .progress import NullProgressHandler
+from .selection import SelectionPolicy
 from .constants import MenuOption, SEPARATOR
 from .utils import log_blank_line
 
+if TYPE_CHECKING:  # pragma: no cover - imported on first use
+    from pytube import Channel, Playlist
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,7 +58,12 @@ class CLI:
     # Download option helpers
     # ------------------------------------------------------------------
     def create_download_options(
-        self, audio_only: bool, output_dir: Path | None = None
+        self,
+        audio_only: bool,
+        output_dir: Path | None = None,
+        *,
+        quality: str | SelectionPolicy | None = None,
+        interactive: bool = True,
     ) -> DownloadOptions:
         """Return a fully initialised :class:`DownloadOptions` instance.
 
@@ -63,27 +75,88 @@ class CLI:
         output_dir:
             Optional directory to save the downloads.  If omitted the user is
             prompted for a path via :func:`cli_utils.ask_save_file_path`.
+        quality:
+            :class:`SelectionPolicy`, or its textual form such as
+            ``"best <=1080p"``, choosing the stream of each video without
+            prompting.  ``None`` asks the user, or picks the best stream when
+            ``interactive`` is ``False``.
+        interactive:
+            When ``False`` nothing is asked nor displayed: the output
+            directory defaults to ``PYDL_OUTPUT_DIR`` or the current
+            directory and is created if needed, progress is not drawn and the
+            batch does not pause at the end.
 
         Returns
         -------
         DownloadOptions
             The options object to pass to :meth:`YoutubeDownloader.download_multiple_videos`.
+
+        Raises
+        ------
+        DirectoryCreationError
+            If the output directory of a non interactive run cannot be
+            created.
+        ValueError
+            If ``quality`` is not a valid selection policy.
         """
-        if output_dir is not None:
-            save_path = output_dir.expanduser().resolve()
-        else:
-            save_path = cli_utils.ask_save_file_path(console=self.console)
-        return DownloadOptions(
-            save_path=save_path,
+        if isinstance(quality, str):
+            quality = SelectionPolicy.parse(quality)
+
+        if interactive:
+            if output_dir is not None:
+                save_path = output_dir.expanduser().resolve()
+            else:
+                save_path = cli_utils.ask_save_file_path(console=self.console)
+            options = DownloadOptions(
+                save_path=save_path,
+                download_sound_only=audio_only,
+                choice_callback=partial(
+                    cli_utils.ask_resolution_or_bitrate, console=self.console
+                ),
+            )
+            if quality is not None:
+                options.selection = quality
+            return options
+
+        options = DownloadOptions(
             download_sound_only=audio_only,
-            choice_callback=partial(
-                cli_utils.ask_resolution_or_bitrate, console=self.console
-            ),
+            progress_handler=NullProgressHandler(),
+            interactive=False,
         )
+        if quality is not None:
+            options.selection = quality
+        elif options.selection is None:
+            options.selection = SelectionPolicy()
+        if output_dir is not None:
+            options.save_path = output_dir.expanduser().resolve()
+        if options.save_path is not None:
+            try:
+                options.save_path.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                raise DirectoryCreationError(
+                    f"Création du dossier impossible : {e}"
+                ) from e
+        return options
 
     # ------------------------------------------------------------------
     # Menu handlers
     # ------------------------------------------------------------------
+    def download(self, options: DownloadOptions, urls: Iterable[str]) -> None:
+        """Download ``urls`` with ``options`` then close their job queue.
+
+        Parameters
+        ----------
+        options:
+            Options returned by :meth:`create_download_options`.
+        urls:
+            URLs of the videos to download, possibly yielded lazily.
+        """
+        try:
+            self.downloader.download_multiple_videos(urls, options)
+        finally:
+            if options.job_queue is not None:
+                options.job_queue.close()
+
     def handle_quit_option(self) -> None:
         """Display the closing banner and end of program message."""
         log_blank_line()
@@ -105,7 +178,7 @@ class CLI:
         """
         url = cli_utils.ask_youtube_url(console=self.console)
         options = self.create_download_options(audio_only)
-        self.downloader.download_multiple_videos([url], options)
+        self.download(options, [url])
 
     def handle_videos_option(self, audio_only: bool) -> None:
         """Handle the "download from file" menu entry.
@@ -117,7 +190,7 @@ class CLI:
         """
         urls = cli_utils.ask_youtube_link_file(console=self.console)
         options = self.create_download_options(audio_only)
-        self.downloader.download_multiple_videos(urls, options)
+        self.download(options, urls)
 
     # ------------------------------------------------------------------
     # Loader helpers
@@ -139,6 +212,9 @@ class CLI:
         PlaylistConnectionError
             If the playlist cannot be accessed.
         """
+        from pytube import Playlist
+        from pytube.exceptions import PytubeError
+
         try:
             return Playlist(url)
         except (PytubeError, KeyError, ValueError) as e:
@@ -165,6 +241,9 @@ class CLI:
         ChannelConnectionError
             If the channel cannot be accessed.
         """
+        from pytube import Channel
+        from pytube.exceptions import PytubeError
+
         try:
             return Channel(url)
         except (PytubeError, KeyError, ValueError) as e:
@@ -182,11 +261,15 @@ class CLI:
         audio_only:
             If ``True`` download only the audio tracks from the playlist
             videos.
+
+        The playlist is streamed: downloads start while later pages are
+        still being fetched.
         """
         url = cli_utils.ask_youtube_url(console=self.console)
         playlist = self.load_playlist(url)
         options = self.create_download_options(audio_only)
-        self.downloader.download_multiple_videos(playlist, options)  # type: ignore
+        options.streaming = True
+        self.download(options, playlist)
 
     def handle_channel_option(self, audio_only: bool) -> None:
         """Handle the channel download menu entry.
@@ -196,11 +279,15 @@ class CLI:
         audio_only:
             If ``True`` download only the audio tracks from each video
             of the channel.
+
+        The channel is streamed: downloads start while later pages are
+        still being fetched.
         """
         url = cli_utils.ask_youtube_url(console=self.console)
         channel = self.load_channel(url)
         options = self.create_download_options(audio_only)
-        self.downloader.download_multiple_videos(channel, options)  # type: ignore
+        options.streaming = True
+        self.download(options, channel)
 
     # ------------------------------------------------------------------
     # Interactive menu
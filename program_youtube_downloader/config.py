@@ -1,29 +1,229 @@
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, Callable, Any, TypeVar
+import logging
 import os
+import threading
 
 from .progress import ProgressHandler
+from .cache import MetadataCache
+from .archive import DownloadArchive
+from .jobs import JobQueue
+from .retry import RetryPolicy
+from .ratelimit import BandwidthLimiter, parse_rate
+from .selection import SelectionPolicy
+from .adaptive import DEFAULT_FFMPEG
+from .transcode import DEFAULT_AUDIO_BITRATE, DEFAULT_AUDIO_CODEC
+
+logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"", "0", "false", "no", "off"}
+
 
 def _option_from_env(name: str, converter: Callable[[str], T], default: T) -> T:
-    """Return ``name`` converted by ``converter`` or ``default`` on error."""
+    """Return ``name`` converted by ``converter`` or ``default`` on error.
+
+    A rejected value is logged, so that a typo does not silently turn an
+    option off.
+    """
     value = os.getenv(name)
     if value is None:
         return default
     try:
         return converter(value)
-    except Exception:
+    except Exception as e:
+        logger.warning("Valeur de %s ignorée (%r) : %s", name, value, e)
         return default
 
 
+def _parse_flag(value: str) -> bool:
+    """Return the boolean spelled by ``value``, such as ``1`` or ``off``."""
+    flag = value.strip().lower()
+    if flag not in _TRUE | _FALSE:
+        raise ValueError(f"booléen attendu, pas {value!r}")
+    return flag in _TRUE
+
+
+def _flag_from_env(name: str) -> bool:
+    """Return the boolean environment variable ``name``, ``False`` if unset."""
+    return _option_from_env(name, _parse_flag, False)
+
+
+def _writable_path(value: str) -> Path:
+    """Return ``value`` as a ``Path`` to a file that can be created or written.
+
+    Missing parent directories are created on first use, so the check is
+    done on the nearest existing one.
+    """
+    path = Path(value).expanduser()
+    if path.is_dir():
+        raise ValueError(f"{path} est un dossier")
+    parent = path.parent
+    while not parent.exists():
+        parent = parent.parent
+    if not parent.is_dir() or not os.access(parent, os.W_OK):
+        raise ValueError(f"{parent} n'est pas un dossier accessible en écriture")
+    return path
+
+
 def _max_workers_from_env() -> int:
     """Return ``PYDL_MAX_WORKERS`` as an integer or fallback to ``1``."""
     return _option_from_env("PYDL_MAX_WORKERS", int, 1)
 
 
+def _resolve_workers_from_env() -> int:
+    """Return ``PYDL_RESOLVE_WORKERS`` as an integer or fallback to ``1``."""
+    return _option_from_env("PYDL_RESOLVE_WORKERS", int, 1)
+
+
+def _streaming_from_env() -> bool:
+    """Return ``PYDL_STREAMING`` as a boolean."""
+    return _flag_from_env("PYDL_STREAMING")
+
+
+def _queue_size_from_env() -> int:
+    """Return ``PYDL_QUEUE_SIZE`` as an integer or fallback to ``32``."""
+    return _option_from_env("PYDL_QUEUE_SIZE", int, 32)
+
+
+def _metadata_cache_from_env(
+    locate: Callable[[Path], Path] = lambda path: path,
+) -> Optional[MetadataCache]:
+    """Return a :class:`MetadataCache` stored at ``PYDL_METADATA_CACHE``.
+
+    ``PYDL_CACHE_TTL`` (seconds) and ``PYDL_CACHE_SIZE`` (entries) tune the
+    expiry and eviction policy. ``None`` is returned when the variable is
+    unset. ``locate`` maps the configured path to the file actually loaded,
+    such as the file of one shard.
+    """
+    return _option_from_env(
+        "PYDL_METADATA_CACHE",
+        lambda p: MetadataCache(
+            locate(_writable_path(p)),
+            ttl=_option_from_env("PYDL_CACHE_TTL", float, 24 * 3600.0),
+            max_entries=_option_from_env("PYDL_CACHE_SIZE", int, 10_000),
+        ),
+        None,
+    )
+
+
+def _archive_from_env() -> Optional[DownloadArchive]:
+    """Return a :class:`DownloadArchive` stored at ``PYDL_ARCHIVE`` or ``None``."""
+    return _option_from_env(
+        "PYDL_ARCHIVE",
+        lambda p: DownloadArchive(_writable_path(p)),
+        None,
+    )
+
+
+def _job_queue_from_env() -> Optional[JobQueue]:
+    """Return a :class:`JobQueue` stored at ``PYDL_JOB_QUEUE`` or ``None``."""
+    return _option_from_env(
+        "PYDL_JOB_QUEUE",
+        lambda p: JobQueue(_writable_path(p)),
+        None,
+    )
+
+
+def _results_file_from_env() -> Optional[Path]:
+    """Return ``PYDL_RESULTS_FILE`` as a ``Path`` or ``None``."""
+    return _option_from_env(
+        "PYDL_RESULTS_FILE",
+        _writable_path,
+        None,
+    )
+
+
+def _resumable_from_env() -> bool:
+    """Return ``PYDL_RESUMABLE`` as a boolean."""
+    return _flag_from_env("PYDL_RESUMABLE")
+
+
+def _segments_from_env() -> int:
+    """Return ``PYDL_SEGMENTS`` as an integer or fallback to ``1``."""
+    return _option_from_env("PYDL_SEGMENTS", int, 1)
+
+
+def _retry_policy_from_env() -> RetryPolicy:
+    """Return a :class:`RetryPolicy` tuned by ``PYDL_RETRY_*`` variables.
+
+    ``PYDL_RETRY_ATTEMPTS``, ``PYDL_RETRY_BASE_DELAY`` and
+    ``PYDL_RETRY_MAX_DELAY`` override the matching defaults.
+    """
+    defaults = RetryPolicy()
+    return RetryPolicy(
+        max_attempts=_option_from_env(
+            "PYDL_RETRY_ATTEMPTS", int, defaults.max_attempts
+        ),
+        base_delay=_option_from_env(
+            "PYDL_RETRY_BASE_DELAY", float, defaults.base_delay
+        ),
+        max_delay=_option_from_env(
+            "PYDL_RETRY_MAX_DELAY", float, defaults.max_delay
+        ),
+    )
+
+
+def _rate_limiter_from_env() -> Optional[BandwidthLimiter]:
+    """Return a :class:`BandwidthLimiter` from ``PYDL_RATE_LIMIT`` variables.
+
+    ``PYDL_RATE_LIMIT`` caps the total throughput and
+    ``PYDL_RATE_LIMIT_PER_WORKER`` the throughput of each worker. Values are
+    bytes per second with optional ``K``/``M``/``G`` suffixes. ``None`` is
+    returned when neither is set.
+    """
+    total = _option_from_env("PYDL_RATE_LIMIT", parse_rate, None)
+    per_worker = _option_from_env("PYDL_RATE_LIMIT_PER_WORKER", parse_rate, None)
+    if total is None and per_worker is None:
+        return None
+    return BandwidthLimiter(total, per_worker)
+
+
+def _progress_every_from_env() -> int:
+    """Return ``PYDL_PROGRESS_EVERY`` as an integer or fallback to ``1``."""
+    return _option_from_env("PYDL_PROGRESS_EVERY", int, 1)
+
+
+def _progress_interval_from_env() -> float:
+    """Return ``PYDL_PROGRESS_INTERVAL`` in seconds or fallback to ``0``."""
+    return _option_from_env("PYDL_PROGRESS_INTERVAL", float, 0.0)
+
+
+def _selection_from_env() -> Optional[SelectionPolicy]:
+    """Return the :class:`SelectionPolicy` described by ``PYDL_QUALITY``."""
+    return _option_from_env("PYDL_QUALITY", SelectionPolicy.parse, None)
+
+
+def _adaptive_from_env() -> bool:
+    """Return ``PYDL_ADAPTIVE`` as a boolean."""
+    return _flag_from_env("PYDL_ADAPTIVE")
+
+
+def _ffmpeg_from_env() -> str:
+    """Return ``PYDL_FFMPEG`` or fallback to ``ffmpeg``."""
+    return _option_from_env("PYDL_FFMPEG", str, DEFAULT_FFMPEG)
+
+
+def _audio_codec_from_env() -> str:
+    """Return ``PYDL_AUDIO_CODEC`` or fallback to ``mp3``."""
+    return _option_from_env(
+        "PYDL_AUDIO_CODEC", lambda v: v.strip().lower(), DEFAULT_AUDIO_CODEC
+    )
+
+
+def _audio_bitrate_from_env() -> str:
+    """Return ``PYDL_AUDIO_BITRATE`` or fallback to ``192k``."""
+    return _option_from_env("PYDL_AUDIO_BITRATE", str, DEFAULT_AUDIO_BITRATE)
+
+
+def _transcode_workers_from_env() -> int:
+    """Return ``PYDL_TRANSCODE_WORKERS`` as an integer or fallback to ``2``."""
+    return _option_from_env("PYDL_TRANSCODE_WORKERS", int, 2)
+
+
 def _output_dir_from_env() -> Optional[Path]:
     """Return ``PYDL_OUTPUT_DIR`` as a ``Path`` or ``None``."""
     return _option_from_env(
@@ -35,22 +235,24 @@ def _output_dir_from_env() -> Optional[Path]:
 
 def _audio_only_from_env() -> bool:
     """Return ``PYDL_AUDIO_ONLY`` as a boolean."""
-    return _option_from_env(
-        "PYDL_AUDIO_ONLY",
-        lambda v: v.strip().lower() in {"1", "true", "yes", "on"},
-        False,
-    )
+    return _flag_from_env("PYDL_AUDIO_ONLY")
 
 
 @dataclass
 class DownloadOptions:
     """Options controlling the download workflow.
 
+    Options left out are read from ``PYDL_*`` environment variables; a
+    value that cannot be parsed is logged and the default kept. The cache,
+    archive and job queue they name are only read or opened once a batch
+    uses them.
+
     Attributes:
         save_path: Destination directory for downloaded files. If ``None``
             the current working directory is used.
-        download_sound_only: When ``True`` only the audio track is kept and the
-            resulting file is converted to MP3.
+        download_sound_only: When ``True`` only the audio-only streams of
+            each video are downloaded, then converted according to
+            ``audio_codec``.
         choice_callback: Callback invoked to let the user choose the quality of
             a stream. It receives ``download_sound_only`` and the list of
             available streams and must return the chosen index (starting at 1).
@@ -59,6 +261,80 @@ class DownloadOptions:
         max_workers: Number of simultaneous downloads. ``1`` disables
             threading. If not provided, the value is read from the
             ``PYDL_MAX_WORKERS`` environment variable, defaulting to ``1``.
+        resolve_workers: Number of videos whose metadata (streams and title)
+            is resolved simultaneously. Resolution runs in its own pool and
+            feeds the download pool as soon as each video is ready. Read from
+            ``PYDL_RESOLVE_WORKERS`` when not provided, defaulting to ``1``.
+        streaming: When ``True`` the URL source is consumed lazily by a
+            background producer instead of being materialised in a list, so
+            downloads start with the first URL produced. Read from
+            ``PYDL_STREAMING`` when not provided.
+        queue_size: Maximum number of URLs buffered between the producer and
+            the resolution stage, and of resolved videos waiting for a
+            download slot. Read from ``PYDL_QUEUE_SIZE``, defaulting to ``32``.
+        metadata_cache: Persistent cache of resolved video metadata. Videos
+            found in the cache skip the title and stream lookups during
+            resolution. Created from ``PYDL_METADATA_CACHE`` when set.
+        archive: Record of completed downloads. Videos already archived are
+            skipped without any network access and each successful download
+            is appended with its size and checksum. Created from
+            ``PYDL_ARCHIVE`` when set.
+        job_queue: Durable record of the state of every URL of the batch
+            (pending, resolving, downloading with its progress, done or
+            failed with the reason), from which an interrupted batch is
+            resumed. Created from ``PYDL_JOB_QUEUE`` when set.
+        results_file: JSON Lines file to which the per-URL records of the
+            batch (:class:`~program_youtube_downloader.result.ItemRecord`)
+            are appended once it ends. Read from ``PYDL_RESULTS_FILE``.
+        resumable: When ``True`` streams are written to a ``.part`` file and
+            retries, or later runs, continue from the last byte written using
+            HTTP ``Range`` requests. Read from ``PYDL_RESUMABLE``.
+        segments: Number of connections used to fetch a single stream of
+            known size. Each connection downloads its own byte range straight
+            into a preallocated file. ``1`` disables segmentation. Read from
+            ``PYDL_SEGMENTS`` when not provided.
+        retry_policy: Number of attempts, backoff delays and classification
+            of retryable errors used for each download.
+        rate_limiter: Token bucket limiter applied to every downloaded chunk,
+            shared by all worker threads. Created from ``PYDL_RATE_LIMIT``
+            and ``PYDL_RATE_LIMIT_PER_WORKER`` when set.
+        progress_every: Deliver only one progress update out of
+            ``progress_every`` chunks to the progress handler. Read from
+            ``PYDL_PROGRESS_EVERY``, defaulting to ``1`` (every chunk).
+        progress_interval: Also deliver a progress update once this many
+            seconds have passed since the previous one. Combined with a
+            large ``progress_every`` it turns sampling into a time-based
+            rate. Read from ``PYDL_PROGRESS_INTERVAL``; ``0`` disables it.
+        selection: Policy choosing the stream of each video, such as
+            ``best <=1080p``. When ``None`` the stream picked through
+            ``choice_callback`` on the first video is turned into an
+            equivalent policy for the rest of the batch. Parsed from
+            ``PYDL_QUALITY`` when set.
+        adaptive: When ``True`` videos are fetched as separate adaptive
+            (DASH) video and audio streams, downloaded concurrently and
+            merged without re-encoding by ffmpeg. This reaches resolutions
+            above the 720p of progressive streams. Ignored for audio-only
+            downloads. Read from ``PYDL_ADAPTIVE``.
+        ffmpeg: Name or path of the ffmpeg executable. Read from
+            ``PYDL_FFMPEG``, defaulting to ``ffmpeg``.
+        audio_codec: Codec of audio-only downloads: ``mp3``, ``aac``,
+            ``opus``, ``vorbis`` or ``flac`` to transcode with ffmpeg, or
+            ``copy`` to keep the downloaded codec and only give the file the
+            extension of its container. Read from ``PYDL_AUDIO_CODEC``,
+            defaulting to ``mp3``. Without ffmpeg the ``copy`` behaviour is
+            used.
+        audio_bitrate: Target bitrate of transcoded audio, such as ``192k``.
+            Read from ``PYDL_AUDIO_BITRATE``.
+        transcode_workers: Number of ffmpeg processes converting audio while
+            the following downloads proceed. Read from
+            ``PYDL_TRANSCODE_WORKERS``, defaulting to ``2``.
+        interactive: When ``False`` the batch never waits for the user: the
+            pause before returning to the menu, with its countdown and screen
+            clearing, is skipped. Used by the headless command line mode.
+        download_slots: Semaphore held by each stream download, so that
+            batches sharing it, such as the jobs of the ``serve`` command,
+            never run more downloads at once than its initial value.
+            ``None`` leaves ``max_workers`` as the only limit.
     """
 
     save_path: Optional[Path] = field(default_factory=_output_dir_from_env)
@@ -66,6 +342,31 @@ class DownloadOptions:
     choice_callback: Optional[Callable[[bool, Any], int]] = None
     progress_handler: Optional[ProgressHandler] = None
     max_workers: int = field(default_factory=_max_workers_from_env)
+    resolve_workers: int = field(default_factory=_resolve_workers_from_env)
+    streaming: bool = field(default_factory=_streaming_from_env)
+    queue_size: int = field(default_factory=_queue_size_from_env)
+    metadata_cache: Optional[MetadataCache] = field(
+        default_factory=_metadata_cache_from_env
+    )
+    archive: Optional[DownloadArchive] = field(default_factory=_archive_from_env)
+    job_queue: Optional[JobQueue] = field(default_factory=_job_queue_from_env)
+    results_file: Optional[Path] = field(default_factory=_results_file_from_env)
+    resumable: bool = field(default_factory=_resumable_from_env)
+    segments: int = field(default_factory=_segments_from_env)
+    retry_policy: RetryPolicy = field(default_factory=_retry_policy_from_env)
+    rate_limiter: Optional[BandwidthLimiter] = field(
+        default_factory=_rate_limiter_from_env
+    )
+    progress_every: int = field(default_factory=_progress_every_from_env)
+    progress_interval: float = field(default_factory=_progress_interval_from_env)
+    selection: Optional[SelectionPolicy] = field(default_factory=_selection_from_env)
+    adaptive: bool = field(default_factory=_adaptive_from_env)
+    ffmpeg: str = field(default_factory=_ffmpeg_from_env)
+    audio_codec: str = field(default_factory=_audio_codec_from_env)
+    audio_bitrate: str = field(default_factory=_audio_bitrate_from_env)
+    transcode_workers: int = field(default_factory=_transcode_workers_from_env)
+    interactive: bool = True
+    download_slots: Optional[threading.Semaphore] = None
 
 
 __all__ = ["DownloadOptions"]
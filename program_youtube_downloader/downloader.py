@@ -1,24 +1,73 @@
+from contextlib import contextmanager, nullcontext
 from urllib.error import HTTPError
 from pathlib import Path
-from typing import Union, Iterable, Callable, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Union, Iterable, Iterator, Callable, Any, Hashable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
 import logging
+import queue
+import sqlite3
+import threading
+import time
 
-from pytubefix import YouTube
-from pytube.exceptions import PytubeError
 from .types import YouTubeVideo
+from .urlfile import VideoIdSet
 from .exceptions import DownloadError, StreamAccessError
 from . import cli_utils
 from .config import DownloadOptions
+from .cache import CachedVideo, VideoMetadata, StreamInfo
+from .archive import ArchiveEntry, DownloadArchive
+from .inflight import IN_FLIGHT, InFlightDownloads
+from .jobs import JobProgressHandler, JobQueue, JobState
+from .metrics import Metrics
+from .transfer import download_resumable, download_segmented
+from .adaptive import AdaptiveStream, DEFAULT_FFMPEG, find_ffmpeg, mux
+from .transcode import (
+    AUDIO_CODECS,
+    COPY,
+    AudioTranscoder,
+    container_extension,
+    copy_container,
+)
+from .result import BatchResult, ItemRecord
+from .retry import RetryPolicy
+from .selection import SelectionPolicy
 from .progress import (
     ProgressHandler,
     ProgressBarHandler,
-    create_progress_event,
+    MultiProgressRenderer,
+    ProgressTracker,
 )
-from .utils import shorten_url, log_blank_line
+from .utils import shorten_url, log_blank_line, loaded_errors, root_cause
 
 logger = logging.getLogger(__name__)
 
+# Sentinel marking the end of a streamed URL source.
+_END_OF_SOURCE = object()
+# Returned instead of a resolved video downloaded meanwhile by another batch.
+_DUPLICATE: Any = object()
+
+# Caught by name: ``pytube`` is only imported by the code that raises it.
+_PYTUBE_ERROR = "pytube.exceptions.PytubeError"
+# URLs enqueued per transaction of the job queue.
+_ENQUEUE_CHUNK = 500
+
+
+def pytubefix_youtube(url: str) -> YouTubeVideo:
+    """Return a ``pytubefix.YouTube`` for ``url``, the default ``youtube_cls``.
+
+    ``pytubefix`` takes longer to import than the rest of the program: it is
+    imported on the first video rather than with this module.
+    """
+    from pytubefix import YouTube
+
+    return YouTube(url)
+
 
 class YoutubeDownloader:
     """High level interface for downloading YouTube videos and audio."""
@@ -26,7 +75,9 @@ class YoutubeDownloader:
     def __init__(
         self,
         progress_handler: ProgressHandler | None = None,
-        youtube_cls: Callable[[str], YouTubeVideo] = YouTube,
+        youtube_cls: Callable[[str], YouTubeVideo] = pytubefix_youtube,
+        metrics: Metrics | None = None,
+        in_flight: InFlightDownloads | None = None,
     ) -> None:
         """Create the downloader.
 
@@ -37,15 +88,56 @@ class YoutubeDownloader:
             youtube_cls: Factory used to create objects following the
                 :class:`~program_youtube_downloader.types.YouTubeVideo` protocol.
                 Tests may provide a mock implementation.
+            metrics: Registry updated by every batch of this downloader
+                (bytes, latencies, retries, cache and archive hits). No
+                metrics are collected when ``None``.
+            in_flight: Registry of the videos being downloaded, through
+                which concurrent batches download each video once. Defaults
+                to the registry shared by the whole process.
         """
 
         self.progress_handler = progress_handler or ProgressBarHandler()
+        self._default_progress = progress_handler is None
         self.youtube_cls = youtube_cls
+        self.metrics = metrics
+        self.in_flight = IN_FLIGHT if in_flight is None else in_flight
+        # Options of the batch being processed by download_multiple_videos.
+        self._options: DownloadOptions | None = None
+        # Progress handler of that batch, see _batch_progress_handler.
+        self._batch_progress: ProgressHandler | None = None
+        # Whether that batch downloads adaptive streams muxed by ffmpeg.
+        self._adaptive = False
+        # Pool converting the audio downloads of that batch, if any.
+        self._transcoder: AudioTranscoder | None = None
+        # URL of each stream being downloaded, keyed by ``id(stream)``, so
+        # that the chunks of the HTTP engines update the progress of its job.
+        self._job_streams: dict[int, str] = {}
+        # Records of the URLs of that batch not finished yet.
+        self._items: dict[str, ItemRecord] = {}
+        # In-flight key of each URL of that batch owning its video.
+        self._claims: dict[str, Hashable] = {}
+        # Held while a batch runs, the state above being shared.
+        self._batch_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Private helpers
     # ------------------------------------------------------------------
 
+    @contextmanager
+    def _exclusive_batch(self) -> Iterator[None]:
+        """Hold this instance for one batch.
+
+        Raises:
+            RuntimeError: If a batch is already running on this instance.
+        """
+
+        if not self._batch_lock.acquire(blocking=False):
+            raise RuntimeError("Un lot est déjà en cours sur ce téléchargeur")
+        try:
+            yield
+        finally:
+            self._batch_lock.release()
+
     def _create_youtube(
         self, url: str, progress_handler: ProgressHandler | None
     ) -> YouTubeVideo | None:
@@ -53,23 +145,40 @@ class YoutubeDownloader:
 
         This wrapper centralises error handling around the ``youtube_cls``
         factory provided at construction time.  It returns ``None`` if the
-        object cannot be created.
+        object cannot be created. The callback also throttles each chunk
+        through the batch ``rate_limiter``, if any.
         """
 
+        limiter = self._options.rate_limiter if self._options else None
+        metrics = self.metrics
         try:
             yt = self.youtube_cls(url)
-            if progress_handler:
+            if progress_handler or limiter or metrics:
+                # Adaptive downloads report two streams of the same video.
+                trackers: dict[int, ProgressTracker] = {}
+
                 def _wrapper(stream: Any, chunk: bytes, bytes_remaining: int) -> None:
-                    """Translate pytube progress callback to :class:`ProgressEvent`."""
-                    event = create_progress_event(stream, bytes_remaining)
-                    progress_handler.on_progress(event)
+                    """Forward pytube progress callbacks to a :class:`ProgressTracker`."""
+                    if limiter and chunk:
+                        limiter.throttle(len(chunk))
+                    if metrics and chunk:
+                        metrics.bytes_downloaded.inc(amount=len(chunk))
+                    if progress_handler:
+                        tracker = trackers.get(id(stream))
+                        if tracker is None:
+                            # pytube passes its own stream, not a cached proxy.
+                            tracker = self._progress_tracker(
+                                stream, progress_handler, url
+                            )
+                            trackers[id(stream)] = tracker
+                        tracker.update(tracker.total - bytes_remaining)
 
                 yt.register_on_progress_callback(_wrapper)
             return yt
         except KeyError as e:
             logger.error(f"Problème de clé dans les données : {e}")
             return None
-        except PytubeError as e:
+        except loaded_errors(_PYTUBE_ERROR) as e:
             logger.exception("Erreur lors de la connexion à la vidéo")
             logger.error(f"Connexion à la vidéo impossible : {e}")
             return None
@@ -90,30 +199,265 @@ class YoutubeDownloader:
             return callback(download_sound_only, streams)
         return 1
 
+    def _selection_from_choice(
+        self,
+        download_sound_only: bool,
+        streams: Any,
+        callback: Callable[[bool, Any], int] | None,
+    ) -> SelectionPolicy:
+        """Ask for a stream once and return the equivalent selection policy.
+
+        The policy picks, on every video, the best stream not above the
+        quality chosen for ``streams``. An out of range choice falls back to
+        the best stream instead of failing the batch.
+        """
+
+        index = self._select_stream(download_sound_only, streams, callback)
+        candidates = list(streams)
+        if not 1 <= index <= len(candidates):
+            logger.warning("Choix de flux invalide (%s), meilleur flux utilisé", index)
+            return SelectionPolicy()
+        return SelectionPolicy.matching(candidates[index - 1], download_sound_only)
+
     def _attempt_download(self, stream: Any, save_path: Path) -> Path:
         """Download ``stream`` to ``save_path`` once.
 
         Returns the resulting :class:`~pathlib.Path` on success or raises
-        :class:`DownloadError` if an exception occurs.
+        :class:`DownloadError` if an exception occurs. With
+        ``DownloadOptions.resumable`` the transfer continues from the bytes
+        already written by a previous attempt; with
+        ``DownloadOptions.segments`` greater than one, streams of known size
+        are fetched over several connections.
         """
 
         try:
-            return Path(stream.download(output_path=str(save_path)))
-        except (HTTPError, OSError, PytubeError) as e:
+            if isinstance(stream, AdaptiveStream):
+                return self._adaptive_download(stream, save_path)
+            return self._fetch_stream(stream, save_path)
+        except (HTTPError, OSError) as e:
+            raise DownloadError(str(e)) from e
+        except loaded_errors(_PYTUBE_ERROR) as e:
             raise DownloadError(str(e)) from e
         except Exception as e:  # pragma: no cover - defensive
             raise DownloadError(str(e)) from e
 
+    def _fetch_stream(
+        self, stream: Any, save_path: Path, filename: str | None = None
+    ) -> Path:
+        """Download ``stream`` with the transfer engine the batch options select.
+
+        ``filename`` replaces ``stream.default_filename`` when given.
+        """
+
+        options = self._options
+        if options is not None and getattr(stream, "url", None):
+            if options.segments > 1 and getattr(stream, "filesize", None):
+                return self._segmented_download(
+                    stream, save_path, options.segments, filename
+                )
+            if options.resumable:
+                return self._resumable_download(stream, save_path, filename)
+        if filename is None:
+            return Path(stream.download(output_path=str(save_path)))
+        return Path(stream.download(output_path=str(save_path), filename=filename))
+
+    def _adaptive_download(self, stream: AdaptiveStream, save_path: Path) -> Path:
+        """Fetch the video and audio of ``stream`` concurrently and mux them.
+
+        Both parts are written next to the final file under temporary names
+        and removed once ffmpeg has merged them, so the wall time is that of
+        the longest part plus a stream copy.
+        """
+
+        output, *names = self._adaptive_paths(stream, save_path)
+        video, audio = stream.video, stream.audio
+        with ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="pydl-adaptive"
+        ) as pool:
+            parts = [
+                pool.submit(self._fetch_stream, part, save_path, name)
+                for part, name in zip((video, audio), names)
+            ]
+            video_path, audio_path = (part.result() for part in parts)
+        ffmpeg = self._options.ffmpeg if self._options else DEFAULT_FFMPEG
+        mux(video_path, audio_path, output, ffmpeg)
+        video_path.unlink(missing_ok=True)
+        audio_path.unlink(missing_ok=True)
+        return output
+
+    def _adaptive_paths(
+        self, stream: AdaptiveStream, save_path: Path
+    ) -> tuple[Path, str, str]:
+        """Return the muxed file of ``stream`` and the names of its two parts."""
+
+        output = save_path / stream.default_filename
+        return (
+            output,
+            f"{output.stem}.video.{getattr(stream.video, 'subtype', 'mp4')}",
+            f"{output.stem}.audio.{getattr(stream.audio, 'subtype', 'mp4')}",
+        )
+
+    def _stream_for(self, youtube_video: YouTubeVideo, itag: int) -> Any:
+        """Return the stream ``itag`` of ``youtube_video`` ready to download.
+
+        Cached videos look the real stream up here. In adaptive batches the
+        video-only stream is paired with the audio of the same video.
+        """
+
+        stream = youtube_video.streams.get_by_itag(itag)
+        if self._adaptive:
+            source = (
+                youtube_video.source
+                if isinstance(youtube_video, CachedVideo)
+                else youtube_video
+            )
+            stream = AdaptiveStream(stream, source)
+        return stream
+
+    def _chunk_progress(self, stream: Any) -> Callable[[bytes, int], None]:
+        """Return a callback throttling HTTP engine chunks and reporting progress."""
+
+        tracker = self._progress_tracker(
+            stream, self._batch_progress or self.progress_handler
+        )
+        limiter = self._options.rate_limiter if self._options else None
+        metrics = self.metrics
+
+        def on_chunk(chunk: bytes, downloaded: int) -> None:
+            if limiter:
+                limiter.throttle(len(chunk))
+            if metrics:
+                metrics.bytes_downloaded.inc(amount=len(chunk))
+            if tracker.total:
+                tracker.update(downloaded)
+
+        return on_chunk
+
+    def _progress_tracker(
+        self,
+        stream: Any,
+        handler: ProgressHandler,
+        video_url: str | None = None,
+    ) -> ProgressTracker:
+        """Return a tracker for ``stream`` sampled as the batch options require.
+
+        The progress of ``video_url`` is also recorded in the batch job
+        queue; by default the URL ``stream`` is being downloaded for.
+        """
+
+        options = self._options
+        if options is None:
+            return ProgressTracker(stream, handler)
+        if video_url is None:
+            video_url = self._job_streams.get(id(stream))
+        if options.job_queue is not None and video_url is not None:
+            handler = JobProgressHandler(options.job_queue, video_url, handler)
+        return ProgressTracker(
+            stream,
+            handler,
+            every=options.progress_every,
+            interval=options.progress_interval,
+        )
+
+    def _batch_progress_handler(self, options: DownloadOptions) -> ProgressHandler:
+        """Return the progress handler used for the batch described by ``options``.
+
+        Several workers sharing the default :class:`ProgressBarHandler` would
+        overwrite each other's line, so the default is replaced by a
+        :class:`MultiProgressRenderer` when downloads run in parallel.
+        """
+
+        if options.progress_handler:
+            return options.progress_handler
+        if self._default_progress and options.max_workers > 1:
+            return MultiProgressRenderer()
+        return self.progress_handler
+
+    def _use_adaptive(self, options: DownloadOptions) -> bool:
+        """Return ``True`` if the batch described by ``options`` is adaptive.
+
+        Adaptive mode needs ffmpeg; without it the batch falls back to
+        progressive streams.
+        """
+
+        if not options.adaptive or options.download_sound_only:
+            return False
+        if find_ffmpeg(options.ffmpeg) is None:
+            logger.warning(
+                "ffmpeg introuvable (%s) : téléchargement des flux progressifs",
+                options.ffmpeg,
+            )
+            return False
+        return True
+
+    def _use_transcoder(self, options: DownloadOptions) -> AudioTranscoder | None:
+        """Return the pool converting the audio downloads of ``options``.
+
+        ``None`` means that downloaded audio streams are only given the
+        extension of their container: either ``options.audio_codec`` is
+        ``copy`` or ffmpeg is missing.
+        """
+
+        if not options.download_sound_only or options.audio_codec == COPY:
+            return None
+        if find_ffmpeg(options.ffmpeg) is None:
+            logger.warning(
+                "ffmpeg introuvable (%s) : fichiers audio conservés sans conversion",
+                options.ffmpeg,
+            )
+            return None
+        return AudioTranscoder(
+            options.audio_codec,
+            options.audio_bitrate,
+            options.ffmpeg,
+            options.transcode_workers,
+        )
+
+    def _resumable_download(
+        self, stream: Any, save_path: Path, filename: str | None = None
+    ) -> Path:
+        """Download ``stream`` through a ``.part`` file resumed with ``Range``."""
+
+        return download_resumable(
+            stream.url,
+            save_path / (filename or stream.default_filename),
+            getattr(stream, "filesize", None) or None,
+            on_chunk=self._chunk_progress(stream),
+        )
+
+    def _segmented_download(
+        self,
+        stream: Any,
+        save_path: Path,
+        segments: int,
+        filename: str | None = None,
+    ) -> Path:
+        """Download ``stream`` over ``segments`` concurrent byte ranges."""
+
+        return download_segmented(
+            stream.url,
+            save_path / (filename or stream.default_filename),
+            int(stream.filesize),
+            segments,
+            on_chunk=self._chunk_progress(stream),
+        )
+
     def _download_video(
         self,
         stream: Any,
         save_path: Path,
         video_url: str,
         download_sound_only: bool,
-    ) -> None:
+    ) -> Future[Path] | None:
         """Download ``stream`` to ``save_path`` with retries.
 
-        Raises :class:`DownloadError` after three failed attempts.
+        Attempts are spaced according to ``DownloadOptions.retry_policy``
+        (exponential backoff with jitter). Raises :class:`DownloadError` once
+        the policy gives up, immediately for errors it classifies as fatal.
+
+        Returns:
+            ``None`` once the download is complete, or the future of its
+            audio conversion when it still runs in the batch transcoder.
         """
 
         current_file = save_path / stream.default_filename  # type: ignore
@@ -122,12 +466,48 @@ class YoutubeDownloader:
                 "Un fichier MP4 portant le même nom existe déjà"
             )
 
+        item = self._item(video_url)
+        item.itag = getattr(stream, "itag", None)
+        slots = self._options.download_slots if self._options else None
+        with slots or nullcontext():
+            started = time.perf_counter()
+            with self._downloading_job(stream, video_url):
+                try:
+                    out_file = self._retry_download(stream, save_path, video_url)
+                finally:
+                    item.download_time = time.perf_counter() - started
+                    if self.metrics:
+                        self.metrics.download_seconds.observe(item.download_time)
+        if out_file:
+            try:
+                item.bytes = Path(out_file).stat().st_size
+            except OSError:
+                pass
+
+        if out_file and download_sound_only:
+            extracted = self._extract_audio(stream, video_url, Path(out_file))
+            if isinstance(extracted, Future):
+                return extracted
+            out_file = extracted
+        if out_file:
+            self._record_download(stream, video_url, download_sound_only, out_file)
+        return None
+
+    def _retry_download(
+        self, stream: Any, save_path: Path, video_url: str
+    ) -> Path:
+        """Call :meth:`_attempt_download` until it succeeds or the policy gives up."""
+
+        policy = self._options.retry_policy if self._options else RetryPolicy()
+        item = self._item(video_url)
         out_file = None
-        for attempt in range(3):
+        attempt = 0
+        while out_file is None:
+            attempt += 1
+            item.retries = attempt - 1
             try:
                 out_file = self._attempt_download(stream, save_path)
                 log_blank_line()
-                break
             except DownloadError as e:
                 logger.exception(
                     "Échec du téléchargement pour %s",
@@ -140,10 +520,7 @@ class YoutubeDownloader:
                     e,
                 )
                 log_blank_line()
-                if attempt == 2:
-                    raise DownloadError(
-                        f"Echec du téléchargement pour {video_url}"
-                    ) from e
+                self._wait_before_retry(policy, attempt, e, video_url)
             except Exception as e:  # pragma: no cover - defensive
                 logger.exception(
                     "Erreur inattendue pendant le téléchargement de %s",
@@ -156,32 +533,231 @@ class YoutubeDownloader:
                     e,
                 )
                 log_blank_line()
-                if attempt == 2:
-                    raise DownloadError(
-                        f"Echec du téléchargement pour {video_url}"
-                    ) from e
+                self._wait_before_retry(policy, attempt, e, video_url)
+        return out_file
 
-        if out_file and download_sound_only:
-            self.conversion_mp4_in_mp3(out_file)
+    def _extract_audio(
+        self, stream: Any, video_url: str, out_file: Path
+    ) -> Path | Future[Path]:
+        """Turn the downloaded audio stream ``out_file`` into the final file.
+
+        Without a batch transcoder the file only gets the extension of its
+        container. Otherwise the conversion is queued and a future is
+        returned at once, so that the calling worker can start its next
+        download; the future fails with :class:`DownloadError` if ffmpeg
+        does.
+
+        Raises:
+            DownloadError: If the file cannot be renamed.
+        """
+
+        if self._transcoder is None:
+            try:
+                return copy_container(out_file, container_extension(stream, out_file))
+            except OSError as e:
+                raise DownloadError(
+                    f"Echec de la conversion audio pour {video_url}"
+                ) from e
+
+        outcome: Future[Path] = Future()
+
+        def finish(job: Future[Path]) -> None:
+            try:
+                path = job.result()
+                self._record_download(stream, video_url, True, path)
+            except Exception as e:
+                logger.error(
+                    "La conversion audio de %s a échoué : %s",
+                    shorten_url(video_url),
+                    e,
+                )
+                error = DownloadError(f"Echec de la conversion audio pour {video_url}")
+                error.__cause__ = e
+                outcome.set_exception(error)
+            else:
+                outcome.set_result(path)
+
+        self._transcoder.submit(out_file).add_done_callback(finish)
+        return outcome
+
+    def _wait_before_retry(
+        self,
+        policy: RetryPolicy,
+        attempt: int,
+        error: Exception,
+        video_url: str,
+    ) -> None:
+        """Sleep before the next attempt or raise if ``error`` is final.
+
+        Raises:
+            DownloadError: If ``policy`` allows no further attempt, either
+                because ``attempt`` was the last one or because ``error`` is
+                not retryable.
+        """
+
+        if attempt >= policy.max_attempts or not policy.is_retryable(error):
+            raise DownloadError(
+                f"Echec du téléchargement pour {video_url}"
+            ) from error
+        if self.metrics:
+            self.metrics.retries.inc(type(root_cause(error)).__name__)
+        delay = policy.delay(attempt, error)
+        logger.warning(
+            "Nouvelle tentative pour %s dans %.1f s (%d/%d)",
+            shorten_url(video_url),
+            delay,
+            attempt + 1,
+            policy.max_attempts,
+        )
+        policy.sleep(delay)
+
+    def _record_download(
+        self,
+        stream: Any,
+        video_url: str,
+        download_sound_only: bool,
+        out_file: Path,
+    ) -> None:
+        """Add a completed download to the batch archive and job queue, if any."""
+
+        self._mark_job(video_url, JobState.DONE, path=Path(out_file))
+        self._item(video_url).path = str(out_file)
+        archive = self._options.archive if self._options else None
+        video_id = shorten_url(video_url)
+        if archive is None or video_id == "<url>":
+            return
+        kind = "audio" if download_sound_only else "video"
+        try:
+            archive.add(
+                ArchiveEntry.from_file(video_id, kind, stream.itag, Path(out_file))
+            )
+        except OSError as e:
+            logger.warning(
+                "Impossible d'enregistrer %s dans l'archive : %s",
+                video_id,
+                e,
+            )
+
+    @contextmanager
+    def _downloading_job(self, stream: Any, video_url: str) -> Iterator[None]:
+        """Mark ``video_url`` as downloading and track the byte offset of ``stream``."""
+
+        self._mark_job(video_url, JobState.DOWNLOADING)
+        parts = (stream.video, stream.audio) if isinstance(stream, AdaptiveStream) else ()
+        for part in (stream, *parts):
+            self._job_streams[id(part)] = video_url
+        if self.metrics:
+            self.metrics.active_workers.inc()
+        try:
+            yield
+        finally:
+            for part in (stream, *parts):
+                self._job_streams.pop(id(part), None)
+            if self.metrics:
+                self.metrics.active_workers.dec()
+
+    def _mark_job(
+        self,
+        video_url: str,
+        state: JobState,
+        *,
+        reason: str | None = None,
+        path: Path | None = None,
+    ) -> None:
+        """Record the new ``state`` of ``video_url`` in the batch job queue, if any."""
+
+        job_queue = self._options.job_queue if self._options else None
+        if job_queue is None:
+            return
+        try:
+            job_queue.mark(video_url, state, reason=reason, path=path)
+        except sqlite3.Error as e:
+            logger.warning(
+                "Impossible de mettre à jour la file de travaux pour %s : %s",
+                shorten_url(video_url),
+                e,
+            )
+
+    def _failure_reason(self, error: BaseException | None) -> str:
+        """Describe the original cause of ``error`` as the failure reason of a job."""
+
+        if error is None:  # pragma: no cover - defensive
+            return "annulé"
+        error = root_cause(error)
+        return f"{type(error).__name__}: {error}"
+
+    def _item(self, video_url: str) -> ItemRecord:
+        """Return the record of ``video_url`` in the current batch."""
+
+        item = self._items.get(video_url)
+        if item is None:
+            video_id = shorten_url(video_url)
+            item = self._items.setdefault(
+                video_url,
+                ItemRecord(video_url, None if video_id == "<url>" else video_id),
+            )
+        return item
+
+    def _finish_item(
+        self, result: BatchResult, video_url: str, error: str | None = None
+    ) -> None:
+        """Record in ``result`` that ``video_url`` succeeded, or failed with ``error``."""
+
+        item = self._item(video_url)
+        del self._items[video_url]
+        item.error = error
+        item.finished_at = time.time()
+        result.items.append(item)
+        if error is None:
+            result.succeeded.append(video_url)
+        else:
+            result.failed.append(video_url)
+        if self.metrics:
+            self.metrics.downloads.inc("succeeded" if error is None else "failed")
+            self.metrics.flush()
+
+    def _write_results(self, options: DownloadOptions, result: BatchResult) -> None:
+        """Append the records of ``result`` to ``options.results_file``, if any."""
+
+        if options.results_file is None or not result.items:
+            return
+        try:
+            result.write_jsonl(options.results_file)
+        except OSError as e:
+            logger.warning("Les résultats n'ont pas pu être enregistrés : %s", e)
 
     def get_video_streams(
         self, download_sound_only: bool, youtube_video: YouTubeVideo
     ) -> Any:
         """Return the available streams for ``youtube_video``.
 
+        Audio-only streams are listed from the highest bitrate when
+        ``download_sound_only`` is set. Otherwise progressive MP4 streams, or
+        the video-only adaptive streams when the current batch uses
+        ``DownloadOptions.adaptive``, are ordered from the highest
+        resolution.
+
         Args:
-            download_sound_only: Ignored, kept for backward compatibility.
+            download_sound_only: List the audio-only streams.
             youtube_video: An object implementing :class:`YouTubeVideo`.
 
         Raises:
             StreamAccessError: If retrieving the streams fails.
         """
         try:
-            streams = (
-                youtube_video.streams.filter(progressive=True, file_extension="mp4")
-                .order_by("resolution")
-                .desc()
-            )
+            if download_sound_only:
+                return (
+                    youtube_video.streams.filter(only_audio=True)
+                    .order_by("abr")
+                    .desc()
+                )
+            if self._adaptive:
+                query = youtube_video.streams.filter(adaptive=True, only_video=True)
+            else:
+                query = youtube_video.streams.filter(
+                    progressive=True, file_extension="mp4"
+                )
+            streams = query.order_by("resolution").desc()
             return streams
         except HTTPError as e:
             logger.error(
@@ -189,7 +765,7 @@ class YoutubeDownloader:
                 f"HTTP {e.code} : {e.reason}"
             )
             raise StreamAccessError(f"HTTP {e.code}: {e.reason}") from e
-        except PytubeError as e:
+        except loaded_errors(_PYTUBE_ERROR) as e:
             logger.exception("Erreur lors de la récupération des flux")
             logger.error(
                 "Une erreur est survenue lors de la récupération des flux : "
@@ -206,11 +782,19 @@ class YoutubeDownloader:
             )
             raise StreamAccessError(str(e)) from e
 
-    def conversion_mp4_in_mp3(self, file_downloaded: Union[str, Path]) -> None:
+    def conversion_mp4_in_mp3(
+        self, file_downloaded: Union[str, Path]
+    ) -> Path | None:
         """Rename the downloaded MP4 file to MP3 and remove the original file.
 
+        The file is not re-encoded. Audio downloads no longer go through this
+        method: see :attr:`DownloadOptions.audio_codec`.
+
         Args:
             file_downloaded: Path to the downloaded MP4 file.
+
+        Returns:
+            The path of the MP3 file, or ``None`` if the conversion failed.
         """
         file_path = Path(file_downloaded)
         try:
@@ -229,12 +813,14 @@ class YoutubeDownloader:
             file_path.rename(new_file)
             if file_path.exists():
                 file_path.unlink()
+            return new_file
         except OSError:
             logger.exception("Erreur lors de la conversion MP4 vers MP3")
             logger.warning("Un fichier MP3 portant le même nom existe déjà")
             if file_path.exists():
                 file_path.unlink()
             log_blank_line()
+            return None
 
     def _prepare_video(
         self,
@@ -242,12 +828,35 @@ class YoutubeDownloader:
         download_sound_only: bool,
         progress_handler: ProgressHandler | None,
     ) -> tuple[Any, YouTubeVideo, str] | None:
-        """Return streams, video object and title for ``video_url``."""
+        """Return streams, video object and title for ``video_url``.
 
+        When the batch uses a metadata cache, cached videos are returned
+        without querying their title or streams; the real stream is only
+        looked up once its download starts.
+        """
+
+        self._mark_job(video_url, JobState.RESOLVING)
         youtube_video = self._create_youtube(video_url, progress_handler)
         if youtube_video is None:
             return None
 
+        cache = self._options.metadata_cache if self._options else None
+        video_id = shorten_url(video_url)
+        # Audio, adaptive and progressive stream lists are cached separately.
+        if download_sound_only:
+            cache_key = f"{video_id}:audio"
+        elif self._adaptive:
+            cache_key = f"{video_id}:adaptive"
+        else:
+            cache_key = video_id
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if self.metrics:
+                self.metrics.cache_lookups.inc("miss" if cached is None else "hit")
+            if cached is not None:
+                cached_video = CachedVideo(youtube_video, cached)
+                return cached_video.streams, cached_video, cached.title
+
         try:
             streams = self.get_video_streams(download_sound_only, youtube_video)
         except StreamAccessError as e:
@@ -274,7 +883,7 @@ class YoutubeDownloader:
                 e,
             )
             return None
-        except PytubeError as e:
+        except loaded_errors(_PYTUBE_ERROR) as e:
             logger.exception(
                 "Erreur lors de l'accès au titre de la vidéo %s",
                 shorten_url(video_url),
@@ -297,8 +906,278 @@ class YoutubeDownloader:
             )
             return None
 
+        if cache is not None and video_id != "<url>":
+            cache.put(
+                VideoMetadata(
+                    video_id=cache_key,
+                    title=video_title,
+                    streams=[StreamInfo.from_stream(s) for s in streams],
+                )
+            )
+
         return streams, youtube_video, video_title
 
+    def _resolve_one(
+        self,
+        video_url: str,
+        download_sound_only: bool,
+        progress_handler: ProgressHandler | None,
+    ) -> tuple[Any, YouTubeVideo, str] | None:
+        """Call :meth:`_prepare_video` and record how long it took.
+
+        Waits first while another batch downloads the same video, and
+        returns ``_DUPLICATE`` if that download succeeded.
+        """
+
+        while (owner := self._claim(video_url)) is not None:
+            if owner.result():
+                return _DUPLICATE
+        started = time.perf_counter()
+        prepared = None
+        try:
+            prepared = self._prepare_video(
+                video_url, download_sound_only, progress_handler
+            )
+            return prepared
+        finally:
+            if prepared is None:
+                self._release(video_url, False)
+            elapsed = time.perf_counter() - started
+            self._item(video_url).resolve_time = elapsed
+            if self.metrics:
+                self.metrics.resolve_seconds.observe(elapsed)
+
+    def _claim(self, video_url: str) -> Future[bool] | None:
+        """Own the video of ``video_url`` in :attr:`in_flight` for this batch.
+
+        Returns:
+            ``None`` once this batch owns the video, or already did, or if
+            ``video_url`` has no video ID; otherwise the future of the batch
+            downloading it.
+        """
+
+        if video_url in self._claims:
+            return None
+        video_id = shorten_url(video_url)
+        if video_id == "<url>":
+            return None
+        options = self._options
+        kind = "audio" if options and options.download_sound_only else "video"
+        save_path = options.save_path if options and options.save_path else Path.cwd()
+        key = (kind, str(save_path.resolve()), video_id)
+        owner = self.in_flight.claim(key)
+        if owner is None:
+            self._claims[video_url] = key
+        return owner
+
+    def _release(self, video_url: str, succeeded: bool) -> None:
+        """Hand the video of ``video_url`` over to the batches waiting for it."""
+
+        key = self._claims.pop(video_url, None)
+        if key is not None:
+            self.in_flight.release(key, succeeded)
+
+    def _release_when_done(self, video_url: str, future: Future[Any]) -> None:
+        """Release ``video_url`` once its download, and audio conversion, end."""
+
+        if future.cancelled() or future.exception() is not None:
+            self._release(video_url, False)
+            return
+        conversion = future.result()
+        if isinstance(conversion, Future):
+            conversion.add_done_callback(
+                lambda job: self._release(
+                    video_url, not job.cancelled() and job.exception() is None
+                )
+            )
+        else:
+            self._release(video_url, True)
+
+    def _release_all(self) -> None:
+        """Release the videos this batch still owns, e.g. after an error."""
+
+        for video_url in list(self._claims):
+            self._release(video_url, False)
+
+    def _collapse_duplicates(
+        self, video_urls: Iterable[str], duplicates: list[str]
+    ) -> Iterator[str]:
+        """Yield the first URL of each video of ``video_urls``.
+
+        URLs are compared by video ID, whatever their form
+        (``youtu.be/ID``, ``watch?v=ID&t=30``, ``shorts/ID``...); the IDs of
+        the repeated ones are appended to ``duplicates``. URLs without a
+        video ID are all kept.
+        """
+
+        seen = VideoIdSet()
+        for video_url in video_urls:
+            video_id = shorten_url(video_url)
+            if video_id != "<url>" and not seen.add(video_id):
+                duplicates.append(video_id)
+                continue
+            yield video_url
+
+    def _record_duplicate(self, result: BatchResult, video_url: str) -> None:
+        """Record ``video_url`` as downloaded meanwhile by another batch."""
+
+        video_id = shorten_url(video_url)
+        logger.info("%s déjà téléchargée par un autre lot", video_id)
+        result.duplicates.append(video_id)
+        self._mark_job(video_url, JobState.DONE)
+
+    def _skip_archived(
+        self,
+        video_urls: Iterable[str],
+        archive: DownloadArchive,
+        kind: str,
+        skipped: list[str],
+    ) -> Iterator[str]:
+        """Yield the URLs of ``video_urls`` missing from ``archive``.
+
+        The video IDs of archived URLs are appended to ``skipped``.
+        """
+
+        for video_url in video_urls:
+            video_id = shorten_url(video_url)
+            archived = archive.contains(video_id, kind)
+            if self.metrics:
+                self.metrics.archive_lookups.inc("hit" if archived else "miss")
+            if archived:
+                skipped.append(video_id)
+                continue
+            yield video_url
+
+    def _skip_done(
+        self, video_urls: Iterable[str], job_queue: JobQueue, skipped: list[str]
+    ) -> Iterator[str]:
+        """Enqueue ``video_urls`` and yield those not yet done in ``job_queue``.
+
+        URLs are enqueued by chunks of :data:`_ENQUEUE_CHUNK`, each in one
+        transaction. The video IDs of completed URLs are appended to
+        ``skipped``.
+        """
+
+        urls = iter(video_urls)
+        while chunk := list(islice(urls, _ENQUEUE_CHUNK)):
+            for video_url, state in zip(chunk, job_queue.add_many(chunk)):
+                if state is JobState.DONE:
+                    skipped.append(shorten_url(video_url))
+                    continue
+                yield video_url
+
+    def _save_job_settings(
+        self,
+        job_queue: JobQueue,
+        save_path: Path,
+        download_sound_only: bool,
+        selection: SelectionPolicy | None,
+    ) -> None:
+        """Store in ``job_queue`` what ``resume`` needs to continue the batch."""
+
+        try:
+            job_queue.set_setting("save_path", str(save_path))
+            job_queue.set_setting("audio", "1" if download_sound_only else "0")
+            if selection is not None:
+                job_queue.set_setting("quality", str(selection))
+        except sqlite3.Error as e:
+            logger.warning("Impossible d'enregistrer les réglages du lot : %s", e)
+
+    def _stream_urls(self, source: Iterable[str], queue_size: int) -> Iterator[str]:
+        """Yield URLs from ``source`` through a bounded producer queue.
+
+        ``source`` is iterated in a background thread so that paging through
+        a ``Playlist`` or ``Channel`` overlaps with resolution and downloads.
+        At most ``queue_size`` URLs are buffered; the producer blocks when the
+        consumer falls behind and stops as soon as the consumer is closed.
+        """
+
+        buffer: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                for url in source:
+                    if not put(url):
+                        return
+            except Exception:
+                logger.exception("Erreur lors de la lecture de la liste des vidéos")
+            finally:
+                put(_END_OF_SOURCE)
+
+        producer = threading.Thread(target=produce, name="pydl-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is _END_OF_SOURCE:
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def _resolve_videos(
+        self,
+        video_urls: Iterable[str],
+        download_sound_only: bool,
+        progress_handler: ProgressHandler | None,
+        max_workers: int,
+    ) -> Iterator[tuple[str, tuple[Any, YouTubeVideo, str] | None]]:
+        """Yield ``(url, prepared)`` pairs as soon as each video is resolved.
+
+        :meth:`_prepare_video` runs in a dedicated thread pool limited to
+        ``max_workers`` so that metadata resolution overlaps with the
+        downloads scheduled by the caller. ``video_urls`` is consumed lazily:
+        a new URL is only pulled when a resolution slot is free.
+        ``prepared`` is ``None`` when the video could not be resolved.
+        """
+
+        urls = iter(video_urls)
+        exhausted = False
+        pending: dict[Future[Any], str] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as resolver:
+            try:
+                while True:
+                    while not exhausted and len(pending) < max_workers:
+                        try:
+                            video_url = next(urls)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        future = resolver.submit(
+                            self._resolve_one,
+                            video_url,
+                            download_sound_only,
+                            progress_handler,
+                        )
+                        pending[future] = video_url
+                    if not pending:
+                        return
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        video_url = pending.pop(future)
+                        try:
+                            yield video_url, future.result()
+                        except Exception:  # pragma: no cover - defensive
+                            logger.exception(
+                                "Erreur inattendue lors de la résolution de %s",
+                                shorten_url(video_url),
+                            )
+                            yield video_url, None
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def _submit_download(
         self,
         executor: ThreadPoolExecutor,
@@ -318,115 +1197,358 @@ class YoutubeDownloader:
             download_sound_only,
         )
         futures[future] = video_url
+        future.add_done_callback(
+            lambda done: self._release_when_done(video_url, done)
+        )
+        if self.metrics:
+            self.metrics.queue_depth.set(len(futures))
 
-    def _report_errors(self, futures: dict[Any, str]) -> None:
-        """Display download results for ``futures``."""
+    def _save_metadata_cache(self, options: DownloadOptions) -> None:
+        """Persist ``options.metadata_cache`` if one is configured."""
 
-        errors: list[str] = []
-        for future in as_completed(futures):
-            url = futures[future]
-            try:
-                future.result()
-            except DownloadError:
-                errors.append(url)
-            except Exception:  # pragma: no cover - defensive
-                logger.exception(
-                    "Erreur inattendue dans le thread de téléchargement"
-                )
-                errors.append(url)
+        if options.metadata_cache is None:
+            return
+        try:
+            options.metadata_cache.save()
+        except OSError as e:
+            logger.warning("Le cache de métadonnées n'a pas pu être enregistré : %s", e)
+
+    def _download_succeeded(self, future: Future[Any]) -> bool:
+        """Return ``True`` if the download behind ``future`` completed."""
+
+        try:
+            future.result()
+        except DownloadError:
+            return False
+        except Exception:  # pragma: no cover - defensive
+            logger.exception(
+                "Erreur inattendue dans le thread de téléchargement"
+            )
+            return False
+        return True
+
+    def _wait_for_capacity(
+        self, futures: dict[Any, str], result: BatchResult, max_pending: int
+    ) -> None:
+        """Block until fewer than ``max_pending`` downloads are in flight.
+
+        Finished futures are removed from ``futures`` and their URLs recorded
+        in ``result`` so that bookkeeping stays bounded regardless of the
+        number of videos processed.
+        """
+
+        while len(futures) >= max_pending:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._record_outcome(future, futures.pop(future), result, futures)
 
-        if not errors:
-            cli_utils.print_end_download_message()
+    def _record_outcome(
+        self,
+        future: Future[Any],
+        video_url: str,
+        result: BatchResult,
+        futures: dict[Any, str],
+    ) -> None:
+        """Add ``video_url`` to the succeeded or failed URLs of ``result``.
+
+        A download whose audio conversion is still running is put back in
+        ``futures`` under the future of that conversion.
+        """
+
+        if self.metrics:
+            self.metrics.queue_depth.set(len(futures))
+
+        if not self._download_succeeded(future):
+            error = None if future.cancelled() else future.exception()
+            self._mark_job(video_url, JobState.FAILED, reason=self._failure_reason(error))
+            self._finish_item(
+                result,
+                video_url,
+                type(root_cause(error)).__name__ if error else "CancelledError",
+            )
+            return
+        conversion = future.result()
+        if isinstance(conversion, Future):
+            futures[conversion] = video_url
         else:
-            failed = ", ".join(shorten_url(u) for u in errors)
+            self._finish_item(result, video_url)
+
+    def _report_errors(
+        self, futures: dict[Any, str], result: BatchResult | None = None
+    ) -> BatchResult:
+        """Wait for ``futures``, display the results and return them.
+
+        ``result`` holds the outcome of downloads already completed. When
+        the batch options are not interactive nothing is written to the
+        console, which may carry a JSON summary, and the final pause before
+        returning to the menu is skipped.
+        """
+
+        if result is None:
+            result = BatchResult()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._record_outcome(future, futures.pop(future), result, futures)
+
+        interactive = self._interactive()
+        if result.ok:
+            if interactive:
+                cli_utils.print_end_download_message()
+            else:
+                logger.info("Fin du téléchargement")
+        else:
+            failed = ", ".join(shorten_url(u) for u in result.failed)
             logger.error(
                 "Les téléchargements suivants ont échoué : %s",
                 failed,
             )
-        cli_utils.pause_return_to_menu()
+        if interactive:
+            cli_utils.pause_return_to_menu()
+        return result
+
+    def _interactive(self) -> bool:
+        """Return ``True`` unless the current batch options are headless."""
+
+        return self._options is None or self._options.interactive
+
+    def _check_options(self, options: DownloadOptions) -> None:
+        """Raise :class:`ValueError` if ``options`` cannot describe a batch."""
+
+        if options.max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if options.resolve_workers < 1:
+            raise ValueError("resolve_workers must be >= 1")
+        if options.queue_size < 1:
+            raise ValueError("queue_size must be >= 1")
+        if options.segments < 1:
+            raise ValueError("segments must be >= 1")
+        if options.audio_codec != COPY and options.audio_codec not in AUDIO_CODECS:
+            raise ValueError(f"Unknown audio codec: {options.audio_codec!r}")
+        if options.transcode_workers < 1:
+            raise ValueError("transcode_workers must be >= 1")
+
+    def _log_collapsed(self, result: BatchResult) -> None:
+        """Log how many videos of ``result`` were not downloaded again."""
+
+        if result.skipped:
+            logger.info(
+                "%d vidéo(s) déjà téléchargée(s) ignorée(s)",
+                len(result.skipped),
+            )
+        if result.duplicates:
+            logger.info("%d doublon(s) regroupé(s)", len(result.duplicates))
+
+    def _log_batch_header(self, total_links: int | None) -> None:
+        """Log the banner shown once the stream of the batch is chosen.
+
+        The separators are printed to the console in interactive batches
+        only.
+        """
+
+        interactive = self._interactive()
+        log_blank_line()
+        log_blank_line()
+        if interactive:
+            cli_utils.print_separator()
+        logger.info("*             Stream vidéo sélectionné :          *")
+        if interactive:
+            cli_utils.print_separator()
+        if total_links is not None:
+            logger.info(
+                "Nombre de liens vidéo YouTube dans le fichier : "
+                f"{total_links}"
+            )
+        log_blank_line()
 
     def download_multiple_videos(
         self,
         youtube_video_urls: Iterable[str],
         options: DownloadOptions,
-    ) -> None:
+    ) -> BatchResult:
         """Download one or more videos or audio tracks.
 
+        Video metadata is resolved in a separate pool of
+        ``options.resolve_workers`` threads; each video is handed to the
+        download pool as soon as its streams are known. When
+        ``options.streaming`` is enabled ``youtube_video_urls`` is consumed
+        lazily through a bounded queue so that downloads start with the first
+        URL produced and memory stays flat for arbitrarily large sources.
+        Videos already recorded in ``options.archive``, or done in
+        ``options.job_queue``, are skipped before any network access.
+        URLs are compared by video ID so that each video is downloaded once
+        per batch; a video being downloaded by another batch of the process
+        into the same directory is waited for rather than downloaded again.
+        Audio-only downloads are converted by a pool of
+        ``options.transcode_workers`` ffmpeg processes while the next streams
+        are downloaded.
+
         Args:
             youtube_video_urls: Iterable of YouTube URLs to download.
             options: Download behaviour configuration.
 
         Returns:
-            ``None``. The method does not report which URLs failed to
-            download.
+            A :class:`~program_youtube_downloader.result.BatchResult` listing
+            the URLs downloaded, failed or skipped and the duplicates
+            collapsed, with an
+            :class:`~program_youtube_downloader.result.ItemRecord` of timings,
+            size and error for each processed URL. Videos whose metadata
+            cannot be resolved count as failed.
 
         Raises:
-            ValueError: If ``options.max_workers`` is less than 1.
+            ValueError: If ``options.max_workers``,
+                ``options.resolve_workers``, ``options.queue_size``,
+                ``options.segments`` or ``options.transcode_workers`` is less
+                than 1, or if ``options.audio_codec`` is unknown.
+            RuntimeError: If another batch is running on this instance;
+                concurrent batches need one downloader each.
         """
 
+        with self._exclusive_batch():
+            return self._download_batch(youtube_video_urls, options)
+
+    def _download_batch(
+        self,
+        youtube_video_urls: Iterable[str],
+        options: DownloadOptions,
+    ) -> BatchResult:
+        """Run a batch of :meth:`download_multiple_videos`."""
+
         download_sound_only = options.download_sound_only
         save_path = options.save_path or Path.cwd()
         choice_callback = options.choice_callback
-        progress_handler = options.progress_handler or self.progress_handler
 
         choice_once = True
-        choice_user = 1
+        selection = options.selection
 
-        url_list = list(youtube_video_urls)
-        if not url_list:
-            logger.error("Il n'y a aucune vidéo à télécharger")
-            return None
+        self._check_options(options)
+        self._options = options
+        self._items = {}
+        self._claims = {}
+        self._adaptive = self._use_adaptive(options)
+        progress_handler = self._batch_progress_handler(options)
+        self._batch_progress = progress_handler
 
-        if options.max_workers < 1:
-            raise ValueError("max_workers must be >= 1")
+        url_source: Iterable[str]
+        total_links: int | None
+        if options.streaming:
+            url_source = self._stream_urls(youtube_video_urls, options.queue_size)
+            total_links = None
+        else:
+            url_list = list(youtube_video_urls)
+            if not url_list:
+                logger.error("Il n'y a aucune vidéo à télécharger")
+                return BatchResult()
+            url_source = url_list
+            total_links = len(url_list)
+
+        result = BatchResult()
+        url_source = self._collapse_duplicates(url_source, result.duplicates)
+        if options.archive is not None:
+            url_source = self._skip_archived(
+                url_source,
+                options.archive,
+                "audio" if download_sound_only else "video",
+                result.skipped,
+            )
+        if options.job_queue is not None:
+            url_source = self._skip_done(url_source, options.job_queue, result.skipped)
+            self._save_job_settings(
+                options.job_queue, save_path, download_sound_only, selection
+            )
 
+        seen = 0
         futures: dict[Any, str] = {}
-        with ThreadPoolExecutor(max_workers=options.max_workers) as executor:
-            for video_url in url_list:
-                processed = self._prepare_video(
-                    video_url,
+        max_pending = options.max_workers + options.queue_size
+        self._transcoder = self._use_transcoder(options)
+        try:
+            with ThreadPoolExecutor(max_workers=options.max_workers) as executor:
+                for video_url, processed in self._resolve_videos(
+                    url_source,
                     download_sound_only,
                     progress_handler,
-                )
-                if processed is None:
-                    continue
+                    options.resolve_workers,
+                ):
+                    seen += 1
+                    if processed is _DUPLICATE:
+                        self._record_duplicate(result, video_url)
+                        continue
+                    if processed is None:
+                        self._finish_item(result, video_url, "unresolved")
+                        self._mark_job(
+                            video_url,
+                            JobState.FAILED,
+                            reason="métadonnées indisponibles",
+                        )
+                        continue
 
-                streams, youtube_video, video_title = processed
+                    streams, youtube_video, video_title = processed
 
-                if choice_once:
-                    choice_user = self._select_stream(
-                        download_sound_only,
-                        streams,
-                        choice_callback,
-                    )
-                    choice_once = False
-                    log_blank_line()
-                    log_blank_line()
-                    cli_utils.print_separator()
-                    logger.info("*             Stream vidéo sélectionné :          *")
-                    cli_utils.print_separator()
-                    logger.info(
-                        "Nombre de liens vidéo YouTube dans le fichier : "
-                        f"{len(url_list)}"
-                    )
-                    log_blank_line()
+                    if selection is None:
+                        selection = self._selection_from_choice(
+                            download_sound_only,
+                            streams,
+                            choice_callback,
+                        )
+                    if choice_once:
+                        choice_once = False
+                        self._log_batch_header(total_links)
+                        if options.job_queue is not None:
+                            self._save_job_settings(
+                                options.job_queue,
+                                save_path,
+                                download_sound_only,
+                                selection,
+                            )
 
-                itag = streams[choice_user - 1].itag  # type: ignore
-                stream = youtube_video.streams.get_by_itag(itag)
+                    chosen = selection.select(streams, download_sound_only)
+                    if chosen is None:
+                        logger.error(
+                            "Aucun flux ne correspond à la qualité demandée pour %s",
+                            shorten_url(video_url),
+                        )
+                        self._finish_item(result, video_url, "no_matching_stream")
+                        self._release(video_url, False)
+                        self._mark_job(
+                            video_url,
+                            JobState.FAILED,
+                            reason="aucun flux ne correspond à la qualité demandée",
+                        )
+                        continue
+                    stream = self._stream_for(youtube_video, chosen.itag)
 
-                logger.info(f"Titre : {video_title[0:53]}")
+                    logger.info(f"Titre : {video_title[0:53]}")
 
-                self._submit_download(
-                    executor,
-                    stream,
-                    save_path,
-                    video_url,
-                    download_sound_only,
-                    futures,
-                )
+                    self._submit_download(
+                        executor,
+                        stream,
+                        save_path,
+                        video_url,
+                        download_sound_only,
+                        futures,
+                    )
+                    self._wait_for_capacity(futures, result, max_pending)
+        finally:
+            if isinstance(progress_handler, MultiProgressRenderer):
+                progress_handler.close()
+            self._batch_progress = None
+            if self._transcoder is not None:
+                # Wait for the conversions still running.
+                self._transcoder.close()
+                self._transcoder = None
+            self._release_all()
 
-        self._report_errors(futures)
-        return None
+        self._save_metadata_cache(options)
+        self._log_collapsed(result)
+        if not seen and not result.skipped:
+            logger.error("Il n'y a aucune vidéo à télécharger")
+            return result
+
+        self._report_errors(futures, result)
+        self._write_results(options, result)
+        if self.metrics:
+            self.metrics.flush(force=True)
+        return result
 
 
-__all__ = ["YoutubeDownloader"]
+__all__ = ["YoutubeDownloader", "pytubefix_youtube"]
@@ -30,6 +30,14 @@ class InvalidURLError(PydlError):
     """Raised when a provided URL does not match expected YouTube patterns."""
 
 
+class MuxError(PydlError):
+    """Raised when ffmpeg fails to merge the video and audio streams."""
+
+
+class TranscodeError(PydlError):
+    """Raised when ffmpeg fails to convert a downloaded audio stream."""
+
+
 __all__ = [
     "PydlError",
     "DownloadError",
@@ -39,5 +47,6 @@ __all__ = [
     "StreamAccessError",
     "DirectoryCreationError",
     "InvalidURLError",
+    "MuxError",
+    "TranscodeError",
 ]
-
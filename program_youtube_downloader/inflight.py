@@ -0,0 +1,60 @@
+"""Videos being downloaded by the batches of a process.
+
+Two batches running at the same time, such as jobs of a long-lived process
+sharing one destination, may ask for the same video. :class:`InFlightDownloads`
+lets the first one download it while the others wait for its outcome instead
+of writing the same file concurrently.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Hashable
+
+
+class InFlightDownloads:
+    """Thread-safe registry of the videos being downloaded, by key.
+
+    A key identifies a destination file, e.g. the kind of download, its
+    directory and the video ID. The owner of a key resolves the future
+    returned to the other claimants with ``True`` once the file is complete,
+    or ``False`` if it gave up so that another claimant can try.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._owners: dict[Hashable, Future[bool]] = {}
+
+    def claim(self, key: Hashable) -> Future[bool] | None:
+        """Take ownership of ``key``, or return the future of its owner.
+
+        Returns:
+            ``None`` when the caller now owns ``key`` and must
+            :meth:`release` it, otherwise a future resolved with the outcome
+            of the current owner.
+        """
+        with self._lock:
+            owner = self._owners.get(key)
+            if owner is not None:
+                return owner
+            self._owners[key] = Future()
+            return None
+
+    def release(self, key: Hashable, succeeded: bool) -> None:
+        """Give up ownership of ``key`` and wake up the waiting claimants."""
+        with self._lock:
+            owner = self._owners.pop(key, None)
+        if owner is not None:
+            owner.set_result(succeeded)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._owners
+
+
+# Registry shared by the downloaders of the process unless they get their own.
+IN_FLIGHT = InFlightDownloads()
+
+
+__all__ = ["InFlightDownloads", "IN_FLIGHT"]
@@ -0,0 +1,253 @@
+"""Durable job queue recording the state of every URL of a batch."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from .progress import ProgressEvent, ProgressHandler
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    bytes_done INTEGER NOT NULL DEFAULT 0,
+    bytes_total INTEGER,
+    reason TEXT,
+    path TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, position);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Minimum progress between two writes of the byte offset of a download.
+OFFSET_BYTES = 1024 * 1024
+OFFSET_SECONDS = 1.0
+
+
+class JobState(Enum):
+    """Lifecycle of one URL in a :class:`JobQueue`."""
+
+    PENDING = "pending"
+    RESOLVING = "resolving"
+    DOWNLOADING = "downloading"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobQueue:
+    """Batch state stored in SQLite so that an interrupted run can resume.
+
+    Every URL is a row holding its :class:`JobState`, the progress in bytes
+    of a running download and, once finished, the file written or the
+    failure reason. The progress is informative: a resumed download
+    continues from its ``.part`` file, see
+    :func:`~program_youtube_downloader.transfer.download_resumable`. The database uses write-ahead logging and commits each change on
+    its own, except URLs enqueued together by :meth:`add_many`: a crash loses
+    at most the update in progress. Batch settings
+    (destination, audio only, quality) are kept alongside so that
+    ``resume`` needs no other argument.
+
+    The queue is shared by the threads of a batch; a lock serialises access
+    to the connection, which is only opened once the queue is used.
+    """
+
+    def __init__(self, path: Path, *, clock: Callable[[], float] = time.time) -> None:
+        """Use the queue stored at ``path``, opened or created on first use."""
+        self.path = Path(path)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        # Position of the last URL enqueued, kept here rather than queried
+        # on every insert.
+        self._position = 0
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The database connection, opened if needed; use under the lock."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._position = db.execute(
+                "SELECT COALESCE(MAX(position), 0) FROM jobs"
+            ).fetchone()[0]
+            self._connection = db
+        return self._connection
+
+    def close(self) -> None:
+        """Close the database connection, reopened if the queue is used again."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def add(self, video_url: str) -> JobState:
+        """Enqueue ``video_url`` if new and return its current state."""
+        return self.add_many([video_url])[0]
+
+    def add_many(self, video_urls: Iterable[str]) -> list[JobState]:
+        """Enqueue the new URLs of ``video_urls`` in a single transaction.
+
+        Returns:
+            The current state of each URL, in the order of ``video_urls``.
+        """
+        states: list[JobState] = []
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for video_url in video_urls:
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO jobs (url, position, state, updated_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (
+                            video_url,
+                            self._position + 1,
+                            JobState.PENDING.value,
+                            self._clock(),
+                        ),
+                    )
+                    if cursor.rowcount:
+                        self._position += 1
+                        states.append(JobState.PENDING)
+                        continue
+                    row = self._db.execute(
+                        "SELECT state FROM jobs WHERE url = ?", (video_url,)
+                    ).fetchone()
+                    states.append(JobState(row[0]))
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return states
+
+    def mark(
+        self,
+        video_url: str,
+        state: JobState,
+        *,
+        reason: str | None = None,
+        path: Path | None = None,
+    ) -> None:
+        """Move ``video_url`` to ``state``, with the failure ``reason`` or file ``path``."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, reason = ?, path = COALESCE(?, path), "
+                "updated_at = ? WHERE url = ?",
+                (
+                    state.value,
+                    reason,
+                    str(path) if path is not None else None,
+                    self._clock(),
+                    video_url,
+                ),
+            )
+
+    def record_offset(self, video_url: str, done: int, total: int | None) -> None:
+        """Store the number of bytes ``video_url`` has downloaded so far."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET bytes_done = ?, bytes_total = ?, updated_at = ? "
+                "WHERE url = ?",
+                (done, total, self._clock(), video_url),
+            )
+
+    def job(self, video_url: str) -> dict[str, Any] | None:
+        """Return the row of ``video_url`` as a dictionary, or ``None``."""
+        with self._lock:
+            cursor = self._db.execute("SELECT * FROM jobs WHERE url = ?", (video_url,))
+            row = cursor.fetchone()
+            names = [d[0] for d in cursor.description]
+        return dict(zip(names, row)) if row else None
+
+    def unfinished(self, *, include_failed: bool = False) -> list[str]:
+        """Return, in submission order, the URLs a resumed batch must process."""
+        states = [JobState.PENDING, JobState.RESOLVING, JobState.DOWNLOADING]
+        if include_failed:
+            states.append(JobState.FAILED)
+        placeholders = ", ".join("?" * len(states))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT url FROM jobs WHERE state IN ({placeholders}) ORDER BY position",
+                [s.value for s in states],
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self) -> dict[JobState, int]:
+        """Return the number of URLs in each state."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+            ).fetchall()
+        counts = {state: 0 for state in JobState}
+        counts.update({JobState(state): count for state, count in rows})
+        return counts
+
+    def set_setting(self, name: str, value: str) -> None:
+        """Store the batch setting ``name``."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)",
+                (name, value),
+            )
+
+    def setting(self, name: str) -> str | None:
+        """Return the batch setting ``name``, or ``None`` if unset."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM settings WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else None
+
+
+class JobProgressHandler:
+    """Progress handler recording the byte offset of one job.
+
+    Events are forwarded to ``handler``; the offset is written at most every
+    :data:`OFFSET_BYTES` bytes or :data:`OFFSET_SECONDS` seconds, and always
+    for the last event of the transfer.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        video_url: str,
+        handler: ProgressHandler,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.queue = queue
+        self.video_url = video_url
+        self.handler = handler
+        self._clock = clock
+        self._bytes = 0
+        self._time = clock()
+
+    def on_progress(self, event: ProgressEvent) -> None:
+        """Forward ``event`` and record its offset if enough progress was made."""
+        self.handler.on_progress(event)
+        done = event.bytes_downloaded
+        now = self._clock()
+        if (
+            done >= event.bytes_total
+            or done - self._bytes >= OFFSET_BYTES
+            or now - self._time >= OFFSET_SECONDS
+        ):
+            self.queue.record_offset(self.video_url, done, event.bytes_total or None)
+            self._bytes, self._time = done, now
+
+
+__all__ = ["JobQueue", "JobState", "JobProgressHandler"]
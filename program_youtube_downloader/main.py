@@ -2,17 +2,29 @@
 # pyinstaller --onefile --add-data "mypy.ini;." program_youtube_downloader/main.py
 import os
 import sys
+import json
 import argparse
 import logging
 from pathlib import Path
+from typing import Iterable
 
 from . import cli_utils
 from .downloader import YoutubeDownloader
 from .cli import CLI
 from .config import DownloadOptions
+from .exceptions import PydlError
+from .jobs import JobQueue
+from .metrics import Metrics
+from .result import BatchResult, EXIT_OK, EXIT_FAILURES
+from .shard import read_url_file, run_sharded
+from .selection import SelectionPolicy
+from .urlfile import iter_url_file
 
 logger = logging.getLogger(__name__)
 
+# Values of ``--engine`` and ``PYDL_ENGINE``.
+ENGINES = ("threads", "asyncio")
+
 
 def setup_logging(level: str) -> None:
     """Configure application-wide logging."""
@@ -39,6 +51,43 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         help="Set logging level (overrides PYDL_LOG_LEVEL)",
     )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        default=os.environ.get("PYDL_HEADLESS", "").strip().lower()
+        in {"1", "true", "yes", "on"},
+        help=(
+            "Never prompt, pause or clear the screen; print a JSON summary "
+            "and exit with a non-zero status on failures (or set PYDL_HEADLESS)"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        default=os.environ.get("PYDL_ENGINE", "threads").strip().lower(),
+        choices=ENGINES,
+        help=(
+            "Download engine: a thread per transfer, or a single asyncio "
+            "event loop, which requires aiohttp (or set PYDL_ENGINE)"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=os.environ.get("PYDL_METRICS_PORT"),
+        help=(
+            "Serve Prometheus metrics on http://127.0.0.1:PORT/metrics "
+            "(or set PYDL_METRICS_PORT)"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=os.environ.get("PYDL_METRICS_FILE"),
+        help=(
+            "Write Prometheus metrics to this file for the node_exporter "
+            "textfile collector (or set PYDL_METRICS_FILE)"
+        ),
+    )
     subparsers = parser.add_subparsers(dest="command")
 
     video_parser = subparsers.add_parser("video", help="Download one or more videos")
@@ -49,6 +98,11 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         help="Directory to save downloaded files",
     )
+    video_parser.add_argument(
+        "--quality",
+        type=SelectionPolicy.parse,
+        help='Stream selection policy, e.g. "best <=1080p" (overrides PYDL_QUALITY)',
+    )
 
     playlist_parser = subparsers.add_parser("playlist", help="Download a playlist")
     playlist_parser.add_argument("url", help="Playlist URL")
@@ -58,6 +112,11 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         help="Directory to save downloaded files",
     )
+    playlist_parser.add_argument(
+        "--quality",
+        type=SelectionPolicy.parse,
+        help='Stream selection policy, e.g. "best <=1080p" (overrides PYDL_QUALITY)',
+    )
 
     channel_parser = subparsers.add_parser("channel", help="Download a channel")
     channel_parser.add_argument("url", help="Channel URL")
@@ -67,15 +126,152 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         help="Directory to save downloaded files",
     )
+    channel_parser.add_argument(
+        "--quality",
+        type=SelectionPolicy.parse,
+        help='Stream selection policy, e.g. "best <=1080p" (overrides PYDL_QUALITY)',
+    )
+
+    file_parser = subparsers.add_parser(
+        "file",
+        help="Download the URLs of a file, streamed as it is read",
+    )
+    file_parser.add_argument(
+        "file",
+        type=Path,
+        help="File with one URL per line, optionally gzip-compressed, or - for stdin",
+    )
+    file_parser.add_argument("--audio", action="store_true", help="Download audio only")
+    file_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory to save downloaded files",
+    )
+    file_parser.add_argument(
+        "--quality",
+        type=SelectionPolicy.parse,
+        help='Stream selection policy, e.g. "best <=1080p" (overrides PYDL_QUALITY)',
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Download the URLs of a file with several worker processes",
+    )
+    batch_parser.add_argument(
+        "file",
+        type=Path,
+        help="File with one URL per line, optionally gzip-compressed, or - for stdin",
+    )
+    batch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    batch_parser.add_argument("--audio", action="store_true", help="Download audio only")
+    batch_parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory to save downloaded files",
+    )
+    batch_parser.add_argument(
+        "--quality",
+        type=SelectionPolicy.parse,
+        help='Stream selection policy, e.g. "best <=1080p" (overrides PYDL_QUALITY)',
+    )
+    batch_parser.add_argument(
+        "--job-queue",
+        type=Path,
+        default=os.environ.get("PYDL_JOB_QUEUE"),
+        help=(
+            "Job queue database; each worker uses its own file next to it, "
+            "e.g. jobs.0.db (or set PYDL_JOB_QUEUE)"
+        ),
+    )
+    batch_parser.add_argument(
+        "--results-file",
+        type=Path,
+        default=os.environ.get("PYDL_RESULTS_FILE"),
+        help="JSON Lines file receiving one record per URL (or set PYDL_RESULTS_FILE)",
+    )
+
+    resume_parser = subparsers.add_parser(
+        "resume",
+        help="Continue an interrupted batch from its job queue",
+    )
+    resume_parser.add_argument(
+        "queue",
+        type=Path,
+        nargs="?",
+        default=os.environ.get("PYDL_JOB_QUEUE"),
+        help="Job queue database (default: PYDL_JOB_QUEUE)",
+    )
+    resume_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Also download again the videos that failed",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run a download service accepting jobs over a local JSON API",
+    )
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1)",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=os.environ.get("PYDL_SERVE_PORT", "8765"),
+        help="Port to listen on (default: 8765, or set PYDL_SERVE_PORT)",
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=Path,
+        default=os.environ.get("PYDL_SERVE_SOCKET"),
+        help="Listen on this Unix socket instead (or set PYDL_SERVE_SOCKET)",
+    )
+    serve_parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=4,
+        help="Number of jobs running at once (default: 4)",
+    )
+    serve_parser.add_argument(
+        "--max-downloads",
+        type=int,
+        default=os.environ.get("PYDL_SERVE_MAX_DOWNLOADS", "8"),
+        help=(
+            "Number of streams downloaded at once over all jobs "
+            "(default: 8, or set PYDL_SERVE_MAX_DOWNLOADS)"
+        ),
+    )
 
     subparsers.add_parser("menu", help="Run interactive menu")
 
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    # argparse does not check defaults, taken from PYDL_ENGINE, against choices.
+    if args.engine not in ENGINES:
+        parser.error(
+            f"argument --engine: invalid choice: {args.engine!r} "
+            f"(choose from {', '.join(map(repr, ENGINES))})"
+        )
+    return args
 
 
-def create_download_options(cli: CLI, audio_only: bool, output_dir: Path | None = None) -> DownloadOptions:
+def create_download_options(
+    cli: CLI,
+    audio_only: bool,
+    output_dir: Path | None = None,
+    quality: str | SelectionPolicy | None = None,
+    headless: bool = False,
+) -> DownloadOptions:
     """Build and return a :class:`DownloadOptions` instance."""
-    return cli.create_download_options(audio_only, output_dir)
+    return cli.create_download_options(
+        audio_only, output_dir, quality=quality, interactive=not headless
+    )
 
 
 def handle_quit_option(cli: CLI) -> None:
@@ -113,52 +309,257 @@ def menu() -> None:  # pragma: no cover
 
     
 
+def report_result(result: BatchResult | None, headless: bool) -> int:
+    """Return the exit status of ``result``, printing it as JSON if ``headless``."""
+    if result is None:
+        return EXIT_OK
+    if headless:
+        print(json.dumps(result.to_dict(), ensure_ascii=False))
+    return result.exit_code
+
+
+def run_batch(args: argparse.Namespace, metrics: Metrics | None = None) -> int:
+    """Run the ``batch`` command: shard ``args.file`` over worker processes.
+
+    Workers never prompt; the merged result is reported like any other
+    command. ``metrics`` is updated with the items of each shard as it
+    finishes.
+    """
+    try:
+        urls = read_url_file(args.file)
+    except OSError as e:
+        logger.error("Le fichier n'est pas accessible: %s", e)
+        return EXIT_FAILURES
+    if args.workers < 1:
+        logger.error("Le nombre de processus doit être au moins 1")
+        return EXIT_FAILURES
+    output_dir = args.output_dir or os.environ.get("PYDL_OUTPUT_DIR") or Path.cwd()
+    save_path = Path(output_dir).expanduser().resolve()
+    try:
+        save_path.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.error("Impossible de créer le dossier %s : %s", save_path, e)
+        return EXIT_FAILURES
+    try:
+        result = run_sharded(
+            urls,
+            args.workers,
+            save_path,
+            download_sound_only=args.audio,
+            selection=args.quality,
+            initializer=setup_logging,
+            initargs=(args.log_level,),
+            results_file=args.results_file.expanduser() if args.results_file else None,
+            job_queue=args.job_queue.expanduser() if args.job_queue else None,
+            metrics=metrics,
+        )
+    except ValueError as e:
+        logger.error("%s", e)
+        return EXIT_FAILURES
+    return report_result(result, args.headless)
+
+
+def run_resume(args: argparse.Namespace, cli: CLI) -> int:
+    """Run the ``resume`` command: finish the batch recorded in ``args.queue``.
+
+    Completed videos are neither resolved nor downloaded again; partial
+    files are continued from their last byte. The destination, audio mode
+    and quality stored in the queue are reused, so nothing is asked.
+    """
+    if args.queue is None:
+        logger.error("Aucune file de travaux : indiquez-la ou définissez PYDL_JOB_QUEUE")
+        return EXIT_FAILURES
+    path = Path(args.queue).expanduser()
+    if not path.is_file():
+        logger.error("La file de travaux %s est introuvable", path)
+        return EXIT_FAILURES
+    job_queue = JobQueue(path)
+    try:
+        urls = job_queue.unfinished(include_failed=args.retry_failed)
+        if not urls:
+            logger.info("Il n'y a rien à reprendre dans %s", path)
+            return report_result(BatchResult(), args.headless)
+        save_path = job_queue.setting("save_path")
+        quality = job_queue.setting("quality")
+        options = create_download_options(
+            cli,
+            job_queue.setting("audio") == "1",
+            Path(save_path) if save_path else Path.cwd(),
+            quality or SelectionPolicy(),
+            args.headless,
+        )
+        if options.job_queue is not None:
+            options.job_queue.close()
+        options.job_queue = job_queue
+        options.resumable = True
+        result = cli.downloader.download_multiple_videos(urls, options)
+    finally:
+        job_queue.close()
+    return report_result(result, args.headless)
+
+
+def run_serve(args: argparse.Namespace, cli: CLI) -> int:
+    """Run the ``serve`` command until interrupted.
+
+    Jobs are batches of downloaders configured like ``cli.downloader`` and
+    start from the options of a headless run, read once from the
+    environment.
+    """
+    # Imported lazily: only this command needs the HTTP server.
+    from .server import DownloadService, serve_http, serve_unix
+
+    def load_collection(kind: str, url: str) -> Iterable[str]:
+        if kind == "playlist":
+            return cli.load_playlist(url)
+        return cli.load_channel(url)
+
+    try:
+        options = create_download_options(cli, False, None, None, headless=True)
+        service = DownloadService(
+            cli.downloader,
+            options,
+            load_collection,
+            max_jobs=args.max_jobs,
+            max_downloads=args.max_downloads,
+        )
+    except (PydlError, ValueError) as e:
+        logger.error("Impossible de démarrer le service : %s", e)
+        return EXIT_FAILURES
+    if options.job_queue is not None:
+        options.job_queue.close()
+    try:
+        if args.socket is not None:
+            server = serve_unix(service, args.socket)
+        else:
+            server = serve_http(service, args.port, args.host)
+    except OSError as e:
+        logger.error("Impossible d'ouvrir l'adresse du service : %s", e)
+        service.close(wait=False)
+        return EXIT_FAILURES
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Arrêt du service")
+    finally:
+        server.server_close()
+        service.close()
+    return EXIT_OK
+
+
+def create_metrics(args: argparse.Namespace) -> Metrics | None:
+    """Return the metrics requested by ``--metrics-port``/``--metrics-file``.
+
+    The HTTP endpoint is started at once; a port that cannot be bound is
+    logged and the downloads proceed without it.
+    """
+    if args.metrics_port is None and args.metrics_file is None:
+        return None
+    metrics = Metrics(args.metrics_file)
+    if args.metrics_port is not None:
+        try:
+            metrics.serve(args.metrics_port)
+        except OSError as e:
+            logger.error(
+                "Le port %d des métriques est indisponible : %s", args.metrics_port, e
+            )
+    return metrics
+
+
 def main(
     argv: list[str] | None = None,
     downloader: YoutubeDownloader | None = None,
     cli_cls: type[CLI] = CLI,
-) -> None:
+) -> int:
     """Entry point called by the ``program-youtube-downloader`` script.
 
     Args:
         argv: Optional list of command line arguments.
         downloader: Existing :class:`YoutubeDownloader` instance to use. If
-            ``None`` a new one is created when required.
+            ``None`` a new one is created when required, an
+            :class:`~program_youtube_downloader.async_downloader.AsyncYoutubeDownloader`
+            with ``--engine asyncio``.
+
+    Returns:
+        The process exit status: ``0`` when every download succeeded, ``1``
+        when at least one failed.
     """
     args = parse_args(argv)
     setup_logging(args.log_level)
     command = args.command
 
+    metrics = create_metrics(args)
+    if command == "batch":
+        return run_batch(args, metrics)
+
+    if downloader is None and args.engine == "asyncio":
+        # Imported lazily: aiohttp is an optional dependency.
+        from .async_downloader import AsyncYoutubeDownloader
+
+        try:
+            downloader = AsyncYoutubeDownloader(metrics=metrics)
+        except ImportError as e:
+            logger.error("%s", e)
+            return EXIT_FAILURES
+    elif metrics is not None:
+        if downloader is None:
+            downloader = YoutubeDownloader(metrics=metrics)
+        else:
+            downloader.metrics = metrics
+
     cli = cli_cls(downloader)
 
     if command is None or command == "menu":
         cli.menu()
-        return
+        return EXIT_OK
+    if command == "resume":
+        return run_resume(args, cli)
+    if command == "serve":
+        return run_serve(args, cli)
 
     yd = cli.downloader
 
     if command == "video":
-        options = create_download_options(cli, args.audio, args.output_dir)
-        yd.download_multiple_videos(
+        options = create_download_options(
+            cli, args.audio, args.output_dir, args.quality, args.headless
+        )
+        result = yd.download_multiple_videos(
             args.urls,
             options,
         )
+    elif command == "file":
+        try:
+            urls = iter_url_file(args.file)
+        except OSError as e:
+            logger.error("Le fichier n'est pas accessible: %s", e)
+            return EXIT_FAILURES
+        options = create_download_options(
+            cli, args.audio, args.output_dir, args.quality, args.headless
+        )
+        options.streaming = True
+        result = yd.download_multiple_videos(urls, options)
     elif command == "playlist":
         playlist = cli.load_playlist(args.url)
-        options = create_download_options(cli, args.audio, args.output_dir)
-        yd.download_multiple_videos(
+        options = create_download_options(
+            cli, args.audio, args.output_dir, args.quality, args.headless
+        )
+        options.streaming = True
+        result = yd.download_multiple_videos(
             playlist,
             options,
         )  # type: ignore
     elif command == "channel":
         channel = cli.load_channel(args.url)
-        options = create_download_options(cli, args.audio, args.output_dir)
-        yd.download_multiple_videos(
+        options = create_download_options(
+            cli, args.audio, args.output_dir, args.quality, args.headless
+        )
+        options.streaming = True
+        result = yd.download_multiple_videos(
             channel,
             options,
         )  # type: ignore
     else:
         raise SystemExit(f"Unknown command: {command}")
+    return report_result(result, args.headless)
 
 
 __all__ = [
@@ -170,11 +571,16 @@ __all__ = [
     "handle_videos_option",
     "handle_playlist_option",
     "handle_channel_option",
+    "report_result",
+    "run_batch",
+    "run_resume",
+    "run_serve",
+    "create_metrics",
     "menu",
     "main",
 ]
 
 
 if __name__ == "__main__":  # pragma: no cover
-    main()
+    sys.exit(main())
 
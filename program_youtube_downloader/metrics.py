@@ -0,0 +1,304 @@
+"""Prometheus metrics of a :class:`~program_youtube_downloader.downloader.YoutubeDownloader`.
+
+Metrics are rendered in the Prometheus text exposition format, either served
+over HTTP or written for the textfile collector of ``node_exporter``. The
+format is simple enough not to require ``prometheus_client``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Sequence
+
+if TYPE_CHECKING:  # pragma: no cover - imported when serving
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from a cached resolution to a large download.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    pairs = list(zip(names, values))
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    """Metric family holding one value per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(v) for v in labels)
+
+    def samples(self) -> Iterator[str]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Return the family in the text exposition format."""
+        header = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        return "\n".join([*header, *self.samples()]) + "\n"
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {} if labelnames else {(): 0.0}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the value of ``labels``."""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Return the current value of ``labels``."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Subtract ``amount`` from the value of ``labels``."""
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        """Replace the value of ``labels``."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations over cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return sum(self._counts)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = 0
+        for bound, count in zip([*self.buckets, float("inf")], counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{_number(bound)}"}} {cumulative}'
+        yield f"{self.name}_sum {_number(total)}"
+        yield f"{self.name}_count {cumulative}"
+
+
+class Metrics:
+    """Registry of the metrics updated by a downloader.
+
+    Pass an instance to :class:`~program_youtube_downloader.downloader.YoutubeDownloader`
+    to opt in; it lives as long as the downloader, across batches. Expose it
+    with :meth:`serve` or :meth:`write_textfile`.
+
+    Args:
+        textfile: File rewritten, at most every ``interval`` seconds while a
+            batch runs and at the end of every batch, for the textfile
+            collector of ``node_exporter``.
+        interval: Minimum number of seconds between two writes of
+            ``textfile``.
+        clock: Time source used to throttle the writes.
+    """
+
+    def __init__(
+        self,
+        textfile: Path | None = None,
+        *,
+        interval: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.textfile = Path(textfile) if textfile is not None else None
+        self.interval = interval
+        self._clock = clock
+        self._written = float("-inf")
+        self._write_lock = threading.Lock()
+
+        self.bytes_downloaded = Counter(
+            "pydl_bytes_downloaded_total", "Bytes of streams downloaded."
+        )
+        self.downloads = Counter(
+            "pydl_downloads_total", "URLs processed, by result.", ["result"]
+        )
+        self.retries = Counter(
+            "pydl_retries_total",
+            "Download attempts retried, by class of the original error.",
+            ["error"],
+        )
+        self.active_workers = Gauge(
+            "pydl_active_workers", "Downloads currently transferring data."
+        )
+        self.queue_depth = Gauge(
+            "pydl_queue_depth", "Resolved videos scheduled but not finished."
+        )
+        self.resolve_seconds = Histogram(
+            "pydl_resolve_seconds", "Time spent resolving the metadata of a video."
+        )
+        self.download_seconds = Histogram(
+            "pydl_download_seconds", "Time spent downloading a stream, retries included."
+        )
+        self.archive_lookups = Counter(
+            "pydl_archive_lookups_total",
+            "Download archive lookups, by result (hit or miss).",
+            ["result"],
+        )
+        self.cache_lookups = Counter(
+            "pydl_cache_lookups_total",
+            "Metadata cache lookups, by result (hit or miss).",
+            ["result"],
+        )
+
+    def families(self) -> list[_Metric]:
+        """Return every metric of the registry."""
+        return [v for v in vars(self).values() if isinstance(v, _Metric)]
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        return "".join(metric.render() for metric in self.families())
+
+    def write_textfile(self, path: Path | None = None) -> None:
+        """Atomically write the metrics to ``path``, ``textfile`` by default.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        path = Path(path) if path is not None else self.textfile
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The collector must never read a partially written file.
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def flush(self, force: bool = False) -> None:
+        """Write ``textfile`` if ``interval`` has passed since the last write.
+
+        Errors are logged: metrics must never fail a download.
+        """
+        if self.textfile is None:
+            return
+        now = self._clock()
+        with self._write_lock:
+            if not force and now - self._written < self.interval:
+                return
+            self._written = now
+            try:
+                self.write_textfile()
+            except OSError as e:
+                logger.warning("Les métriques n'ont pas pu être écrites : %s", e)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the metrics on ``http://host:port/metrics`` from a daemon thread.
+
+        Returns the running server; call ``shutdown()`` on it to stop.
+
+        Raises:
+            OSError: If the address cannot be bound.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] not in {"/", "/metrics"}:
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                logger.debug("metrics: " + format, *args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(
+            target=server.serve_forever, name="pydl-metrics", daemon=True
+        )
+        thread.start()
+        logger.info("Métriques disponibles sur http://%s:%d/metrics", host, server.server_port)
+        return server
+
+
+__all__ = ["Counter", "Gauge", "Histogram", "Metrics", "DEFAULT_BUCKETS"]
@@ -1,14 +1,39 @@
 import sys
+import threading
+import time
 from dataclasses import dataclass
-from typing import Protocol, Any
+from typing import Protocol, Any, Callable, TextIO
 import logging
 
-import colorama
-from colorama import init
+logger = logging.getLogger(__name__)
 
-init(autoreset=True)
+# Values of ``colorama.Fore``. colorama itself is only imported, and stdout
+# wrapped, once a bar is drawn on a terminal: see :func:`_init_colorama`.
+FORE_WHITE = "\x1b[37m"
+FORE_GREEN = "\x1b[32m"
+FORE_LIGHTYELLOW = "\x1b[93m"
+FORE_RESET = "\x1b[39m"
 
-logger = logging.getLogger(__name__)
+_colorama_ready = False
+_colorama_lock = threading.Lock()
+
+
+def _init_colorama() -> None:
+    """Initialise colorama the first time something is drawn on a terminal.
+
+    colorama translates the ANSI codes for legacy Windows consoles; other
+    outputs need nothing, so short runs and pipes never pay for its import.
+    """
+    global _colorama_ready
+    if _colorama_ready:
+        return
+    with _colorama_lock:
+        if _colorama_ready:
+            return
+        import colorama
+
+        colorama.init(autoreset=True)
+        _colorama_ready = True
 
 
 class ProgressHandler(Protocol):
@@ -19,13 +44,18 @@ class ProgressHandler(Protocol):
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(slots=True)
 class ProgressEvent:
-    """Structured information about a download progress update."""
+    """Structured information about a download progress update.
+
+    Events emitted through :class:`ProgressTracker` are reused for every
+    update of a stream: handlers must copy the values they want to keep.
+    """
 
     bytes_total: int
     bytes_downloaded: int
     percent: float
+    label: str = ""
 
 
 def create_progress_event(stream: Any, bytes_remaining: int) -> ProgressEvent:
@@ -39,7 +69,112 @@ def create_progress_event(stream: Any, bytes_remaining: int) -> ProgressEvent:
     else:
         downloaded = total - bytes_remaining
         percent = (downloaded / total) * 100
-    return ProgressEvent(bytes_total=total, bytes_downloaded=downloaded, percent=percent)
+    return ProgressEvent(
+        bytes_total=total,
+        bytes_downloaded=downloaded,
+        percent=percent,
+        label=str(getattr(stream, "default_filename", "")),
+    )
+
+
+class NullProgressHandler:
+    """Progress handler discarding every event, for headless runs."""
+
+    def on_progress(self, event: ProgressEvent) -> None:
+        """Ignore ``event``."""
+
+
+class ProgressTracker:
+    """Low overhead translation of chunk callbacks for a single stream.
+
+    The file size and name are read once and one :class:`ProgressEvent` is
+    updated in place, so no object is created per chunk. A stream of
+    unknown size is supposed complete: it is warned about and delivered
+    once, its event never changing afterwards. Updates can be sampled: the handler is only
+    called every ``every`` updates or once ``interval`` seconds have passed
+    since the last delivery, whichever comes first. The final update of a
+    stream is always delivered.
+    """
+
+    __slots__ = (
+        "stream",
+        "handler",
+        "event",
+        "every",
+        "interval",
+        "_count",
+        "_last",
+        "_clock",
+    )
+
+    def __init__(
+        self,
+        stream: Any,
+        handler: ProgressHandler,
+        *,
+        every: int = 1,
+        interval: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Track ``stream`` and deliver its progress to ``handler``.
+
+        Args:
+            stream: Stream being downloaded.
+            handler: Receiver of the progress events.
+            every: Deliver one update out of ``every``. ``1`` delivers all.
+            interval: Also deliver an update when this many seconds passed
+                since the previous delivery. ``0`` disables the time rule.
+            clock: Monotonic time source, for tests.
+        """
+        total = getattr(stream, "filesize", None) or 0
+        if not total:
+            logger.warning("Taille totale manquante. Supposée complète")
+        self.stream = stream
+        self.handler = handler
+        self.event = ProgressEvent(
+            bytes_total=total,
+            bytes_downloaded=0,
+            percent=0.0 if total else 100.0,
+            label=str(getattr(stream, "default_filename", "")),
+        )
+        self.every = max(1, every)
+        self.interval = interval
+        self._count = 0
+        self._clock = clock
+        self._last = clock() if interval > 0 else 0.0
+
+    @property
+    def total(self) -> int:
+        """Size of the stream in bytes, ``0`` if unknown."""
+        return self.event.bytes_total
+
+    def update(self, bytes_downloaded: int) -> None:
+        """Record ``bytes_downloaded`` and notify the handler when sampled."""
+        event = self.event
+        total = event.bytes_total
+        if total:
+            event.bytes_downloaded = bytes_downloaded
+            event.percent = bytes_downloaded * 100 / total
+        self._count += 1
+        if not total:
+            if self._count == 1:
+                self.handler.on_progress(event)
+            return
+        if bytes_downloaded < total and not self._sampled():
+            return
+        self.handler.on_progress(event)
+
+    def _sampled(self) -> bool:
+        """Return ``True`` if the current update must be delivered."""
+        if self.every > 1 and self._count % self.every == 0:
+            return True
+        if self.interval > 0:
+            now = self._clock()
+            if now - self._last >= self.interval:
+                self._last = now
+                return True
+            return False
+        return self.every == 1
 
 
 def on_download_progress(
@@ -60,9 +195,9 @@ class ProgressOptions:
     empty: str = " "
     prefix_start: str = "Téléchargement en cours ..."
     prefix_end: str = "Téléchargement terminé ..."
-    color_text: str = colorama.Fore.WHITE
-    color_Downloading: str = colorama.Fore.LIGHTYELLOW_EX
-    color_Download_OK: str = colorama.Fore.GREEN
+    color_text: str = FORE_WHITE
+    color_Downloading: str = FORE_LIGHTYELLOW
+    color_Download_OK: str = FORE_GREEN
 
 
 def progress_bar(progress: float, options: ProgressOptions | None = None) -> None:
@@ -74,6 +209,8 @@ def progress_bar(progress: float, options: ProgressOptions | None = None) -> Non
     """
     if options is None:
         options = ProgressOptions()
+    if sys.stdout.isatty():
+        _init_colorama()
 
     x = int(options.size * progress / 100)
     bar = (
@@ -100,7 +237,7 @@ def progress_bar(progress: float, options: ProgressOptions | None = None) -> Non
             + bar
             + f" {progress:.2f}% "
         )
-        print(colorama.Fore.RESET)
+        print(FORE_RESET)
 
     sys.stdout.flush()
 
@@ -126,6 +263,179 @@ class VerboseProgressHandler:
         print(f"{event.percent:.2f}%")
 
 
+def format_bytes(size: float) -> str:
+    """Return ``size`` in a human readable binary unit."""
+    for unit in ("o", "Kio", "Mio", "Gio"):
+        if abs(size) < 1024 or unit == "Gio":
+            return f"{size:.1f} {unit}" if unit != "o" else f"{int(size)} {unit}"
+        size /= 1024
+    return f"{size:.1f} Gio"  # pragma: no cover - unreachable
+
+
+@dataclass
+class _ItemProgress:
+    """Progress state of one stream tracked by :class:`MultiProgressRenderer`."""
+
+    # Kept so that its ``id``, the key of the stream, is not reused meanwhile.
+    event: ProgressEvent
+    total: int
+    downloaded: int
+    last_downloaded: int = 0
+    speed: float = 0.0
+
+
+class MultiProgressRenderer:
+    """Progress handler aggregating concurrent downloads.
+
+    :meth:`on_progress` only records the latest state of each stream under a
+    lock; a single background thread redraws every stream and the totals at
+    most once per ``refresh_interval``. Download workers therefore never
+    write to the terminal themselves and do not overwrite each other.
+
+    Streams are told apart by their event, which :class:`ProgressTracker`
+    reuses for every update of a stream, so files sharing a name are tracked
+    separately. A stream leaves the display once drawn complete, streams of
+    unknown size as soon as they are drawn. On an output that is not a terminal, such as a log file, a
+    summary line is only written when a stream finishes, every
+    ``log_interval`` seconds and once more by :meth:`close`.
+    """
+
+    # Weight of the latest sample in the smoothed throughput.
+    SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        refresh_interval: float = 0.25,
+        output: TextIO | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        log_interval: float = 30.0,
+    ) -> None:
+        """Create the renderer.
+
+        Args:
+            refresh_interval: Minimum delay in seconds between two redraws.
+            output: Text stream to draw on, ``sys.stdout`` by default.
+            clock: Monotonic time source, for tests.
+            log_interval: Maximum delay in seconds between two summary lines
+                on an output that is not a terminal.
+        """
+        self.refresh_interval = refresh_interval
+        self.output = output
+        self.log_interval = log_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._items: dict[int, _ItemProgress] = {}
+        self._done_count = 0
+        self._done_bytes = 0
+        self._total_speed = 0.0
+        self._last_total = 0
+        self._last_render: float | None = None
+        self._last_line: float | None = None
+        self._lines_drawn = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def on_progress(self, event: ProgressEvent) -> None:
+        """Record ``event``; drawing happens on the renderer thread."""
+        with self._lock:
+            item = self._items.get(id(event))
+            if item is None:
+                item = self._items[id(event)] = _ItemProgress(
+                    event, event.bytes_total, event.bytes_downloaded
+                )
+            else:
+                item.total = event.bytes_total
+                item.downloaded = event.bytes_downloaded
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="pydl-progress", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.render()
+
+    def render(self, final: bool = False) -> None:
+        """Redraw the progress of every stream and the aggregated totals.
+
+        Args:
+            final: Always write the summary line, even on an output that is
+                not a terminal.
+        """
+        now = self._clock()
+        with self._lock:
+            elapsed = now - self._last_render if self._last_render else 0.0
+            self._last_render = now
+            lines = []
+            active_bytes = 0
+            finished = 0
+            for key, item in list(self._items.items()):
+                if elapsed > 0:
+                    sample = (item.downloaded - item.last_downloaded) / elapsed
+                    item.speed += self.SMOOTHING * (sample - item.speed)
+                item.last_downloaded = item.downloaded
+                percent = item.downloaded * 100 / item.total if item.total else 100.0
+                lines.append(
+                    f"{item.event.label[:40]:<40} {percent:6.2f}% "
+                    f"{format_bytes(item.speed)}/s"
+                )
+                if item.downloaded >= item.total:
+                    del self._items[key]
+                    finished += 1
+                    self._done_bytes += item.downloaded
+                else:
+                    active_bytes += item.downloaded
+            self._done_count += finished
+            total = self._done_bytes + active_bytes
+            if elapsed > 0:
+                sample = (total - self._last_total) / elapsed
+                self._total_speed += self.SMOOTHING * (sample - self._total_speed)
+            self._last_total = total
+            lines.append(
+                f"Total : {len(self._items)} en cours, {self._done_count} terminé(s), "
+                f"{format_bytes(total)} - {format_bytes(self._total_speed)}/s"
+            )
+            self._draw(lines, now, final or finished > 0)
+
+    def _draw(self, lines: list[str], now: float, summary: bool) -> None:
+        output = self.output or sys.stdout
+        if output.isatty():
+            _init_colorama()
+            # Move back to the first line of the previous frame, redraw and
+            # erase what is left below of a longer previous frame.
+            prefix = f"\x1b[{self._lines_drawn}F" if self._lines_drawn else ""
+            frame = "".join(f"\x1b[K{line}\n" for line in lines)
+            output.write(prefix + frame + "\x1b[J")
+            self._lines_drawn = len(lines)
+        elif (
+            summary
+            or self._last_line is None
+            or now - self._last_line >= self.log_interval
+        ):
+            output.write(lines[-1] + "\n")
+            self._last_line = now
+        else:
+            return
+        output.flush()
+
+    def close(self) -> None:
+        """Stop the renderer thread after drawing the final state."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self.render(final=True)
+        with self._lock:
+            self._items.clear()
+            self._lines_drawn = 0
+            self._last_render = None
+            self._last_line = None
+
+
 __all__ = [
     "ProgressHandler",
     "ProgressEvent",
@@ -135,4 +445,8 @@ __all__ = [
     "progress_bar",
     "ProgressBarHandler",
     "VerboseProgressHandler",
+    "NullProgressHandler",
+    "ProgressTracker",
+    "MultiProgressRenderer",
+    "format_bytes",
 ]
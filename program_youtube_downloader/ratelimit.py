@@ -0,0 +1,138 @@
+"""Token bucket bandwidth limiting shared by download threads."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_rate(value: str) -> float:
+    """Convert ``value`` such as ``"500K"`` or ``"2.5M"`` to bytes per second.
+
+    Suffixes ``K``, ``M`` and ``G`` are binary multiples; a trailing ``B`` or
+    ``/s`` is ignored.
+
+    Raises:
+        ValueError: If ``value`` is not a positive rate.
+    """
+    text = value.strip().upper().removesuffix("/S").removesuffix("B")
+    unit = text[-1:] if text[-1:] in _UNITS else ""
+    number = float(text[: len(text) - len(unit)])
+    if number <= 0:
+        raise ValueError(f"Invalid rate: {value!r}")
+    return number * _UNITS[unit]
+
+
+class TokenBucket:
+    """Thread-safe token bucket where one token is one byte.
+
+    Consumers reserve tokens under a lock and sleep outside of it, so a
+    large request puts the bucket in debt instead of starving other threads.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create a bucket refilled at ``rate`` bytes per second.
+
+        Args:
+            rate: Sustained throughput in bytes per second.
+            capacity: Maximum burst in bytes, one second of ``rate`` by
+                default.
+            clock: Monotonic time source, for tests.
+            sleep: Function used to wait, for tests.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """Take ``amount`` tokens, blocking until the bucket can afford them."""
+        wait = self.reserve(amount)
+        if wait > 0:
+            self._sleep(wait)
+
+    def reserve(self, amount: int) -> float:
+        """Take ``amount`` tokens and return the seconds owed, without waiting."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class BandwidthLimiter:
+    """Limit the throughput of all downloads and, optionally, of each worker.
+
+    ``total_rate`` is shared by every thread calling :meth:`throttle`;
+    ``per_worker_rate`` applies to each thread (download worker or segment
+    connection) separately.
+    """
+
+    def __init__(
+        self,
+        total_rate: float | None = None,
+        per_worker_rate: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.total_rate = total_rate
+        self.per_worker_rate = per_worker_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._total = (
+            TokenBucket(total_rate, clock=clock, sleep=sleep) if total_rate else None
+        )
+        self._local = threading.local()
+
+    def throttle(self, nbytes: int) -> None:
+        """Account for ``nbytes`` just transferred, sleeping if over budget."""
+        if self.per_worker_rate:
+            bucket = getattr(self._local, "bucket", None)
+            if bucket is None:
+                bucket = TokenBucket(
+                    self.per_worker_rate, clock=self._clock, sleep=self._sleep
+                )
+                self._local.bucket = bucket
+            bucket.consume(nbytes)
+        if self._total is not None:
+            self._total.consume(nbytes)
+
+    def worker_bucket(self) -> TokenBucket | None:
+        """Return a new per-worker bucket, or ``None`` without such a limit."""
+        if not self.per_worker_rate:
+            return None
+        return TokenBucket(self.per_worker_rate, clock=self._clock, sleep=self._sleep)
+
+    def reserve(self, nbytes: int, bucket: TokenBucket | None = None) -> float:
+        """Account for ``nbytes`` and return the seconds to wait, without sleeping.
+
+        Non-blocking counterpart of :meth:`throttle` for asyncio tasks. They
+        all share one thread, so each task passes its own ``bucket`` from
+        :meth:`worker_bucket` to get a per-worker limit.
+        """
+        delay = bucket.reserve(nbytes) if bucket is not None else 0.0
+        if self._total is not None:
+            delay = max(delay, self._total.reserve(nbytes))
+        return delay
+
+
+__all__ = ["parse_rate", "TokenBucket", "BandwidthLimiter"]
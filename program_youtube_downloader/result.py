@@ -0,0 +1,126 @@
+"""Outcome of a batch processed by ``download_multiple_videos``."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+
+
+@dataclass
+class ItemRecord:
+    """Measurements of one URL processed by a batch.
+
+    Attributes:
+        url: URL as given to the batch.
+        video_id: YouTube video ID, or ``None`` if the URL has none.
+        itag: Itag of the downloaded stream, once selected.
+        bytes: Size of the downloaded stream (before audio conversion).
+        resolve_time: Seconds spent resolving the metadata of the video.
+        download_time: Seconds spent downloading the stream, retries
+            included.
+        retries: Number of attempts after the first one.
+        path: Final file, once the download succeeded.
+        error: Class name of the error that made the item fail, or
+            ``"unresolved"`` / ``"no_matching_stream"`` when it failed
+            before any download; ``None`` on success.
+        finished_at: Unix time at which the item completed.
+    """
+
+    url: str
+    video_id: str | None = None
+    itag: int | None = None
+    bytes: int | None = None
+    resolve_time: float | None = None
+    download_time: float | None = None
+    retries: int = 0
+    path: str | None = None
+    error: str | None = None
+    finished_at: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        """``True`` when the item was downloaded."""
+        return self.error is None
+
+
+@dataclass
+class BatchResult:
+    """URLs of a batch grouped by outcome.
+
+    Attributes:
+        succeeded: URLs downloaded successfully.
+        failed: URLs whose metadata or download failed.
+        skipped: Video IDs ignored because they are already in the archive
+            or done in the job queue.
+        duplicates: Video IDs of the URLs not downloaded because another URL
+            of the same video was, in this batch or by a concurrent one.
+        items: One :class:`ItemRecord` per succeeded or failed URL, in
+            completion order.
+    """
+
+    succeeded: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    items: list[ItemRecord] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        """Number of videos seen by the batch."""
+        return len(self.succeeded) + len(self.failed) + len(self.skipped)
+
+    @property
+    def ok(self) -> bool:
+        """``True`` when no URL failed."""
+        return not self.failed
+
+    @property
+    def exit_code(self) -> int:
+        """Process exit status summarising the batch."""
+        return EXIT_OK if self.ok else EXIT_FAILURES
+
+    @classmethod
+    def merge(cls, results: Iterable["BatchResult"]) -> "BatchResult":
+        """Return one result combining ``results``, such as those of shards."""
+        merged = cls()
+        for result in results:
+            merged.succeeded.extend(result.succeeded)
+            merged.failed.extend(result.failed)
+            merged.skipped.extend(result.skipped)
+            merged.duplicates.extend(result.duplicates)
+            merged.items.extend(result.items)
+        return merged
+
+    def write_jsonl(self, path: Path) -> None:
+        """Append :attr:`items` to ``path``, one JSON object per line.
+
+        Successive runs accumulate in the same file, so throughput and
+        latency can be compared across runs.
+
+        Raises:
+            OSError: If ``path`` cannot be written.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            for item in self.items:
+                f.write(json.dumps(asdict(item), ensure_ascii=False) + "\n")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON serialisable summary of the batch."""
+        return {
+            "total": self.total,
+            "succeeded": len(self.succeeded),
+            "failed": list(self.failed),
+            "skipped": len(self.skipped),
+            "duplicates": len(self.duplicates),
+            "exit_code": self.exit_code,
+        }
+
+
+__all__ = ["BatchResult", "ItemRecord", "EXIT_OK", "EXIT_FAILURES"]
@@ -0,0 +1,101 @@
+"""Retry policy used by :class:`~program_youtube_downloader.downloader.YoutubeDownloader`."""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.error import HTTPError, URLError
+
+from .exceptions import MuxError, StreamAccessError
+from .utils import loaded_errors, root_cause
+
+# HTTP status codes worth retrying: timeouts, throttling and server errors.
+# YouTube answers 403 when a client is throttled, not only for real denials.
+RETRYABLE_STATUS: frozenset[int] = frozenset({403, 408, 425, 429, 500, 502, 503, 504})
+
+# Video errors that will not go away by trying again. ``pytube`` errors are
+# named rather than imported, see :func:`~program_youtube_downloader.utils.loaded_errors`.
+FATAL_ERRORS: tuple[str, ...] = (
+    "pytube.exceptions.VideoUnavailable",
+    "pytubefix.exceptions.VideoUnavailable",
+)
+
+# ``BotDetection`` derives from ``VideoUnavailable`` but is a throttle.
+TRANSIENT_ERRORS: tuple[str, ...] = (
+    "pytubefix.exceptions.BotDetection",
+    "pytube.exceptions.MaxRetriesExceeded",
+    "pytubefix.exceptions.MaxRetriesExceeded",
+)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter and error classification.
+
+    Attributes:
+        max_attempts: Total number of attempts, including the first one.
+        base_delay: Delay in seconds before the first retry.
+        max_delay: Upper bound of any delay, including ``Retry-After``.
+        multiplier: Growth factor of the delay between two retries.
+        jitter: Fraction of each delay that is randomised, from ``0`` (fixed
+            delays) to ``1`` (full jitter). Spreads out retries of parallel
+            workers hitting the same throttle.
+        retryable_status: HTTP status codes considered transient.
+        sleep: Function used to wait, replaceable in tests.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 1.0
+    retryable_status: frozenset[int] = RETRYABLE_STATUS
+    sleep: Callable[[float], None] = field(default=time.sleep, repr=False, compare=False)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Return ``True`` if ``error`` may succeed on a later attempt.
+
+        The ``__cause__`` chain is followed so that errors wrapped in
+        :class:`~program_youtube_downloader.exceptions.DownloadError` are
+        classified by their origin. Network errors, throttling and unknown
+        errors are retryable; unavailable videos, non-transient HTTP codes
+        and local I/O errors are fatal.
+        """
+        cause = root_cause(error)
+        if isinstance(cause, HTTPError):
+            return cause.code in self.retryable_status
+        if isinstance(cause, loaded_errors(*TRANSIENT_ERRORS)):
+            return True
+        if isinstance(cause, (StreamAccessError, MuxError)):
+            return False
+        if isinstance(cause, loaded_errors(*FATAL_ERRORS)):
+            return False
+        if isinstance(cause, (URLError, ConnectionError, TimeoutError)):
+            return True
+        if isinstance(cause, loaded_errors("http.client.HTTPException")):
+            return True
+        if isinstance(cause, OSError):
+            # Remaining OS errors are local (disk full, permissions...).
+            return False
+        return True
+
+    def delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """Return the number of seconds to wait after failed ``attempt``.
+
+        A numeric ``Retry-After`` header sent with an HTTP error takes
+        precedence over the computed backoff, within ``max_delay``.
+        """
+        cause = root_cause(error) if error is not None else None
+        if isinstance(cause, HTTPError) and cause.headers is not None:
+            retry_after = cause.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(self.max_delay, float(retry_after))
+        backoff = min(
+            self.max_delay, self.base_delay * self.multiplier ** (attempt - 1)
+        )
+        return backoff - backoff * self.jitter * random.random()
+
+
+__all__ = ["RetryPolicy", "RETRYABLE_STATUS"]
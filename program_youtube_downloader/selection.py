@@ -0,0 +1,202 @@
+"""Declarative stream selection evaluated against each video's streams."""
+
+from __future__ import annotations
+
+import operator
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+_OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    ">": operator.gt,
+    "=": operator.eq,
+}
+
+_SIZE_UNITS = {
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<word>[a-z]+)"
+    r"|(?P<op><=|>=|<|>|=)\s*(?P<number>\d+(?:\.\d+)?)\s*"
+    r"(?P<unit>p|kbps|[kmg]i?b|b)\b)\s*,?",
+    re.IGNORECASE,
+)
+
+_GOALS = {"best": True, "smallest": False, "worst": False}
+_KINDS = ("audio", "video")
+
+
+def _number(value: Any) -> int | None:
+    """Return the leading integer of ``"1080p"`` or ``"128kbps"`` style values."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.match(r"\d+", str(value))
+    return int(match.group()) if match else None
+
+
+def _filesize(stream: Any) -> int | None:
+    # ``_filesize`` is known from the metadata; ``filesize`` may cost a request.
+    size = getattr(stream, "_filesize", None) or getattr(stream, "filesize", None)
+    return int(size) if size else None
+
+
+_METRICS: dict[str, Callable[[Any], int | None]] = {
+    "resolution": lambda s: _number(getattr(s, "resolution", None)),
+    "abr": lambda s: _number(getattr(s, "abr", None)),
+    "filesize": _filesize,
+}
+
+
+@dataclass(frozen=True)
+class Constraint:
+    """Bound on one stream metric, such as ``resolution <= 1080``."""
+
+    metric: str
+    op: str
+    value: float
+
+    def accepts(self, stream: Any) -> bool:
+        """Return ``True`` if ``stream`` satisfies the bound."""
+        actual = _METRICS[self.metric](stream)
+        return actual is not None and _OPERATORS[self.op](actual, self.value)
+
+    def __str__(self) -> str:
+        unit = {"resolution": "p", "abr": "kbps", "filesize": "B"}[self.metric]
+        value = float(self.value)
+        return f"{self.op}{int(value) if value.is_integer() else value}{unit}"
+
+
+@dataclass(frozen=True)
+class SelectionPolicy:
+    """Stream selection rule such as ``"best <=1080p"`` or ``"audio >=128kbps"``.
+
+    A policy is parsed once with :meth:`parse` and then applied to the stream
+    list of every video with :meth:`select`, in a single pass over the
+    streams.
+
+    Attributes:
+        prefer_best: ``True`` to keep the highest quality stream satisfying
+            the constraints, ``False`` for the smallest one.
+        kind: ``"audio"`` ranks streams by bitrate, ``"video"`` by
+            resolution. ``None`` follows the ``download_sound_only`` flag
+            given to :meth:`select`.
+        constraints: Bounds every selected stream must satisfy.
+    """
+
+    prefer_best: bool = True
+    kind: str | None = None
+    constraints: tuple[Constraint, ...] = ()
+
+    @classmethod
+    def parse(cls, spec: str) -> "SelectionPolicy":
+        """Compile ``spec`` into a policy.
+
+        ``spec`` holds an optional goal (``best``, or ``smallest``/``worst``),
+        an optional kind (``audio`` or ``video``) and any number of bounds
+        made of an operator (``<=``, ``>=``, ``<``, ``>``, ``=``, ``≤``,
+        ``≥``), a number and a unit: ``p`` for a resolution, ``kbps`` for an
+        audio bitrate, ``B``/``KB``/``MB``/``GB`` (or ``KiB``...) for a file
+        size. Examples: ``"best <=1080p"``, ``"smallest >=720p"``,
+        ``"audio >=128kbps"``, ``"size <=50MB"``.
+
+        Raises:
+            ValueError: If ``spec`` cannot be parsed.
+        """
+        text = spec.replace("≤", "<=").replace("≥", ">=").strip()
+        prefer_best = True
+        kind = None
+        constraints: list[Constraint] = []
+        position = 0
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Invalid selection policy: {spec!r}")
+            position = match.end()
+            word = (match.group("word") or "").lower()
+            if word in _GOALS:
+                prefer_best = _GOALS[word]
+            elif word in _KINDS:
+                kind = word
+            elif word == "size":
+                continue
+            elif word:
+                raise ValueError(f"Unknown selection keyword {word!r} in {spec!r}")
+            else:
+                unit = match.group("unit").lower()
+                number = float(match.group("number"))
+                if unit == "p":
+                    metric = "resolution"
+                elif unit == "kbps":
+                    metric = "abr"
+                else:
+                    metric = "filesize"
+                    number *= _SIZE_UNITS[unit]
+                constraints.append(Constraint(metric, match.group("op"), number))
+        return cls(prefer_best, kind, tuple(constraints))
+
+    def __str__(self) -> str:
+        """Return a specification that :meth:`parse` turns back into ``self``."""
+        words = ["best" if self.prefer_best else "smallest"]
+        if self.kind:
+            words.append(self.kind)
+        words.extend(str(c) for c in self.constraints)
+        return " ".join(words)
+
+    @classmethod
+    def matching(cls, stream: Any, download_sound_only: bool) -> "SelectionPolicy":
+        """Return the policy reproducing the choice of ``stream`` on other videos.
+
+        The best stream not above the quality of ``stream`` is selected, so
+        that an interactive choice made on the first video of a batch maps to
+        the equivalent stream of every other video.
+        """
+        if download_sound_only:
+            bitrate = _number(getattr(stream, "abr", None))
+            if bitrate is not None:
+                return cls(True, "audio", (Constraint("abr", "<=", bitrate),))
+        resolution = _number(getattr(stream, "resolution", None))
+        if resolution is not None:
+            return cls(True, "video", (Constraint("resolution", "<=", resolution),))
+        return cls()
+
+    def select(self, streams: Iterable[Any], download_sound_only: bool = False) -> Any:
+        """Return the stream of ``streams`` chosen by the policy, or ``None``.
+
+        Streams lacking the ranked metric (resolution for videos, bitrate for
+        audio) are ignored.
+        """
+        kind = self.kind or ("audio" if download_sound_only else "video")
+        if kind == "audio":
+            metrics = ("abr", "resolution")
+        else:
+            metrics = ("resolution", "abr")
+        primary, secondary = _METRICS[metrics[0]], _METRICS[metrics[1]]
+        sign = 1 if self.prefer_best else -1
+
+        chosen = None
+        chosen_key: tuple[int, int] | None = None
+        for stream in streams:
+            rank = primary(stream)
+            # Streams without the ranked metric (audio-only streams when
+            # ranking videos) are not candidates.
+            if rank is None or not all(c.accepts(stream) for c in self.constraints):
+                continue
+            key = (sign * rank, sign * (secondary(stream) or 0))
+            if chosen_key is None or key > chosen_key:
+                chosen, chosen_key = stream, key
+        return chosen
+
+
+__all__ = ["SelectionPolicy", "Constraint"]
@@ -0,0 +1,486 @@
+"""Long-running download service behind a local HTTP/JSON API.
+
+The ``serve`` command imports everything and configures the downloader once,
+then runs the jobs submitted to :class:`DownloadService` over HTTP, on the
+loopback interface or a Unix socket. Jobs share the metadata cache, archive,
+rate limiter and metrics of the service, the videos being downloaded (see
+:mod:`~program_youtube_downloader.inflight`) and a global limit on the
+number of downloads in flight.
+
+Endpoints:
+
+``POST /jobs``
+    Submit a job: ``{"urls": [...]}``, ``{"playlist": url}`` or
+    ``{"channel": url}``, with an optional ``"options"`` object of
+    :class:`~program_youtube_downloader.config.DownloadOptions` fields.
+    Answers ``202`` with the job.
+``GET /jobs`` and ``GET /jobs/<id>``
+    Status, progress and, once finished, result of the jobs.
+``GET /health``
+    Number of queued and running jobs.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import itertools
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+from .config import DownloadOptions
+from .downloader import YoutubeDownloader
+from .progress import NullProgressHandler, ProgressEvent
+from .result import BatchResult
+from .selection import SelectionPolicy
+from .utils import root_cause
+from .validators import validate_many
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+# Largest request body accepted, a list of about 20 000 URLs.
+MAX_BODY = 1024 * 1024
+# Finished jobs kept for ``GET /jobs`` before the oldest are forgotten.
+MAX_HISTORY = 1000
+
+
+def _flag(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise TypeError("booléen attendu")
+    return value
+
+
+def _count(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError("entier attendu")
+    return value
+
+
+def _seconds(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError("nombre attendu")
+    return float(value)
+
+
+def _text(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError("chaîne attendue")
+    return value
+
+
+# DownloadOptions fields a job may set, with the converter of their JSON value.
+OPTION_FIELDS: dict[str, Callable[[Any], Any]] = {
+    "save_path": lambda v: Path(_text(v)).expanduser().resolve(),
+    "download_sound_only": _flag,
+    "max_workers": _count,
+    "resolve_workers": _count,
+    "queue_size": _count,
+    "resumable": _flag,
+    "segments": _count,
+    "adaptive": _flag,
+    "selection": lambda v: SelectionPolicy.parse(_text(v)),
+    "audio_codec": lambda v: _text(v).strip().lower(),
+    "audio_bitrate": _text,
+    "transcode_workers": _count,
+    "progress_every": _count,
+    "progress_interval": _seconds,
+}
+
+
+class JobStatus(Enum):
+    """Lifecycle of a job submitted to a :class:`DownloadService`."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobProgress:
+    """Progress handler keeping the latest state of every stream of a job."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._streams: dict[str, tuple[int, int]] = {}
+
+    def on_progress(self, event: ProgressEvent) -> None:
+        """Record ``event``, which is reused by its sender."""
+        with self._lock:
+            self._streams[event.label] = (event.bytes_downloaded, event.bytes_total)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the bytes downloaded and expected over all streams."""
+        with self._lock:
+            states = list(self._streams.values())
+        downloaded = sum(done for done, _ in states)
+        total = sum(size for _, size in states)
+        return {
+            "streams": len(states),
+            "streams_done": sum(1 for done, size in states if size and done >= size),
+            "bytes_downloaded": downloaded,
+            "bytes_total": total,
+            "percent": round(downloaded * 100 / total, 1) if total else 0.0,
+        }
+
+
+@dataclass
+class Job:
+    """A batch submitted to a :class:`DownloadService`.
+
+    Attributes:
+        id: Identifier of the job in the API.
+        kind: ``"urls"``, ``"playlist"`` or ``"channel"``.
+        source: URLs of a ``urls`` job, or the playlist or channel URL.
+        options: Options of the batch.
+        status: Current :class:`JobStatus`.
+        progress: Progress of the streams downloaded so far.
+        result: Outcome of the batch once it ended.
+        error: Why the job failed without a result.
+    """
+
+    id: str
+    kind: str
+    source: list[str] | str
+    options: DownloadOptions
+    status: JobStatus = JobStatus.QUEUED
+    progress: JobProgress = field(default_factory=JobProgress)
+    result: BatchResult | None = None
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        """``True`` once the job is done, failed or cancelled."""
+        return self.status in (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the JSON representation of the job in the API."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "videos": len(self.source) if isinstance(self.source, list) else None,
+            "progress": self.progress.to_dict(),
+            "result": self.result.to_dict() if self.result else None,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class DownloadService:
+    """Run submitted jobs with a warm downloader and shared resources.
+
+    Each job is a batch of its own downloader, created like ``downloader``
+    (same class, ``youtube_cls``, metrics and in-flight registry), so that
+    jobs run concurrently. At most ``max_jobs`` jobs run at a time and at
+    most ``max_downloads`` streams are downloaded at a time over all of
+    them; the other jobs wait in order of submission.
+    """
+
+    def __init__(
+        self,
+        downloader: YoutubeDownloader,
+        options: DownloadOptions,
+        load_collection: Callable[[str, str], Iterable[str]],
+        *,
+        max_jobs: int = 4,
+        max_downloads: int = 8,
+    ) -> None:
+        """Create the service.
+
+        Args:
+            downloader: Template of the downloader of each job.
+            options: Options every job starts from. Their metadata cache,
+                archive and rate limiter are shared by all jobs; a job queue
+                is not, as it describes a single batch.
+            load_collection: Function returning the video URLs of a
+                ``"playlist"`` or ``"channel"`` from its URL, such as
+                :meth:`CLI.load_playlist <program_youtube_downloader.cli.CLI.load_playlist>`.
+            max_jobs: Number of jobs running at once.
+            max_downloads: Number of streams downloaded at once over all
+                jobs.
+
+        Raises:
+            ValueError: If ``max_jobs`` or ``max_downloads`` is less than 1.
+        """
+        if max_jobs < 1:
+            raise ValueError("max_jobs must be >= 1")
+        if max_downloads < 1:
+            raise ValueError("max_downloads must be >= 1")
+        self.downloader = downloader
+        self.options = dataclasses.replace(
+            options,
+            job_queue=None,
+            interactive=False,
+            download_slots=threading.BoundedSemaphore(max_downloads),
+        )
+        self.load_collection = load_collection
+        self._executor = ThreadPoolExecutor(max_jobs, thread_name_prefix="pydl-job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, payload: Mapping[str, Any]) -> Job:
+        """Queue the job described by ``payload`` and return it.
+
+        Raises:
+            ValueError: If ``payload`` is not a valid job description.
+        """
+        kind, source = self._parse_source(payload)
+        options = self._parse_options(payload.get("options", {}))
+        with self._lock:
+            job = Job(f"{next(self._ids)}", kind, source, options)
+            job.options.progress_handler = job.progress
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job).add_done_callback(
+            functools.partial(self._cancelled, job)
+        )
+        logger.info("Travail %s reçu (%s)", job.id, kind)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Return the job ``job_id``, or ``None`` if it is unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        """Return the known jobs in order of submission."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def health(self) -> dict[str, Any]:
+        """Return the number of jobs in each non final status."""
+        jobs = self.jobs()
+        return {
+            "status": "ok",
+            "queued": sum(job.status is JobStatus.QUEUED for job in jobs),
+            "running": sum(job.status is JobStatus.RUNNING for job in jobs),
+        }
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting jobs; with ``wait`` let the running ones finish.
+
+        The jobs still queued are cancelled.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _parse_source(self, payload: Mapping[str, Any]) -> tuple[str, list[str] | str]:
+        if not isinstance(payload, Mapping):
+            raise ValueError("Objet JSON attendu")
+        kinds = [kind for kind in ("urls", "playlist", "channel") if kind in payload]
+        if len(kinds) != 1:
+            raise ValueError("Indiquez exactement un champ urls, playlist ou channel")
+        kind = kinds[0]
+        source = payload[kind]
+        if kind != "urls":
+            if not isinstance(source, str) or not source.strip():
+                raise ValueError(f"URL attendue pour {kind}")
+            return kind, source.strip()
+        if (
+            not isinstance(source, list)
+            or not source
+            or not all(isinstance(url, str) for url in source)
+        ):
+            raise ValueError("Liste d'URL non vide attendue pour urls")
+        invalid = [url for url, video_id in zip(source, validate_many(source)) if not video_id]
+        if invalid:
+            raise ValueError(f"URL invalide(s) : {', '.join(invalid[:10])}")
+        return kind, [url.strip() for url in source]
+
+    def _parse_options(self, overrides: Any) -> DownloadOptions:
+        if not isinstance(overrides, Mapping):
+            raise ValueError("Objet attendu pour options")
+        values = {}
+        for name, value in overrides.items():
+            converter = OPTION_FIELDS.get(name)
+            if converter is None:
+                raise ValueError(f"Option inconnue ou non modifiable : {name}")
+            try:
+                values[name] = converter(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Valeur invalide pour {name} : {e}") from e
+        return dataclasses.replace(self.options, **values)
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job.id for job in self._jobs.values() if job.finished]
+        for job_id in finished[: max(0, len(finished) - MAX_HISTORY)]:
+            del self._jobs[job_id]
+
+    def _new_downloader(self) -> YoutubeDownloader:
+        template = self.downloader
+        return type(template)(
+            NullProgressHandler(),
+            template.youtube_cls,
+            template.metrics,
+            template.in_flight,
+        )
+
+    def _cancelled(self, job: Job, future: Future[None]) -> None:
+        if future.cancelled():
+            job.status = JobStatus.CANCELLED
+            job.finished_at = time.time()
+            logger.info("Travail %s annulé", job.id)
+
+    def _run(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        logger.info("Travail %s démarré", job.id)
+        try:
+            options = job.options
+            if options.save_path is not None:
+                options.save_path.mkdir(parents=True, exist_ok=True)
+            source: Iterable[str]
+            if isinstance(job.source, str):
+                source = self.load_collection(job.kind, job.source)
+                options.streaming = True
+            else:
+                source = job.source
+            job.result = self._new_downloader().download_multiple_videos(
+                source, options
+            )
+        except Exception as e:
+            logger.exception("Le travail %s a échoué", job.id)
+            job.error = f"{type(root_cause(e)).__name__}: {e}"
+            job.status = JobStatus.FAILED
+        else:
+            job.status = JobStatus.DONE if job.result.ok else JobStatus.FAILED
+            logger.info(
+                "Travail %s terminé : %d réussi(s), %d échec(s)",
+                job.id,
+                len(job.result.succeeded),
+                len(job.result.failed),
+            )
+        finally:
+            job.finished_at = time.time()
+
+
+def _handler(service: DownloadService) -> type[BaseHTTPRequestHandler]:
+    """Return the request handler class of the API of ``service``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: Any) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/health":
+                self._reply(200, service.health())
+            elif path == "/jobs":
+                self._reply(200, [job.to_dict() for job in service.jobs()])
+            elif path.startswith("/jobs/"):
+                job = service.get(path[len("/jobs/"):])
+                if job is None:
+                    self._reply(404, {"error": "Travail inconnu"})
+                else:
+                    self._reply(200, job.to_dict())
+            else:
+                self._reply(404, {"error": "Ressource inconnue"})
+
+        def do_POST(self) -> None:
+            if self.path.split("?", 1)[0].rstrip("/") != "/jobs":
+                self._reply(404, {"error": "Ressource inconnue"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", ""))
+            except ValueError:
+                self._reply(411, {"error": "Content-Length requis"})
+                return
+            if length > MAX_BODY:
+                self.close_connection = True
+                self._reply(413, {"error": "Requête trop volumineuse"})
+                return
+            try:
+                job = service.submit(json.loads(self.rfile.read(length)))
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError too.
+                self._reply(400, {"error": str(e)})
+                return
+            except RuntimeError:
+                # The executor refuses jobs once the service is closing.
+                self._reply(503, {"error": "Service en cours d'arrêt"})
+                return
+            self._reply(202, job.to_dict())
+
+        def log_message(self, format: str, *args: object) -> None:
+            logger.debug("serve: " + format, *args)
+
+    return Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self) -> tuple[Any, Any]:
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address.
+        return request, ("unix", 0)
+
+
+def serve_http(
+    service: DownloadService, port: int = DEFAULT_PORT, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Return a server for the API of ``service`` on ``http://host:port``.
+
+    Call ``serve_forever()`` on it to handle requests.
+
+    Raises:
+        OSError: If the address cannot be bound.
+    """
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    server.daemon_threads = True
+    logger.info("Service disponible sur http://%s:%d", host, server.server_port)
+    return server
+
+
+def serve_unix(service: DownloadService, path: Path) -> socketserver.BaseServer:
+    """Return a server for the API of ``service`` on the Unix socket ``path``.
+
+    A stale socket file is replaced. The socket is only accessible to its
+    owner. Call ``serve_forever()`` on the server to handle requests.
+
+    Raises:
+        OSError: If the socket cannot be created.
+    """
+    path = Path(path).expanduser()
+    if path.is_socket():
+        path.unlink()
+    server = _UnixHTTPServer(str(path), _handler(service))
+    os.chmod(path, 0o600)
+    logger.info("Service disponible sur le socket %s", path)
+    return server
+
+
+__all__ = [
+    "DownloadService",
+    "Job",
+    "JobProgress",
+    "JobStatus",
+    "OPTION_FIELDS",
+    "DEFAULT_PORT",
+    "serve_http",
+    "serve_unix",
+]
@@ -0,0 +1,280 @@
+"""Very large batches split into deterministic shards run by worker processes."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+from .config import DownloadOptions, _metadata_cache_from_env
+from .downloader import YoutubeDownloader
+from .jobs import JobQueue
+from .metrics import Metrics
+from .progress import NullProgressHandler
+from .result import BatchResult, ItemRecord
+from .selection import SelectionPolicy
+from .urlfile import iter_url_file
+from .utils import shorten_url
+
+logger = logging.getLogger(__name__)
+
+
+def shard_index(video_url: str, shards: int) -> int:
+    """Return the shard, between ``0`` and ``shards - 1``, of ``video_url``.
+
+    The shard depends only on the video ID, so a video always lands in the
+    same shard across runs and URL spellings. A stable digest is used:
+    :func:`hash` is salted per process.
+    """
+    video_id = shorten_url(video_url)
+    key = video_url.strip() if video_id == "<url>" else video_id
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def split_shards(video_urls: Iterable[str], shards: int) -> list[list[str]]:
+    """Distribute ``video_urls`` over ``shards`` lists, keeping their order.
+
+    Raises:
+        ValueError: If ``shards`` is less than 1.
+    """
+    if shards < 1:
+        raise ValueError("shards must be >= 1")
+    groups: list[list[str]] = [[] for _ in range(shards)]
+    for video_url in video_urls:
+        groups[shard_index(video_url, shards)].append(video_url)
+    return groups
+
+
+def read_url_file(path: Path) -> list[str]:
+    """Return the valid YouTube URLs of ``path``, one per line.
+
+    ``path`` may be gzip-compressed or ``"-"`` for standard input. Blank
+    lines and ``#`` comments are ignored, invalid URLs are logged and
+    skipped, and repeated videos are kept once: see
+    :func:`~program_youtube_downloader.urlfile.iter_url_file`.
+
+    Raises:
+        OSError: If ``path`` cannot be read.
+    """
+    return list(iter_url_file(path))
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Picklable description of the work of one worker process.
+
+    Other :class:`DownloadOptions` fields are read from the environment by
+    each process, as in a single process run, except the job queue: each
+    shard records its URLs in ``job_queue``, a database of its own.
+    """
+
+    index: int
+    urls: tuple[str, ...]
+    save_path: Path
+    download_sound_only: bool = False
+    selection: SelectionPolicy | None = None
+    job_queue: Path | None = None
+
+
+def shard_path(path: Path, index: int) -> Path:
+    """Return the file of shard ``index`` derived from ``path``.
+
+    Processes sharing one file would overwrite or lock each other's
+    entries; since shards are stable, each shard finds its videos again in
+    its file, e.g. ``jobs.2.db`` for ``jobs.db``.
+    """
+    return path.with_name(f"{path.stem}.{index}{path.suffix}")
+
+
+def _check_shard_count(job_queue: Path, shards: int) -> None:
+    """Record ``shards`` in ``job_queue`` or check that it was recorded.
+
+    Videos are spread over the per-shard queues by their ID modulo the
+    number of shards: with another number a restarted batch would look its
+    videos up in the wrong queues and download them all again.
+
+    Raises:
+        ValueError: If the queues were split into another number of shards.
+    """
+    queue = JobQueue(job_queue)
+    try:
+        recorded = queue.setting("shards")
+        if recorded is None:
+            queue.set_setting("shards", str(shards))
+        elif int(recorded) != shards:
+            raise ValueError(
+                f"Les files de {job_queue} sont réparties sur {recorded} "
+                f"processus : relancez le lot avec {recorded} processus"
+            )
+    finally:
+        queue.close()
+
+
+def _record_metrics(metrics: Metrics, result: BatchResult) -> None:
+    """Add the items of a finished shard to ``metrics``.
+
+    Only what :class:`ItemRecord` keeps is available in the parent process:
+    results, bytes and durations, not gauges, lookups or retry causes.
+    """
+    for item in result.items:
+        metrics.downloads.inc("succeeded" if item.ok else "failed")
+        if item.ok and item.bytes:
+            metrics.bytes_downloaded.inc(amount=item.bytes)
+        if item.resolve_time is not None:
+            metrics.resolve_seconds.observe(item.resolve_time)
+        if item.download_time is not None:
+            metrics.download_seconds.observe(item.download_time)
+    metrics.flush()
+
+
+def run_shard(shard: Shard) -> BatchResult:
+    """Download the videos of ``shard`` and return their outcome.
+
+    Runs in a worker process with its own :class:`YoutubeDownloader` and
+    download threads. The batch is never interactive: the best stream is
+    selected unless ``shard.selection`` says otherwise.
+    """
+    options = DownloadOptions(
+        save_path=shard.save_path,
+        download_sound_only=shard.download_sound_only,
+        progress_handler=NullProgressHandler(),
+        # Processes sharing one cache file would overwrite each other's.
+        metadata_cache=_metadata_cache_from_env(
+            lambda path: shard_path(path, shard.index)
+        ),
+        job_queue=JobQueue(shard.job_queue) if shard.job_queue else None,
+        interactive=False,
+    )
+    options.selection = shard.selection or options.selection or SelectionPolicy()
+    # The parent process writes the merged records, see run_sharded.
+    options.results_file = None
+    logger.info("Lot %d : %d vidéo(s)", shard.index, len(shard.urls))
+    try:
+        return YoutubeDownloader().download_multiple_videos(shard.urls, options)
+    finally:
+        if options.job_queue is not None:
+            options.job_queue.close()
+
+
+def run_sharded(
+    video_urls: Sequence[str],
+    workers: int,
+    save_path: Path,
+    *,
+    download_sound_only: bool = False,
+    selection: SelectionPolicy | None = None,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple[Any, ...] = (),
+    results_file: Path | None = None,
+    job_queue: Path | None = None,
+    metrics: Metrics | None = None,
+    runner: Callable[[Shard], BatchResult] = run_shard,
+) -> BatchResult:
+    """Split ``video_urls`` into ``workers`` shards and download them in parallel.
+
+    Each shard runs in its own process (see :func:`run_shard`) so that the
+    CPU spent parsing YouTube pages is spread over several interpreters.
+    With ``PYDL_ARCHIVE`` set, a restarted batch skips what was completed,
+    since every video goes back to the same shard.
+
+    Args:
+        video_urls: URLs to download.
+        workers: Number of worker processes, and of shards.
+        save_path: Destination directory.
+        download_sound_only: Download the audio tracks only.
+        selection: Stream selection policy; the best stream by default.
+        initializer: Function called in each worker process at start-up,
+            typically to configure logging, with ``initargs``.
+        results_file: JSON Lines file to which the per-URL records of every
+            shard are appended, as ``DownloadOptions.results_file``.
+        job_queue: Job queue database; each shard uses its own file next to
+            it, see :func:`shard_path`. ``job_queue`` itself records the
+            number of shards, which a restarted batch must keep.
+        metrics: Registry updated with the items of each shard as it
+            finishes.
+        runner: Module level function processing one shard in a worker.
+
+    Returns:
+        The results of every shard merged into one. The videos of a shard
+        whose process died are counted as failed.
+
+    Raises:
+        ValueError: If ``workers`` is less than 1, or differs from the
+            number of shards of ``job_queue``.
+    """
+    groups = split_shards(video_urls, workers)
+    shards = [
+        Shard(
+            index,
+            tuple(urls),
+            save_path,
+            download_sound_only,
+            selection,
+            shard_path(job_queue, index) if job_queue else None,
+        )
+        for index, urls in enumerate(groups)
+        if urls
+    ]
+    if not shards:
+        logger.error("Il n'y a aucune vidéo à télécharger")
+        return BatchResult()
+    if job_queue is not None:
+        _check_shard_count(job_queue, workers)
+
+    # Deferred: worker processes cost an import most commands never use.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    results: list[BatchResult] = []
+    with ProcessPoolExecutor(
+        max_workers=len(shards),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        futures = [(shard, pool.submit(runner, shard)) for shard in shards]
+        for shard, future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.exception("Le lot %d a échoué", shard.index)
+                result = BatchResult(
+                    failed=list(shard.urls),
+                    items=[
+                        ItemRecord(url, shorten_url(url), error=type(e).__name__)
+                        for url in shard.urls
+                    ],
+                )
+            logger.info(
+                "Lot %d terminé : %d réussi(s), %d échec(s), %d ignoré(s)",
+                shard.index,
+                len(result.succeeded),
+                len(result.failed),
+                len(result.skipped),
+            )
+            results.append(result)
+            if metrics:
+                _record_metrics(metrics, result)
+    merged = BatchResult.merge(results)
+    if results_file is not None and merged.items:
+        try:
+            merged.write_jsonl(results_file)
+        except OSError as e:
+            logger.warning("Les résultats n'ont pas pu être enregistrés : %s", e)
+    if metrics:
+        metrics.flush(force=True)
+    return merged
+
+
+__all__ = [
+    "Shard",
+    "read_url_file",
+    "run_shard",
+    "run_sharded",
+    "shard_index",
+    "shard_path",
+    "split_shards",
+]
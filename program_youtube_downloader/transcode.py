@@ -0,0 +1,187 @@
+"""Audio extraction: downloaded audio streams transcoded by ffmpeg."""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .adaptive import DEFAULT_FFMPEG
+from .exceptions import TranscodeError
+
+if TYPE_CHECKING:  # pragma: no cover - imported by the first job
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+COPY = "copy"
+DEFAULT_AUDIO_CODEC = "mp3"
+DEFAULT_AUDIO_BITRATE = "192k"
+
+# Codec name -> (file extension, ffmpeg encoder).
+AUDIO_CODECS: dict[str, tuple[str, str]] = {
+    "mp3": ("mp3", "libmp3lame"),
+    "aac": ("m4a", "aac"),
+    "opus": ("opus", "libopus"),
+    "vorbis": ("ogg", "libvorbis"),
+    "flac": ("flac", "flac"),
+}
+
+# Lossless encoders ignore the requested bitrate.
+_LOSSLESS = {"flac"}
+
+
+def container_extension(stream: Any, path: Path) -> str:
+    """Return the extension matching the container of audio ``stream``.
+
+    ``pytubefix`` names every audio-only stream ``.m4a``, including WebM
+    (Opus) ones, so the MIME type is trusted first. The current suffix of
+    ``path`` is kept when the stream does not describe its container.
+    """
+    mime_type = getattr(stream, "mime_type", None) or ""
+    container = mime_type.partition("/")[2]
+    if container in {"mp4", "m4a"}:
+        return "m4a"
+    if container:
+        return container
+    return path.suffix.lstrip(".")
+
+
+def unique_path(path: Path) -> Path:
+    """Return ``path`` or, if it exists, ``name_1.ext``, ``name_2.ext``..."""
+    candidate = path
+    counter = 0
+    while candidate.exists():
+        counter += 1
+        candidate = path.with_name(f"{path.stem}_{counter}{path.suffix}")
+    return candidate
+
+
+def copy_container(source: Path, extension: str) -> Path:
+    """Give ``source`` the extension of its container without re-encoding.
+
+    This is the fast path of audio extraction: the downloaded stream already
+    holds audio only, so a rename is all it takes.
+    """
+    if not extension or source.suffix == f".{extension}":
+        return source
+    target = unique_path(source.with_suffix(f".{extension}"))
+    source.rename(target)
+    return target
+
+
+def transcode_audio(
+    source: Path,
+    codec: str = DEFAULT_AUDIO_CODEC,
+    bitrate: str | None = DEFAULT_AUDIO_BITRATE,
+    ffmpeg: str = DEFAULT_FFMPEG,
+) -> Path:
+    """Encode the audio of ``source`` with ``codec`` and remove ``source``.
+
+    The output is written next to ``source`` with the extension of
+    ``codec``; an existing file is never overwritten.
+
+    Raises:
+        TranscodeError: If ffmpeg exits with an error. ``source`` is kept.
+        ValueError: If ``codec`` is unknown.
+        OSError: If ffmpeg cannot be started.
+    """
+    if codec not in AUDIO_CODECS:
+        raise ValueError(f"Unknown audio codec: {codec!r}")
+    extension, encoder = AUDIO_CODECS[codec]
+    target = unique_path(source.with_suffix(f".{extension}"))
+    command = [
+        ffmpeg,
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        str(source),
+        "-vn",
+        "-map",
+        "0:a:0",
+        "-c:a",
+        encoder,
+    ]
+    if bitrate and codec not in _LOSSLESS:
+        command += ["-b:a", bitrate]
+    command.append(str(target))
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        target.unlink(missing_ok=True)
+        raise TranscodeError(
+            f"ffmpeg a échoué ({completed.returncode}) : {completed.stderr.strip()}"
+        )
+    source.unlink()
+    return target
+
+
+class AudioTranscoder:
+    """Bounded pool of ffmpeg jobs shared by the download workers of a batch.
+
+    Jobs run in worker processes so that encoding proceeds while the
+    download threads fetch the next streams. The pool is started on the
+    first submission; several download threads may submit at once.
+    """
+
+    def __init__(
+        self,
+        codec: str = DEFAULT_AUDIO_CODEC,
+        bitrate: str | None = DEFAULT_AUDIO_BITRATE,
+        ffmpeg: str = DEFAULT_FFMPEG,
+        workers: int = 1,
+    ) -> None:
+        if codec not in AUDIO_CODECS:
+            raise ValueError(f"Unknown audio codec: {codec!r}")
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.codec = codec
+        self.bitrate = bitrate
+        self.ffmpeg = ffmpeg
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        # Serialises the creation of the pool by concurrent submissions.
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Deferred: only audio batches need worker processes.
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Download threads are running: fork would copy their locks.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submit(self, source: Path) -> Future[Path]:
+        """Schedule the transcoding of ``source`` and return its future."""
+        return self._pool().submit(
+            transcode_audio, source, self.codec, self.bitrate, self.ffmpeg
+        )
+
+    def close(self) -> None:
+        """Wait for the pending jobs and stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+__all__ = [
+    "AudioTranscoder",
+    "AUDIO_CODECS",
+    "COPY",
+    "DEFAULT_AUDIO_BITRATE",
+    "DEFAULT_AUDIO_CODEC",
+    "container_extension",
+    "copy_container",
+    "transcode_audio",
+    "unique_path",
+]
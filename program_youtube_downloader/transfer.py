@@ -0,0 +1,358 @@
+"""Resumable and segmented HTTP transfers based on ``Range`` requests."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable
+from urllib.error import HTTPError
+
+from .exceptions import DownloadError
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_TIMEOUT = 30.0
+# Number of bytes written between two updates of the sidecar file.
+STATE_INTERVAL = 4 * 1024 * 1024
+# Smallest byte range worth its own connection in a segmented download.
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+
+def part_paths(destination: Path) -> tuple[Path, Path]:
+    """Return the ``.part`` file and its sidecar for ``destination``."""
+    return (
+        destination.with_name(destination.name + PART_SUFFIX),
+        destination.with_name(destination.name + STATE_SUFFIX),
+    )
+
+
+def _read_offset(part: Path, state: Path, total_size: int | None) -> int:
+    """Return the offset a previous transfer reached, or ``0``."""
+    if not part.exists():
+        return 0
+    try:
+        data = json.loads(state.read_text(encoding="utf-8"))
+        offset = int(data["offset"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+    if data.get("total") != total_size:
+        # The part file belongs to another version of the stream.
+        return 0
+    return min(offset, part.stat().st_size)
+
+
+def _write_json(state: Path, data: dict[str, Any]) -> None:
+    tmp = state.with_name(state.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, state)
+
+
+def _write_state(state: Path, offset: int, total_size: int | None) -> None:
+    _write_json(state, {"offset": offset, "total": total_size})
+
+
+def _read_done_ranges(part: Path, state: Path, total_size: int) -> list[tuple[int, int]]:
+    """Return the byte ranges a previous segmented transfer completed."""
+    if not part.exists() or part.stat().st_size != total_size:
+        return []
+    try:
+        data = json.loads(state.read_text(encoding="utf-8"))
+        if data.get("total") != total_size:
+            return []
+        done = [(int(start), int(end)) for start, end in data["done"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+    if not all(0 <= start <= end < total_size for start, end in done):
+        return []
+    return done
+
+
+def _missing_ranges(
+    total_size: int, done: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """Return the inclusive byte ranges of ``total_size`` not in ``done``."""
+    missing = []
+    position = 0
+    for start, end in sorted(done):
+        if start > position:
+            missing.append((position, start - 1))
+        position = max(position, end + 1)
+    if position < total_size:
+        missing.append((position, total_size - 1))
+    return missing
+
+
+def _range_size(content_range: str | None) -> int | None:
+    """Return the size given by a ``Content-Range: bytes */<size>`` header."""
+    if not content_range:
+        return None
+    _, _, size = content_range.rpartition("/")
+    return int(size) if size.isdigit() else None
+
+
+def _finalize(part: Path, state: Path, destination: Path) -> Path:
+    os.replace(part, destination)
+    state.unlink(missing_ok=True)
+    return destination
+
+
+def download_resumable(
+    url: str,
+    destination: Path,
+    total_size: int | None = None,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_chunk: Callable[[bytes, int], None] | None = None,
+) -> Path:
+    """Download ``url`` to ``destination``, resuming an interrupted transfer.
+
+    Data is written to ``<destination>.part`` while a small JSON sidecar
+    records how many bytes are safely on disk. When both files are present
+    the transfer continues from that offset with a ``Range`` request; if the
+    server ignores the range the file is restarted from zero. A range the
+    server cannot satisfy (416) finalizes a part file already holding the
+    whole media and restarts any other from zero.
+
+    Args:
+        url: Address of the media.
+        destination: Final path of the file.
+        total_size: Expected size in bytes, used to validate the part file
+            and the completed transfer. ``None`` if unknown.
+        chunk_size: Number of bytes read per iteration.
+        timeout: Socket timeout in seconds.
+        on_chunk: Callback receiving each chunk and the number of bytes
+            downloaded so far.
+
+    Returns:
+        ``destination`` once the transfer is complete.
+
+    Raises:
+        DownloadError: If the transfer ends before ``total_size`` bytes.
+        urllib.error.URLError: On network errors.
+        OSError: On local I/O errors.
+    """
+    if total_size and destination.exists() and destination.stat().st_size == total_size:
+        return destination
+
+    part, state = part_paths(destination)
+    offset = _read_offset(part, state, total_size)
+    import urllib.request  # deferred: slow to import, unused by most commands
+
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+        logger.debug("Reprise du téléchargement à l'octet %d", offset)
+
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except HTTPError as e:
+        if e.code != 416 or not offset:
+            raise
+        size = total_size if total_size is not None else _range_size(
+            e.headers.get("Content-Range")
+        )
+        if offset == size:
+            return _finalize(part, state, destination)
+        logger.debug("Fichier partiel invalide, reprise depuis le début")
+        part.unlink(missing_ok=True)
+        state.unlink(missing_ok=True)
+        return download_resumable(
+            url,
+            destination,
+            total_size,
+            chunk_size=chunk_size,
+            timeout=timeout,
+            on_chunk=on_chunk,
+        )
+
+    with response:
+        if offset and response.status != 206:
+            offset = 0
+        with part.open("r+b" if offset else "wb") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            saved = offset
+            try:
+                while True:
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    offset += len(chunk)
+                    if on_chunk:
+                        on_chunk(chunk, offset)
+                    if offset - saved >= STATE_INTERVAL:
+                        f.flush()
+                        _write_state(state, offset, total_size)
+                        saved = offset
+            finally:
+                f.flush()
+                _write_state(state, offset, total_size)
+
+    if total_size is not None and offset != total_size:
+        raise DownloadError(f"Transfert incomplet : {offset}/{total_size} octets")
+    return _finalize(part, state, destination)
+
+
+def split_ranges(total_size: int, segments: int) -> list[tuple[int, int]]:
+    """Split ``total_size`` bytes into at most ``segments`` inclusive ranges.
+
+    Each range spans at least :data:`MIN_SEGMENT_SIZE` bytes, except when the
+    whole file is smaller than that.
+    """
+    count = max(1, min(segments, total_size // MIN_SEGMENT_SIZE))
+    step, extra = divmod(total_size, count)
+    ranges = []
+    start = 0
+    for index in range(count):
+        end = start + step + (1 if index < extra else 0)
+        ranges.append((start, end - 1))
+        start = end
+    return ranges
+
+
+def _fetch_range(
+    url: str,
+    part: Path,
+    start: int,
+    end: int,
+    chunk_size: int,
+    timeout: float,
+    on_chunk: Callable[[bytes], None],
+    stop: threading.Event,
+) -> None:
+    """Write bytes ``start``-``end`` of ``url`` at the same offset of ``part``.
+
+    The transfer is abandoned, as incomplete, once ``stop`` is set.
+    """
+    import urllib.request
+
+    request = urllib.request.Request(url, headers={"Range": f"bytes={start}-{end}"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        if response.status != 206:
+            raise DownloadError("Le serveur ne prend pas en charge les requêtes Range")
+        with part.open("r+b") as f:
+            f.seek(start)
+            position = start
+            while position <= end and not stop.is_set():
+                chunk = response.read(min(chunk_size, end + 1 - position))
+                if not chunk:
+                    break
+                f.write(chunk)
+                position += len(chunk)
+                on_chunk(chunk)
+    if position != end + 1:
+        raise DownloadError(
+            f"Segment incomplet : {position - start}/{end + 1 - start} octets"
+        )
+
+
+def download_segmented(
+    url: str,
+    destination: Path,
+    total_size: int,
+    segments: int,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_chunk: Callable[[bytes, int], None] | None = None,
+) -> Path:
+    """Download ``url`` over several connections, one per byte range.
+
+    The ``.part`` file is preallocated to ``total_size`` and every segment
+    writes its bytes in place through its own file handle, so no reassembly
+    copy is needed. The final size is checked before the file is renamed to
+    ``destination``.
+
+    The sidecar file records the ranges completed: when a segment fails the
+    others are stopped, and the next call only fetches the missing ranges.
+
+    Args:
+        url: Address of the media.
+        destination: Final path of the file.
+        total_size: Size of the media in bytes.
+        segments: Maximum number of concurrent connections.
+        chunk_size: Number of bytes read per iteration by each connection.
+        timeout: Socket timeout in seconds.
+        on_chunk: Callback receiving each chunk and the total number of
+            bytes downloaded so far across all segments.
+
+    Raises:
+        DownloadError: If a segment or the whole file is incomplete, or the
+            server ignores ``Range`` requests.
+    """
+    part, state = part_paths(destination)
+    done = _read_done_ranges(part, state, total_size)
+    if done:
+        logger.debug("Reprise du téléchargement segmenté : %d plage(s) faite(s)", len(done))
+    else:
+        with part.open("wb") as f:
+            f.truncate(total_size)
+    ranges = [
+        (offset + start, offset + end)
+        for offset, last in _missing_ranges(total_size, done)
+        for start, end in split_ranges(last + 1 - offset, segments)
+    ]
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    downloaded = sum(end + 1 - start for start, end in done)
+
+    def count(chunk: bytes) -> None:
+        nonlocal downloaded
+        with lock:
+            downloaded += len(chunk)
+            total = downloaded
+        # Called outside the lock: the callback may sleep to throttle.
+        if on_chunk:
+            on_chunk(chunk, total)
+
+    def fetch(start: int, end: int) -> None:
+        _fetch_range(url, part, start, end, chunk_size, timeout, count, stop)
+        with lock:
+            done.append((start, end))
+            _write_json(state, {"total": total_size, "done": done})
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(segments, len(ranges))),
+            thread_name_prefix="pydl-segment",
+        ) as pool:
+            futures = [pool.submit(fetch, start, end) for start, end in ranges]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                # Stop the other segments rather than wait for their end.
+                stop.set()
+                pool.shutdown(cancel_futures=True)
+                raise
+        if part.stat().st_size != total_size or downloaded != total_size:
+            done.clear()
+            raise DownloadError(
+                f"Transfert incomplet : {downloaded}/{total_size} octets"
+            )
+    except BaseException:
+        if not done:
+            part.unlink(missing_ok=True)
+            state.unlink(missing_ok=True)
+        raise
+    return _finalize(part, state, destination)
+
+
+__all__ = [
+    "download_resumable",
+    "download_segmented",
+    "split_ranges",
+    "part_paths",
+    "PART_SUFFIX",
+    "STATE_SUFFIX",
+]
@@ -0,0 +1,150 @@
+"""Streaming reader of URL list files.
+
+:func:`iter_url_file` reads a file, or standard input, one line at a time and
+yields its valid YouTube URLs as soon as they are read, so that a batch fed
+with ``DownloadOptions.streaming`` starts downloading before the end of a
+multi-million line export has been read. Memory use is bounded by the set of
+video IDs already seen, which :class:`VideoIdSet` stores compactly.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import gzip
+import io
+import logging
+import sys
+from pathlib import Path
+from typing import IO, Iterator
+
+from .exceptions import InvalidURLError
+from .validators import extract_video_id
+
+logger = logging.getLogger(__name__)
+
+# Name of standard input as a URL source, as in most command line tools.
+STDIN = "-"
+COMMENT_PREFIX = "#"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class VideoIdSet:
+    """Set of YouTube video IDs using about half the memory of a ``set[str]``.
+
+    An 11 character ID is 66 bits of URL-safe base64: it is stored as the
+    equivalent integer rather than as a string. Other keys are kept as they
+    are.
+    """
+
+    def __init__(self) -> None:
+        self._keys: set[int | str] = set()
+
+    @staticmethod
+    def _key(video_id: str) -> int | str:
+        if len(video_id) == 11:
+            try:
+                # One padding digit makes 12 digits, i.e. 9 whole bytes.
+                raw = base64.urlsafe_b64decode(video_id + "A=")
+            except (binascii.Error, ValueError):
+                return video_id
+            return int.from_bytes(raw, "big")
+        return video_id
+
+    def add(self, video_id: str) -> bool:
+        """Add ``video_id`` and return ``False`` if it was already present."""
+        key = self._key(video_id)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, video_id: object) -> bool:
+        return isinstance(video_id, str) and self._key(video_id) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def _is_gzip(stream: IO[bytes]) -> bool:
+    peek = getattr(stream, "peek", None)
+    head = peek(len(_GZIP_MAGIC)) if peek else b""
+    return head[: len(_GZIP_MAGIC)] == _GZIP_MAGIC
+
+
+def open_url_source(source: str | Path) -> IO[str]:
+    """Open ``source`` for reading as text, decompressing gzip data.
+
+    ``source`` is a path, or ``"-"`` for standard input. Compression is
+    detected from the content, not from the file name, so that piped
+    ``.gz`` exports are accepted too. Undecodable bytes are replaced: the
+    line holding them is then reported as an invalid URL.
+
+    Raises:
+        OSError: If ``source`` cannot be opened.
+    """
+    if str(source) == STDIN:
+        binary: IO[bytes] | gzip.GzipFile = sys.stdin.buffer
+        if _is_gzip(sys.stdin.buffer):
+            # Closing the GzipFile leaves standard input open.
+            binary = gzip.GzipFile(fileobj=sys.stdin.buffer)
+    else:
+        path = Path(source).expanduser()
+        binary = path.open("rb")
+        if _is_gzip(binary):
+            binary.close()
+            binary = gzip.open(path, "rb")
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", errors="replace")
+
+
+def _read_urls(stream: IO[str], dedupe: bool, close: bool) -> Iterator[str]:
+    seen = VideoIdSet()
+    duplicates = invalid = 0
+    try:
+        for line_number, line in enumerate(stream, 1):
+            video_url = line.strip()
+            if not video_url or video_url.startswith(COMMENT_PREFIX):
+                continue
+            try:
+                video_id = extract_video_id(video_url)
+            except InvalidURLError:
+                logger.error("URL invalide à la ligne %d : %s", line_number, video_url)
+                invalid += 1
+                continue
+            if dedupe and not seen.add(video_id):
+                duplicates += 1
+                continue
+            yield video_url
+    except (OSError, EOFError) as e:
+        # A truncated gzip file or a read error: keep what was read so far.
+        logger.error("Lecture de la liste des URL interrompue : %s", e)
+    finally:
+        if close:
+            stream.close()
+        else:
+            stream.detach()  # type: ignore[attr-defined]
+    if duplicates or invalid:
+        logger.info(
+            "%d doublon(s) et %d URL invalide(s) ignorés", duplicates, invalid
+        )
+
+
+def iter_url_file(source: str | Path, *, dedupe: bool = True) -> Iterator[str]:
+    """Return an iterator over the valid YouTube URLs of ``source``.
+
+    ``source`` is a text file, optionally gzip-compressed, with one URL per
+    line, or ``"-"`` for standard input. Blank lines and lines starting with
+    ``#`` are skipped; invalid URLs are logged with their line number and
+    skipped. With ``dedupe`` only the first URL of each video ID is yielded.
+
+    The file is opened immediately, so that an unreadable source fails
+    here, and then read lazily as the iterator is consumed.
+
+    Raises:
+        OSError: If ``source`` cannot be opened.
+    """
+    stream = open_url_source(source)
+    return _read_urls(stream, dedupe, close=str(source) != STDIN)
+
+
+__all__ = ["iter_url_file", "open_url_source", "VideoIdSet", "STDIN"]
@@ -2,13 +2,25 @@
 
 from __future__ import annotations
 
+import functools
 import os
 import subprocess
+import sys
 import time
 import logging
 from urllib.parse import urlparse, parse_qs
 
-__all__ = ["clear_screen", "program_break_time", "shorten_url", "log_blank_line"]
+from .exceptions import InvalidURLError
+from .validators import extract_video_id
+
+__all__ = [
+    "clear_screen",
+    "program_break_time",
+    "shorten_url",
+    "log_blank_line",
+    "root_cause",
+    "loaded_errors",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -49,13 +61,25 @@ def program_break_time(memorization_time: int, message: str) -> None:
         remaining_seconds -= 1
 
 
+@functools.lru_cache(maxsize=4096)
 def shorten_url(url: str) -> str:
-    """Return video ID from ``url`` for safer logging."""
+    """Return video ID from ``url`` for safer logging.
+
+    Valid links take the fast path of
+    :func:`~program_youtube_downloader.validators.extract_video_id`; results
+    are cached because the same URL is looked up at every stage of a batch.
+    """
+    try:
+        return extract_video_id(url)
+    except InvalidURLError:
+        pass
     try:
         parsed = urlparse(url.strip())
         host = parsed.netloc.lower()
         if host in {"youtu.be", "www.youtu.be"}:
             vid = parsed.path.strip("/").split("/", 1)[0]
+        elif parsed.path.startswith("/shorts/"):
+            vid = parsed.path.split("/")[2]
         else:
             vid = parse_qs(parsed.query).get("v", [""])[0]
         if vid:
@@ -63,3 +87,28 @@ def shorten_url(url: str) -> str:
     except Exception:  # pragma: no cover - defensive
         logger.debug("Failed to shorten url", exc_info=True)
     return "<url>"
+
+
+def root_cause(error: BaseException) -> BaseException:
+    """Return the innermost exception of the ``__cause__`` chain of ``error``."""
+    while error.__cause__ is not None:
+        error = error.__cause__
+    return error
+
+
+def loaded_errors(*names: str) -> tuple[type[BaseException], ...]:
+    """Return the exception classes ``names`` of modules already imported.
+
+    Each name is a dotted path such as ``"pytube.exceptions.PytubeError"``.
+    An exception defined by a module never imported cannot have been raised,
+    so ``except loaded_errors(...)`` handles third-party errors without
+    importing their package up front. Unknown names are left out.
+    """
+    classes = []
+    for name in names:
+        module_name, _, class_name = name.rpartition(".")
+        module = sys.modules.get(module_name)
+        cls = getattr(module, class_name, None)
+        if isinstance(cls, type) and issubclass(cls, BaseException):
+            classes.append(cls)
+    return tuple(classes)
@@ -1,25 +1,59 @@
 """Input validation helpers."""
 
+from typing import Iterable
 from urllib.parse import urlparse, parse_qs
 import re
 
 from .exceptions import InvalidURLError
 
+VIDEO_ID_LENGTH = 11
+_VIDEO_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+# Query parameters accepted in a video link.
+_ALLOWED_PARAMS = {"v", "list", "t"}
+# Remainders of the common link forms the fast path accepts: further
+# parameters of a ``watch?v=`` link, or an optional slash and query string
+# after the ID of a ``youtu.be/`` or ``shorts/`` link. Anything else, such as
+# encoded characters or a fragment, goes through the full parser.
+_PARAM = r"(?:v|t|list)=[A-Za-z0-9_.-]*"
+_WATCH_TAIL = re.compile(rf"(?:&{_PARAM})*")
+_PATH_TAIL = re.compile(rf"/?(?:\?{_PARAM}(?:&{_PARAM})*)?")
+
+
+def _scan_video_id(url: str) -> str | None:
+    """Return the ID of a link in one of the common forms, or ``None``.
+
+    Hand-written scanner for ``watch?v=``, ``youtu.be/`` and ``shorts/``
+    links in lower case; ``None`` means the link needs the full parser, not
+    that it is invalid.
+    """
+    if url.startswith("https://"):
+        rest = url[8:]
+    elif url.startswith("http://"):
+        rest = url[7:]
+    else:
+        return None
+    if rest.startswith("youtu.be/"):
+        start, tail = 9, _PATH_TAIL
+    else:
+        if rest.startswith("www."):
+            rest = rest[4:]
+        if not rest.startswith("youtube.com/"):
+            return None
+        if rest.startswith("watch?v=", 12):
+            start, tail = 20, _WATCH_TAIL
+        elif rest.startswith("shorts/", 12):
+            start, tail = 19, _PATH_TAIL
+        else:
+            return None
+    end = start + VIDEO_ID_LENGTH
+    video_id = rest[start:end]
+    if _VIDEO_ID.fullmatch(video_id) and tail.fullmatch(rest, end):
+        return video_id
+    return None
 
 
-def validate_youtube_url(url: str) -> bool:
-    """Check whether ``url`` points to a YouTube video.
-
-    The link must use HTTP(S), come from ``youtube.com``/``www.youtube.com`` or
-    ``youtu.be`` and either contain a ``v=`` parameter or use the short
-    ``youtu.be/<id>`` form. A ``list`` query parameter is also accepted when
-    present.
-
-    Args:
-        url: URL provided by the user.
-
-    Returns:
-        ``True`` if the URL looks like a YouTube link.
+def _parse_video_id(url: str) -> str:
+    """Return the video ID of ``url`` with the full URL parser.
 
     Raises:
         InvalidURLError: If the URL does not look like a YouTube link.
@@ -38,9 +72,8 @@ def validate_youtube_url(url: str) -> bool:
         raise InvalidURLError("URL invalide")
 
     # only allow common share/query parameters
-    allowed_params = {"v", "list", "t"}
     query_params = parse_qs(parsed.query, keep_blank_values=True)
-    if any(k not in allowed_params for k in query_params):
+    if any(k not in _ALLOWED_PARAMS for k in query_params):
         raise InvalidURLError("URL invalide")
 
     video_id = ""
@@ -66,11 +99,72 @@ def validate_youtube_url(url: str) -> bool:
     if not video_id:
         raise InvalidURLError("URL invalide")
 
-    if not re.fullmatch(r"[A-Za-z0-9_-]{11}", video_id):
+    if not _VIDEO_ID.fullmatch(video_id):
         raise InvalidURLError("URL invalide")
 
+    return video_id
+
+
+def extract_video_id(url: str) -> str:
+    """Validate ``url`` and return the ID of the video it points to.
+
+    Accepts the links :func:`validate_youtube_url` accepts. The common
+    ``watch?v=``, ``youtu.be/`` and ``shorts/`` forms are recognised by a
+    scanner without parsing the URL; other links go through
+    :func:`urllib.parse.urlparse`.
+
+    Args:
+        url: URL provided by the user. Surrounding whitespace is ignored.
+
+    Returns:
+        The 11 character video ID.
+
+    Raises:
+        InvalidURLError: If the URL does not look like a YouTube link.
+    """
+    return _scan_video_id(url.strip()) or _parse_video_id(url)
+
+
+def validate_youtube_url(url: str) -> bool:
+    """Check whether ``url`` points to a YouTube video.
+
+    The link must use HTTP(S), come from ``youtube.com``/``www.youtube.com`` or
+    ``youtu.be`` and either contain a ``v=`` parameter or use the short
+    ``youtu.be/<id>`` form. A ``list`` query parameter is also accepted when
+    present.
+
+    Args:
+        url: URL provided by the user.
+
+    Returns:
+        ``True`` if the URL looks like a YouTube link.
+
+    Raises:
+        InvalidURLError: If the URL does not look like a YouTube link.
+    """
+    extract_video_id(url)
     return True
 
 
-__all__ = ["validate_youtube_url"]
+def validate_many(lines: Iterable[str]) -> list[str | None]:
+    """Return the video ID of each of ``lines``, ``None`` for invalid ones.
 
+    Batch form of :func:`extract_video_id` for large URL lists: no exception
+    is raised and the result is aligned with ``lines``.
+    """
+    scan = _scan_video_id
+    ids: list[str | None] = []
+    append = ids.append
+    for line in lines:
+        url = line.strip()
+        video_id = scan(url)
+        if video_id is None:
+            try:
+                video_id = _parse_video_id(url)
+            except InvalidURLError:
+                pass
+        append(video_id)
+    return ids
+
+
+__all__ = ["validate_youtube_url", "extract_video_id", "validate_many"]
@@ -0,0 +1,119 @@
+"""Fakes and fixtures shared by the tests running download batches.
+
+:class:`FakeVideo` follows the ``YouTubeVideo`` protocol with streams held
+in a :class:`FakeQuery`; tests subclass :class:`FakeStream` or override
+:meth:`FakeVideo.make_streams` for the behaviour they need.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader import cli_utils
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.types import YouTubeVideo
+
+
+class FakeStream:
+    """Progressive stream writing ``data`` to ``<name>.mp4``."""
+
+    itag = 18
+    resolution = "360p"
+    abr = "128kbps"
+    data = "data"
+
+    def __init__(self, video: "FakeVideo", name: str) -> None:
+        self.video = video
+        self.name = name
+        self.default_filename = f"{name}.mp4"
+        self.calls = 0
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        self.calls += 1
+        path = Path(output_path) / (filename or self.default_filename)
+        path.write_text(self.data)
+        return str(path)
+
+
+class FakeQuery(list):
+    """``StreamQuery`` over a list of fake streams.
+
+    ``filter`` checks the criteria the downloader uses against the
+    attributes a stream defines; streams lacking one are kept.
+    """
+
+    _CRITERIA = {
+        "only_audio": lambda s: s.only_audio,
+        "only_video": lambda s: not s.only_audio,
+        "adaptive": lambda s: s.is_adaptive,
+        "progressive": lambda s: s.is_progressive,
+    }
+
+    def filter(self, **criteria):
+        def keep(stream) -> bool:
+            for name, value in criteria.items():
+                try:
+                    if name == "subtype":
+                        if stream.subtype != value:
+                            return False
+                    elif name in self._CRITERIA and value:
+                        if not self._CRITERIA[name](stream):
+                            return False
+                except AttributeError:
+                    continue
+            return True
+
+        return FakeQuery(s for s in self if keep(s))
+
+    def order_by(self, attr):
+        return FakeQuery(
+            sorted(self, key=lambda s: int((getattr(s, attr) or "0").rstrip("pkbs")))
+        )
+
+    def desc(self):
+        return FakeQuery(reversed(self))
+
+    def first(self):
+        return self[0] if self else None
+
+    def get_by_itag(self, itag):
+        return next(s for s in self if s.itag == itag)
+
+
+class FakeVideo(YouTubeVideo):
+    """Video named after the last part of its URL, with one :class:`FakeStream`.
+
+    ``created`` lists the URLs of the videos created since the ``batch``
+    fixture started.
+    """
+
+    created: list[str] = []
+
+    def __init__(self, url: str) -> None:
+        FakeVideo.created.append(url)
+        self.callback = None
+        self.streams = FakeQuery(self.make_streams(url.rsplit("/", 1)[-1]))
+
+    def make_streams(self, name: str) -> list:
+        return [FakeStream(self, name)]
+
+    @property
+    def title(self):
+        return "video"
+
+    def register_on_progress_callback(self, cb) -> None:
+        self.callback = cb
+
+
+@pytest.fixture
+def quiet(monkeypatch):
+    """Skip the end-of-download message and the pause of a batch."""
+    monkeypatch.setattr(cli_utils, "print_end_download_message", lambda *a, **k: None)
+    monkeypatch.setattr(cli_utils, "pause_return_to_menu", lambda *a, **k: None)
+
+
+@pytest.fixture
+def batch(quiet, monkeypatch):
+    """Run batches without prompts, downloading the streams of each video."""
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+    FakeVideo.created = []
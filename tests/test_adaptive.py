@@ -0,0 +1,141 @@
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.adaptive import (
+    AdaptiveStream,
+    best_audio_for,
+    mux,
+    output_extension,
+)
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.exceptions import MuxError
+from tests.conftest import FakeQuery, FakeVideo
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="fake ffmpeg is a script")
+
+FAKE_FFMPEG = """#!{python}
+import sys
+args = sys.argv[1:]
+inputs = [args[i + 1] for i, a in enumerate(args) if a == "-i"]
+if "fail" in args[-1]:
+    sys.stderr.write("boom")
+    sys.exit(1)
+with open(args[-1], "wb") as out:
+    for path in inputs:
+        with open(path, "rb") as f:
+            out.write(f.read())
+"""
+
+
+@pytest.fixture
+def ffmpeg(tmp_path: Path) -> str:
+    script = tmp_path / "bin" / "ffmpeg"
+    script.parent.mkdir()
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    return str(script)
+
+
+class Stream:
+    def __init__(self, itag, subtype, resolution=None, abr=None, barrier=None) -> None:
+        self.itag = itag
+        self.subtype = subtype
+        self.resolution = resolution
+        self.abr = abr
+        self.is_adaptive = True
+        self.is_progressive = False
+        self.only_audio = resolution is None
+        self.default_filename = f"clip.{subtype}"
+        self.barrier = barrier
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        if self.barrier is not None:
+            # Both parts must be in flight at the same time to get through.
+            self.barrier.wait(timeout=5)
+        path = Path(output_path) / (filename or self.default_filename)
+        path.write_text("audio" if self.only_audio else "video")
+        return str(path)
+
+
+def test_output_extension() -> None:
+    assert output_extension("mp4", "m4a") == "mp4"
+    assert output_extension("webm", "webm") == "webm"
+    assert output_extension("mp4", "webm") == "mkv"
+
+
+def test_mux_copies_streams(ffmpeg, tmp_path: Path) -> None:
+    video, audio = tmp_path / "v.mp4", tmp_path / "a.m4a"
+    video.write_text("V")
+    audio.write_text("A")
+    out = mux(video, audio, tmp_path / "out.mp4", ffmpeg)
+    assert out.read_text() == "VA"
+
+
+def test_mux_failure(ffmpeg, tmp_path: Path) -> None:
+    (tmp_path / "v").write_text("V")
+    (tmp_path / "a").write_text("A")
+    with pytest.raises(MuxError, match="boom"):
+        mux(tmp_path / "v", tmp_path / "a", tmp_path / "fail.mp4", ffmpeg)
+
+
+def test_best_audio_prefers_video_container() -> None:
+    streams = FakeQuery([
+        Stream(251, "webm", abr="160kbps"),
+        Stream(140, "mp4", abr="128kbps"),
+        Stream(139, "mp4", abr="48kbps"),
+    ])
+    assert best_audio_for(streams, Stream(137, "mp4", "1080p")).itag == 140
+    assert best_audio_for(streams, Stream(248, "webm", "1080p")).itag == 251
+
+
+def test_adaptive_stream_filename() -> None:
+    class Source:
+        streams = FakeQuery([Stream(140, "mp4", abr="128kbps")])
+
+    pair = AdaptiveStream(Stream(137, "mp4", "1080p"), Source())
+    assert pair.itag == 137
+    assert pair.default_filename == "clip.mp4"
+
+
+def test_adaptive_batch_downloads_concurrently_and_muxes(quiet, ffmpeg, tmp_path: Path) -> None:
+    barrier = threading.Barrier(2)
+
+    class Video(FakeVideo):
+        title = "clip"
+
+        def make_streams(self, name: str) -> list:
+            streams = [
+                Stream(18, "mp4", "360p"),
+                Stream(137, "mp4", "1080p", barrier=barrier),
+                Stream(136, "mp4", "720p"),
+                Stream(140, "mp4", abr="128kbps", barrier=barrier),
+            ]
+            streams[0].is_progressive = True
+            streams[0].is_adaptive = False
+            return streams
+
+    out = tmp_path / "out"
+    out.mkdir()
+    yd = YoutubeDownloader(youtube_cls=Video)
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/a"],
+        DownloadOptions(save_path=out, adaptive=True, ffmpeg=ffmpeg),
+    )
+    assert result.ok
+    assert [p.name for p in out.iterdir()] == ["clip.mp4"]
+    assert (out / "clip.mp4").read_text() == "videoaudio"
+
+
+def test_missing_ffmpeg_falls_back_to_progressive(caplog) -> None:
+    yd = YoutubeDownloader()
+    options = DownloadOptions(adaptive=True, ffmpeg="/nonexistent/ffmpeg")
+    with caplog.at_level(logging.WARNING):
+        assert yd._use_adaptive(options) is False
+    assert "ffmpeg introuvable" in caplog.text
+    assert yd._use_adaptive(DownloadOptions(adaptive=False)) is False
@@ -239,7 +239,6 @@ def test_streams_video_success(monkeypatch):
 
     yt.streams = Chain()
     yd = YoutubeDownloader()
-    # download_sound_only parameter is ignored but kept for API compatibility
     assert yd.get_video_streams(False, yt) is result
 
 
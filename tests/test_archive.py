@@ -0,0 +1,66 @@
+import hashlib
+import json
+from pathlib import Path
+
+from program_youtube_downloader import cli_utils
+from program_youtube_downloader.archive import ArchiveEntry, DownloadArchive
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from tests.conftest import FakeVideo
+
+
+def test_entry_from_file(tmp_path: Path) -> None:
+    f = tmp_path / "a.mp4"
+    f.write_bytes(b"abc")
+    entry = ArchiveEntry.from_file("aaaaaaaaaaa", "video", 18, f)
+    assert entry.size == 3
+    assert entry.sha256 == hashlib.sha256(b"abc").hexdigest()
+
+
+def test_archive_persists_and_ignores_truncated_lines(tmp_path: Path) -> None:
+    path = tmp_path / "archive.jsonl"
+    archive = DownloadArchive(path)
+    archive.add(ArchiveEntry("aaaaaaaaaaa", "video", 18, "a.mp4", 3, "x"))
+    with path.open("a") as f:
+        f.write('{"video_id": "bbb')
+
+    reloaded = DownloadArchive(path)
+    assert reloaded.contains("aaaaaaaaaaa", "video")
+    assert not reloaded.contains("aaaaaaaaaaa", "audio")
+    assert len(reloaded) == 1
+
+
+def test_archived_videos_are_skipped(batch, tmp_path: Path) -> None:
+    archive_file = tmp_path / "archive.jsonl"
+    urls = ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+
+    yd = YoutubeDownloader(youtube_cls=FakeVideo)
+    options = DownloadOptions(save_path=tmp_path, archive=DownloadArchive(archive_file))
+    yd.download_multiple_videos(urls[:1], options)
+    assert FakeVideo.created == urls[:1]
+
+    records = [json.loads(line) for line in archive_file.read_text().splitlines()]
+    assert records[0]["video_id"] == "aaaaaaaaaaa"
+    assert records[0]["itag"] == 18
+    assert records[0]["size"] == 4
+    assert Path(records[0]["path"]) == tmp_path / "aaaaaaaaaaa.mp4"
+
+    FakeVideo.created = []
+    options = DownloadOptions(save_path=tmp_path, archive=DownloadArchive(archive_file))
+    yd.download_multiple_videos(urls, options)
+    assert FakeVideo.created == urls[1:]
+
+
+def test_fully_archived_batch_reports_success(monkeypatch, tmp_path: Path) -> None:
+    called = {}
+    monkeypatch.setattr(cli_utils, "print_end_download_message", lambda *a, **k: called.setdefault("end", True))
+    monkeypatch.setattr(cli_utils, "pause_return_to_menu", lambda *a, **k: None)
+    archive = DownloadArchive(tmp_path / "archive.jsonl")
+    archive.add(ArchiveEntry("aaaaaaaaaaa", "audio", 140, "a.mp3", 1, "x"))
+
+    FakeVideo.created = []
+    yd = YoutubeDownloader(youtube_cls=FakeVideo)
+    options = DownloadOptions(save_path=tmp_path, download_sound_only=True, archive=archive)
+    yd.download_multiple_videos(["https://youtu.be/aaaaaaaaaaa"], options)
+    assert FakeVideo.created == []
+    assert called["end"]
@@ -0,0 +1,265 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from program_youtube_downloader.async_downloader import AsyncYoutubeDownloader  # noqa: E402
+from program_youtube_downloader.cache import MetadataCache  # noqa: E402
+from program_youtube_downloader.config import DownloadOptions  # noqa: E402
+from program_youtube_downloader.jobs import JobQueue  # noqa: E402
+from program_youtube_downloader.main import main  # noqa: E402
+from program_youtube_downloader.metrics import Metrics  # noqa: E402
+from program_youtube_downloader.retry import RetryPolicy  # noqa: E402
+from tests.conftest import FakeQuery  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures("quiet")
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.files: dict[str, bytes] = {}
+        self.errors: dict[str, list[int]] = {}
+        self.barrier: threading.Barrier | None = None
+        self.requests: list[str] = []
+        self.clients: set[int] = set()
+        self.lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: Server
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            self.server.clients.add(self.client_address[1])
+            errors = self.server.errors.get(self.path)
+            status = errors.pop(0) if errors else 200
+        if self.server.barrier is not None:
+            # Every transfer of the batch must be in flight at once.
+            self.server.barrier.wait(timeout=5)
+        body = self.server.files.get(self.path, b"") if status == 200 else b""
+        self.send_response(status if self.path in self.server.files else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = Server()
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+class Stream:
+    def __init__(self, video_id: str, url: str, size: int) -> None:
+        self.itag = 18
+        self.resolution = "360p"
+        self.url = url
+        self.filesize = size
+        self.default_filename = f"{video_id}.mp4"
+
+
+def video_factory(server: Server, payloads: dict[str, bytes]):
+    for video_id, data in payloads.items():
+        server.files[f"/{video_id}"] = data
+
+    class Video:
+        def __init__(self, url: str) -> None:
+            video_id = url.rsplit("/", 1)[1]
+            self.title = video_id
+            size = len(payloads.get(video_id, b""))
+            self.streams = FakeQuery([Stream(video_id, server.url(f"/{video_id}"), size)])
+
+        def register_on_progress_callback(self, cb) -> None:
+            pass
+
+    return Video
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.events = []
+
+    def on_progress(self, event) -> None:
+        self.events.append((event.label, event.bytes_downloaded))
+
+
+def options(tmp_path: Path, **kwargs) -> DownloadOptions:
+    kwargs.setdefault("retry_policy", RetryPolicy(base_delay=0, jitter=0))
+    return DownloadOptions(save_path=tmp_path, **kwargs)
+
+
+def test_batch_runs_transfers_concurrently(server, tmp_path: Path) -> None:
+    payloads = {f"v{i}": bytes([i]) * (50_000 + i) for i in range(4)}
+    server.barrier = threading.Barrier(4)
+    recorder = Recorder()
+    yd = AsyncYoutubeDownloader(
+        progress_handler=recorder,
+        youtube_cls=video_factory(server, payloads),
+        chunk_size=4096,
+    )
+    urls = [f"https://youtu.be/{video_id}" for video_id in payloads]
+
+    result = yd.download_multiple_videos(urls, options(tmp_path, max_workers=4))
+
+    assert result.ok and sorted(result.succeeded) == sorted(urls)
+    for video_id, data in payloads.items():
+        assert (tmp_path / f"{video_id}.mp4").read_bytes() == data
+    assert ("v3.mp4", 50_003) in recorder.events
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_connections_are_reused(server, tmp_path: Path) -> None:
+    payloads = {f"v{i}": b"x" * 1000 for i in range(5)}
+    yd = AsyncYoutubeDownloader(youtube_cls=video_factory(server, payloads))
+    urls = [f"https://youtu.be/{video_id}" for video_id in payloads]
+
+    result = yd.download_multiple_videos(urls, options(tmp_path, max_workers=1))
+
+    assert result.ok
+    assert len(server.requests) == 5
+    assert len(server.clients) == 1
+
+
+def test_transient_errors_are_retried(server, tmp_path: Path) -> None:
+    yd = AsyncYoutubeDownloader(youtube_cls=video_factory(server, {"v": b"data"}))
+    server.errors["/v"] = [503, 429]
+
+    result = yd.download_multiple_videos(["https://youtu.be/v"], options(tmp_path))
+
+    assert result.ok
+    assert server.requests == ["/v"] * 3
+    assert (tmp_path / "v.mp4").read_bytes() == b"data"
+
+
+def test_fatal_errors_fail_the_video(server, tmp_path: Path) -> None:
+    yd = AsyncYoutubeDownloader(youtube_cls=video_factory(server, {"ok": b"data"}))
+
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/ok", "https://youtu.be/missing"], options(tmp_path)
+    )
+
+    assert result.succeeded == ["https://youtu.be/ok"]
+    assert result.failed == ["https://youtu.be/missing"]
+    assert server.requests.count("/missing") == 1
+    assert not (tmp_path / "missing.mp4").exists()
+    ok, missing = sorted(result.items, key=lambda item: item.url, reverse=True)
+    assert ok.ok and ok.bytes == 4 and ok.itag == 18 and ok.download_time >= 0
+    assert missing.error == "HTTPError" and missing.retries == 0
+
+
+def test_streamed_source_is_consumed_lazily(server, tmp_path: Path) -> None:
+    payloads = {f"v{i}": b"x" for i in range(3)}
+    pulled = []
+
+    def source():
+        for video_id in payloads:
+            pulled.append(video_id)
+            yield f"https://youtu.be/{video_id}"
+
+    yd = AsyncYoutubeDownloader(youtube_cls=video_factory(server, payloads))
+    result = yd.download_multiple_videos(
+        source(), options(tmp_path, streaming=True, max_workers=1, queue_size=1)
+    )
+
+    assert result.ok and len(result.succeeded) == 3
+    assert pulled == list(payloads)
+
+
+def test_main_selects_async_engine(monkeypatch) -> None:
+    seen = {}
+
+    class FakeCLI:
+        def __init__(self, downloader) -> None:
+            seen["downloader"] = downloader
+
+        def menu(self) -> None:
+            pass
+
+    monkeypatch.setenv("PYDL_ENGINE", "asyncio")
+    main(["menu"], cli_cls=FakeCLI)
+    assert isinstance(seen["downloader"], AsyncYoutubeDownloader)
+
+
+def test_job_queue_records_states(server, tmp_path: Path) -> None:
+    jobs = JobQueue(tmp_path / "jobs.db")
+    yd = AsyncYoutubeDownloader(youtube_cls=video_factory(server, {"ok": b"data"}))
+    urls = ["https://youtu.be/ok", "https://youtu.be/missing"]
+
+    yd.download_multiple_videos(urls, options(tmp_path, job_queue=jobs))
+
+    assert jobs.job(urls[0])["state"] == "done"
+    assert jobs.job(urls[0])["bytes_done"] == 4
+    assert jobs.job(urls[1])["state"] == "failed"
+    assert jobs.job(urls[1])["reason"].startswith("HTTPError")
+    assert jobs.unfinished() == []
+
+
+def test_cached_streams_are_resolved_off_the_event_loop(server, tmp_path: Path) -> None:
+    lookups = []
+
+    class Query(FakeQuery):
+        def get_by_itag(self, itag):
+            lookups.append(threading.get_ident())
+            return super().get_by_itag(itag)
+
+    class Video(video_factory(server, {"v": b"data"})):
+        def __init__(self, url: str) -> None:
+            super().__init__(url)
+            self.streams = Query(self.streams)
+
+    cache = MetadataCache(tmp_path / "cache.json")
+    yd = AsyncYoutubeDownloader(youtube_cls=Video)
+    opts = options(tmp_path, metadata_cache=cache)
+
+    assert yd.download_multiple_videos(["https://youtu.be/v"], opts).ok
+    (tmp_path / "v.mp4").unlink()
+    lookups.clear()
+    assert yd.download_multiple_videos(["https://youtu.be/v"], opts).ok
+
+    assert (tmp_path / "v.mp4").read_bytes() == b"data"
+    assert lookups and threading.get_ident() not in lookups
+
+
+def test_metrics_follow_transfers(server, tmp_path: Path) -> None:
+    metrics = Metrics()
+    server.errors["/v"] = [503]
+    yd = AsyncYoutubeDownloader(
+        youtube_cls=video_factory(server, {"v": b"data"}), metrics=metrics
+    )
+
+    assert yd.download_multiple_videos(["https://youtu.be/v"], options(tmp_path)).ok
+
+    assert metrics.bytes_downloaded.value() == 4
+    assert metrics.retries.value("HTTPError") == 1
+    assert metrics.downloads.value("succeeded") == 1
+    assert metrics.download_seconds.count == 1
+    assert metrics.active_workers.value() == 0
+
+
+def test_url_forms_of_a_video_are_downloaded_once(server, tmp_path: Path) -> None:
+    yd = AsyncYoutubeDownloader(youtube_cls=video_factory(server, {"v": b"data"}))
+    urls = ["https://youtu.be/v", "https://youtu.be/v?t=30", "https://youtu.be/v/"]
+
+    result = yd.download_multiple_videos(urls, options(tmp_path, max_workers=3))
+
+    assert result.succeeded == urls[:1]
+    assert result.duplicates == ["v", "v"]
+    assert server.requests == ["/v"]
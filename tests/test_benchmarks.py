@@ -0,0 +1,108 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.backend import BackendConfig, FakeBackend
+from benchmarks.bench_downloads import (
+    Report,
+    Scenario,
+    compare,
+    main,
+    percentile,
+    run_scenario,
+)
+
+
+def test_backend_serves_ranges_and_failures() -> None:
+    with FakeBackend(BackendConfig(failure_rate=0.5, seed=1)) as backend:
+        url = f"{backend.base_url}/videos/abc?size=1000"
+        request = urllib.request.Request(url, headers={"Range": "bytes=900-"})
+        bodies, failures = [], 0
+        for _ in range(20):
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    assert response.status == 206
+                    assert response.headers["Content-Range"] == "bytes 900-999/1000"
+                    bodies.append(response.read())
+            except urllib.error.HTTPError as e:
+                assert e.code == 503
+                failures += 1
+        assert failures == backend.failures > 0
+        assert bodies and all(len(body) == 100 for body in bodies)
+
+        video = backend.youtube_cls(4096)("https://youtu.be/aaaaaaaaaaa")
+        assert video.title == "Video aaaaaaaaaaa"
+        assert video.streams.first().filesize == 4096
+
+
+@pytest.mark.parametrize("segments", [1, 2])
+def test_scenario_reports_throughput_and_latency(segments) -> None:
+    config = BackendConfig(latency=0.01, failure_rate=0.2, seed=3)
+    with FakeBackend(config) as backend:
+        scenario = Scenario("threads", 2, 6, 3 * 1024 * 1024, segments)
+        report = run_scenario(scenario, backend.base_url)
+
+    assert report.failed == 0
+    if segments == 1:
+        # Every attempt requests the whole video and is retried if it fails.
+        expected = sum(
+            next(
+                attempt
+                for attempt in range(5)
+                if not backend.fails(f"{i:011d}", 0, attempt)
+            )
+            for i in range(scenario.batch_size)
+        )
+        assert report.retries == backend.failures == expected > 0
+    else:
+        # A retry only fetches the ranges missing when a segment failed,
+        # which depends on how far the stopped segments went.
+        assert 0 < report.retries <= backend.failures
+    assert report.items_per_second > 0
+    assert report.mib_per_second == pytest.approx(report.items_per_second * 3)
+    assert report.cpu_time > 0
+
+
+def test_asyncio_engine_scenario() -> None:
+    pytest.importorskip("aiohttp")
+    with FakeBackend(BackendConfig(seed=3)) as backend:
+        report = run_scenario(Scenario("asyncio", 2, 4, 1024), backend.base_url)
+    assert report.scenario.key.startswith("asyncio/")
+    assert report.failed == 0
+    assert report.items_per_second > 0
+
+
+def test_compare_flags_regressions() -> None:
+    scenario = Scenario("threads", 4, 10, 1024)
+
+    def report(rate: float, p99: float) -> Report:
+        return Report(scenario, 1.0, rate, rate, p99, p99, 0.1, None, 0, 0)
+
+    baseline = {scenario.key: report(10.0, 1.0).to_dict()}
+    assert compare([report(9.0, 1.1)], baseline, 0.2) == []
+    messages = compare([report(7.0, 1.5)], baseline, 0.2)
+    assert len(messages) == 2 and messages[0].startswith(scenario.key)
+    assert compare([report(1.0, 9.0)], {}, 0.2) == []
+
+
+def test_percentile_nearest_rank() -> None:
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_main_writes_json_and_checks_baseline(tmp_path, capsys) -> None:
+    report = tmp_path / "bench.json"
+    argv = ["--workers", "2", "--batch-sizes", "2", "--size", "64K", "--latency", "0"]
+    assert main([*argv, "--json", str(report)]) == 0
+    data = json.loads(report.read_text())
+    assert [r["key"] for r in data["reports"]] == ["threads/w2/n2/s65536/seg1"]
+    assert "items/s" in capsys.readouterr().out
+
+    data["reports"][0]["items_per_second"] *= 1000
+    report.write_text(json.dumps(data))
+    assert main([*argv, "--baseline", str(report)]) == 1
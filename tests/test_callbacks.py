@@ -129,13 +129,15 @@ def test_download_video_uses_attempt(monkeypatch, tmp_path: Path) -> None:
         return file_path
 
     monkeypatch.setattr(yd, "_attempt_download", fake_attempt)
-    mp3: dict[str, Path] = {}
-    monkeypatch.setattr(yd, "conversion_mp4_in_mp3", lambda p: mp3.setdefault("p", p))
+    extracted: dict[str, Path] = {}
+    monkeypatch.setattr(
+        yd, "_extract_audio", lambda s, u, p: extracted.setdefault("p", p)
+    )
 
     yd._download_video(stream, tmp_path, "https://youtu.be/x", True)
 
     assert called["args"] == (stream, tmp_path)
-    assert mp3["p"] == tmp_path / stream.default_filename
+    assert extracted["p"] == tmp_path / stream.default_filename
 
 
 def test_prepare_video_success(monkeypatch) -> None:
@@ -1,3 +1,5 @@
+import pytest
+
 from program_youtube_downloader.main import parse_args
 from pathlib import Path
 
@@ -52,3 +54,38 @@ def test_parse_playlist_output_dir() -> None:
     args = parse_args(["playlist", url, "--output-dir", "/tmp/out"])
     assert args.output_dir == Path("/tmp/out")
 
+
+
+def test_parse_headless_and_quality(monkeypatch) -> None:
+    monkeypatch.delenv("PYDL_HEADLESS", raising=False)
+    args = parse_args(["--headless", "video", "https://youtu.be/x", "--quality", "worst"])
+    assert args.headless is True
+    assert args.quality.prefer_best is False
+    assert parse_args(["video", "https://youtu.be/x"]).headless is False
+
+
+def test_parse_headless_env(monkeypatch) -> None:
+    monkeypatch.setenv("PYDL_HEADLESS", "1")
+    assert parse_args(["playlist", "https://youtube.com/playlist?list=1"]).headless is True
+
+
+def test_parse_engine_env(monkeypatch) -> None:
+    monkeypatch.setenv("PYDL_ENGINE", " AsyncIO ")
+    assert parse_args(["menu"]).engine == "asyncio"
+
+
+def test_parse_invalid_engine_env(monkeypatch, capsys) -> None:
+    monkeypatch.setenv("PYDL_ENGINE", "greenlets")
+    with pytest.raises(SystemExit) as exc:
+        parse_args(["menu"])
+    assert exc.value.code == 2
+    assert "invalid choice: 'greenlets'" in capsys.readouterr().err
+
+
+def test_async_engine_without_aiohttp(monkeypatch, capsys) -> None:
+    from program_youtube_downloader import async_downloader
+    from program_youtube_downloader.main import main
+
+    monkeypatch.setattr(async_downloader, "aiohttp", None)
+    assert main(["--engine", "asyncio", "menu"]) == 1
+    assert "program_youtube_downloader[async]" in capsys.readouterr().err
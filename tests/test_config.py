@@ -1,6 +1,10 @@
+import logging
 from pathlib import Path
 
-from program_youtube_downloader.config import DownloadOptions
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions, _parse_flag
+from program_youtube_downloader.selection import SelectionPolicy
 
 
 def test_max_workers_env(monkeypatch):
@@ -15,6 +19,54 @@ def test_max_workers_env_invalid(monkeypatch):
     assert opts.max_workers == 1
 
 
+def test_rejected_env_value_is_logged(monkeypatch, caplog):
+    monkeypatch.setenv("PYDL_RATE_LIMIT", "10 MiB")
+    with caplog.at_level(logging.WARNING, logger="program_youtube_downloader.config"):
+        opts = DownloadOptions()
+    assert opts.rate_limiter is None
+    assert "PYDL_RATE_LIMIT" in caplog.text
+    assert "'10 MiB'" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("1", True), (" Yes", True), ("ON", True), ("0", False), ("off", False), ("", False)],
+)
+def test_parse_flag(value, expected):
+    assert _parse_flag(value) is expected
+
+
+def test_unknown_flag_is_rejected(monkeypatch, caplog):
+    with pytest.raises(ValueError):
+        _parse_flag("enabled")
+    monkeypatch.setenv("PYDL_RESUMABLE", "enabled")
+    with caplog.at_level(logging.WARNING, logger="program_youtube_downloader.config"):
+        assert DownloadOptions().resumable is False
+    assert "PYDL_RESUMABLE" in caplog.text
+
+
+def test_unwritable_archive_is_rejected(monkeypatch, tmp_path, caplog):
+    (tmp_path / "file").write_text("")
+    monkeypatch.setenv("PYDL_ARCHIVE", str(tmp_path / "file" / "archive.jsonl"))
+    with caplog.at_level(logging.WARNING, logger="program_youtube_downloader.config"):
+        assert DownloadOptions().archive is None
+    assert "PYDL_ARCHIVE" in caplog.text
+
+
+def test_stores_are_opened_on_first_use(monkeypatch, tmp_path):
+    store = tmp_path / "store"
+    monkeypatch.setenv("PYDL_ARCHIVE", str(store / "archive.jsonl"))
+    monkeypatch.setenv("PYDL_METADATA_CACHE", str(store / "cache.json"))
+    monkeypatch.setenv("PYDL_JOB_QUEUE", str(store / "jobs.db"))
+    opts = DownloadOptions()
+    assert not store.exists()
+    assert len(opts.archive) == 0
+    assert len(opts.metadata_cache) == 0
+    assert opts.job_queue.unfinished() == []
+    opts.job_queue.close()
+    assert (store / "jobs.db").is_file()
+
+
 def test_max_workers_env_default(monkeypatch):
     monkeypatch.delenv("PYDL_MAX_WORKERS", raising=False)
     opts = DownloadOptions()
@@ -43,3 +95,69 @@ def test_audio_only_default(monkeypatch):
     monkeypatch.delenv("PYDL_AUDIO_ONLY", raising=False)
     opts = DownloadOptions()
     assert opts.download_sound_only is False
+
+
+def test_resolve_workers_env(monkeypatch):
+    monkeypatch.setenv("PYDL_RESOLVE_WORKERS", "4")
+    opts = DownloadOptions()
+    assert opts.resolve_workers == 4
+
+
+def test_resolve_workers_env_invalid(monkeypatch):
+    monkeypatch.setenv("PYDL_RESOLVE_WORKERS", "many")
+    opts = DownloadOptions()
+    assert opts.resolve_workers == 1
+
+
+def test_streaming_env(monkeypatch):
+    monkeypatch.setenv("PYDL_STREAMING", "yes")
+    monkeypatch.setenv("PYDL_QUEUE_SIZE", "8")
+    opts = DownloadOptions()
+    assert opts.streaming is True
+    assert opts.queue_size == 8
+
+
+def test_segments_env(monkeypatch):
+    monkeypatch.setenv("PYDL_SEGMENTS", "4")
+    assert DownloadOptions().segments == 4
+
+
+def test_retry_policy_env(monkeypatch):
+    monkeypatch.setenv("PYDL_RETRY_ATTEMPTS", "5")
+    monkeypatch.setenv("PYDL_RETRY_BASE_DELAY", "0.25")
+    policy = DownloadOptions().retry_policy
+    assert policy.max_attempts == 5
+    assert policy.base_delay == 0.25
+
+
+def test_progress_sampling_env(monkeypatch):
+    monkeypatch.setenv("PYDL_PROGRESS_EVERY", "16")
+    monkeypatch.setenv("PYDL_PROGRESS_INTERVAL", "0.5")
+    opts = DownloadOptions()
+    assert opts.progress_every == 16
+    assert opts.progress_interval == 0.5
+
+
+def test_selection_env(monkeypatch):
+    monkeypatch.setenv("PYDL_QUALITY", "best <=1080p")
+    assert DownloadOptions().selection == SelectionPolicy.parse("best <=1080p")
+    monkeypatch.setenv("PYDL_QUALITY", "nonsense")
+    assert DownloadOptions().selection is None
+
+
+def test_adaptive_env(monkeypatch):
+    monkeypatch.setenv("PYDL_ADAPTIVE", "1")
+    monkeypatch.setenv("PYDL_FFMPEG", "/opt/ffmpeg/bin/ffmpeg")
+    opts = DownloadOptions()
+    assert opts.adaptive is True
+    assert opts.ffmpeg == "/opt/ffmpeg/bin/ffmpeg"
+
+
+def test_audio_transcode_env(monkeypatch):
+    monkeypatch.setenv("PYDL_AUDIO_CODEC", " Opus ")
+    monkeypatch.setenv("PYDL_AUDIO_BITRATE", "96k")
+    monkeypatch.setenv("PYDL_TRANSCODE_WORKERS", "bad")
+    opts = DownloadOptions()
+    assert opts.audio_codec == "opus"
+    assert opts.audio_bitrate == "96k"
+    assert opts.transcode_workers == 2
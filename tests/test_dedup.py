@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.inflight import InFlightDownloads
+from program_youtube_downloader.result import BatchResult
+from tests.conftest import FakeStream, FakeVideo
+
+ID = "dQw4w9WgXcQ"
+OTHER = "aaaaaaaaaaa"
+
+pytestmark = pytest.mark.usefixtures("batch")
+
+
+class Video(FakeVideo):
+    def make_streams(self, name: str) -> list:
+        return [FakeStream(self, str(len(FakeVideo.created)))]
+
+
+def test_url_forms_of_a_video_are_downloaded_once(tmp_path: Path, caplog) -> None:
+    urls = [
+        f"https://youtu.be/{ID}",
+        f"https://www.youtube.com/watch?v={ID}&t=30",
+        f"https://www.youtube.com/shorts/{ID}",
+        f"https://youtu.be/{OTHER}",
+        f"https://youtube.com/watch?v={OTHER}",
+    ]
+    yd = YoutubeDownloader(youtube_cls=Video)
+    with caplog.at_level(logging.INFO):
+        result = yd.download_multiple_videos(
+            urls, DownloadOptions(save_path=tmp_path, max_workers=4)
+        )
+
+    assert sorted(FakeVideo.created) == [urls[3], urls[0]]
+    assert sorted(result.succeeded) == [urls[3], urls[0]]
+    assert result.duplicates == [ID, ID, OTHER]
+    assert result.to_dict()["duplicates"] == 3
+    assert "3 doublon(s) regroupé(s)" in caplog.text
+    assert not yd._claims
+
+
+def run_in_thread(yd: YoutubeDownloader, urls: list[str], path: Path):
+    box: list[BatchResult] = []
+    thread = threading.Thread(
+        target=lambda: box.append(
+            yd.download_multiple_videos(urls, DownloadOptions(save_path=path))
+        )
+    )
+    thread.start()
+    return thread, box
+
+
+@pytest.mark.parametrize("owner_succeeds", [True, False])
+def test_batch_waits_for_video_downloaded_elsewhere(tmp_path: Path, owner_succeeds) -> None:
+    registry = InFlightDownloads()
+    key = ("video", str(tmp_path.resolve()), ID)
+    assert registry.claim(key) is None
+    yd = YoutubeDownloader(youtube_cls=Video, in_flight=registry)
+
+    thread, box = run_in_thread(yd, [f"https://youtu.be/{ID}"], tmp_path)
+    time.sleep(0.2)
+    assert FakeVideo.created == []
+    registry.release(key, owner_succeeds)
+    thread.join(5)
+
+    result = box[0]
+    if owner_succeeds:
+        assert FakeVideo.created == [] and result.duplicates == [ID]
+    else:
+        assert FakeVideo.created == [f"https://youtu.be/{ID}"] and result.ok
+        assert result.duplicates == []
+    assert key not in registry
+
+
+def test_concurrent_batches_download_shared_video_once(tmp_path: Path) -> None:
+    registry = InFlightDownloads()
+    started = threading.Event()
+    unblock = threading.Event()
+
+    class SlowStream(FakeStream):
+        def download(self, output_path: str, filename: str | None = None) -> str:
+            started.set()
+            unblock.wait(5)
+            return super().download(output_path, filename)
+
+    class SlowVideo(Video):
+        def make_streams(self, name: str) -> list:
+            return [SlowStream(self, str(len(FakeVideo.created)))]
+
+    first = YoutubeDownloader(youtube_cls=SlowVideo, in_flight=registry)
+    second = YoutubeDownloader(youtube_cls=SlowVideo, in_flight=registry)
+    a, box_a = run_in_thread(first, [f"https://youtu.be/{ID}"], tmp_path)
+    assert started.wait(5)
+    b, box_b = run_in_thread(
+        second, [f"https://www.youtube.com/watch?v={ID}", f"https://youtu.be/{OTHER}"], tmp_path
+    )
+    time.sleep(0.2)
+    unblock.set()
+    a.join(5)
+    b.join(5)
+
+    assert sorted(FakeVideo.created) == [f"https://youtu.be/{OTHER}", f"https://youtu.be/{ID}"]
+    assert box_a[0].succeeded == [f"https://youtu.be/{ID}"]
+    assert box_b[0].duplicates == [ID]
+    assert box_b[0].succeeded == [f"https://youtu.be/{OTHER}"]
+
+
+def test_other_directories_are_independent(tmp_path: Path) -> None:
+    registry = InFlightDownloads()
+    assert registry.claim(("video", str((tmp_path / "a").resolve()), ID)) is None
+    yd = YoutubeDownloader(youtube_cls=Video, in_flight=registry)
+    result = yd.download_multiple_videos(
+        [f"https://youtu.be/{ID}"], DownloadOptions(save_path=tmp_path)
+    )
+    assert result.ok and not result.duplicates
+
+
+def test_registry_claim_and_release() -> None:
+    registry = InFlightDownloads()
+    assert registry.claim("k") is None
+    waiter = registry.claim("k")
+    assert waiter is not None and not waiter.done()
+    registry.release("k", True)
+    assert waiter.result() is True
+    assert "k" not in registry
+    registry.release("k", False)
+    assert registry.claim("k") is None
@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import program_youtube_downloader.main as main_module
+from program_youtube_downloader import cli_utils, utils
+from program_youtube_downloader.cli import CLI
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.exceptions import DownloadError
+from program_youtube_downloader.progress import NullProgressHandler
+from program_youtube_downloader.result import BatchResult
+from program_youtube_downloader.selection import SelectionPolicy
+from tests.conftest import FakeStream, FakeVideo
+
+
+class Stream(FakeStream):
+    abr = None
+
+    def __init__(self, video: FakeVideo, name: str, resolution: str) -> None:
+        super().__init__(video, f"{name}-{resolution}")
+        self.itag = int(resolution[:-1])
+        self.resolution = resolution
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        if self.name.startswith("fail"):
+            raise OSError("network")
+        return super().download(output_path, filename)
+
+
+class Video(FakeVideo):
+    def make_streams(self, name: str) -> list:
+        return [Stream(self, name, "720p"), Stream(self, name, "360p")]
+
+
+@pytest.fixture
+def no_interaction(monkeypatch):
+    def forbidden(*args, **kwargs):
+        raise AssertionError("headless run must not interact")
+
+    monkeypatch.setattr("builtins.input", forbidden)
+    monkeypatch.setattr(utils.time, "sleep", forbidden)
+    monkeypatch.setattr(utils.subprocess, "run", forbidden)
+    monkeypatch.setattr(cli_utils, "ask_save_file_path", forbidden)
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+
+
+def test_headless_options(tmp_path: Path) -> None:
+    out = tmp_path / "new" / "dir"
+    opts = CLI().create_download_options(False, out, interactive=False)
+    assert out.is_dir()
+    assert opts.save_path == out.resolve()
+    assert opts.interactive is False
+    assert isinstance(opts.progress_handler, NullProgressHandler)
+    assert opts.selection == SelectionPolicy()
+    assert CLI().create_download_options(
+        False, out, quality="worst", interactive=False
+    ).selection == SelectionPolicy(prefer_best=False)
+
+
+def test_headless_video_command(no_interaction, tmp_path: Path, capsys) -> None:
+    yd = YoutubeDownloader(youtube_cls=Video)
+    code = main_module.main(
+        [
+            "--headless",
+            "video",
+            "https://youtu.be/a",
+            "https://youtu.be/fail",
+            "--output-dir",
+            str(tmp_path),
+            "--quality",
+            "worst",
+        ],
+        yd,
+    )
+    assert code == 1
+    assert (tmp_path / "a-360p.mp4").exists()
+    summary = json.loads(capsys.readouterr().out)
+    assert summary == {
+        "total": 2,
+        "succeeded": 1,
+        "failed": ["https://youtu.be/fail"],
+        "skipped": 0,
+        "duplicates": 0,
+        "exit_code": 1,
+    }
+
+
+def test_headless_success_exit_code(no_interaction, monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("PYDL_OUTPUT_DIR", raising=False)
+    yd = YoutubeDownloader(youtube_cls=Video)
+    assert main_module.main(["--headless", "video", "https://youtu.be/b"], yd) == 0
+    assert (tmp_path / "b-720p.mp4").exists()
+    assert json.loads(capsys.readouterr().out)["exit_code"] == 0
+
+
+def test_batch_result_counts_unresolved_videos(no_interaction, tmp_path: Path) -> None:
+    def factory(url: str) -> Video:
+        if url.endswith("bad"):
+            raise DownloadError("gone")
+        return Video(url)
+
+    yd = YoutubeDownloader(youtube_cls=factory)
+    opts = CLI().create_download_options(False, tmp_path, interactive=False)
+    result = yd.download_multiple_videos(["https://youtu.be/bad", "https://youtu.be/c"], opts)
+    assert isinstance(result, BatchResult)
+    assert result.succeeded == ["https://youtu.be/c"]
+    assert result.failed == ["https://youtu.be/bad"]
+    assert not result.ok
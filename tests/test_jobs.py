@@ -0,0 +1,180 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.cache import MetadataCache
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.jobs import JobProgressHandler, JobQueue, JobState
+from program_youtube_downloader.main import main
+from program_youtube_downloader.progress import ProgressEvent
+from program_youtube_downloader.retry import RetryPolicy
+from tests.conftest import FakeStream, FakeVideo
+
+URLS = [f"https://youtu.be/{c * 11}" for c in "abc"]
+
+
+class Stream(FakeStream):
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        if self.name.startswith("b"):
+            raise OSError("disk full")
+        return super().download(output_path, filename)
+
+
+class Video(FakeVideo):
+    def make_streams(self, name: str) -> list:
+        return [Stream(self, name)]
+
+
+@pytest.fixture
+def batch(batch, monkeypatch):
+    monkeypatch.setenv("PYDL_RETRY_ATTEMPTS", "1")
+
+
+def test_queue_persists_states_and_settings(tmp_path: Path) -> None:
+    path = tmp_path / "jobs.db"
+    jobs = JobQueue(path)
+    assert [jobs.add(url) for url in URLS] == [JobState.PENDING] * 3
+    jobs.mark(URLS[0], JobState.DONE, path=tmp_path / "a.mp4")
+    jobs.mark(URLS[1], JobState.FAILED, reason="HTTPError: 403")
+    jobs.mark(URLS[2], JobState.DOWNLOADING)
+    jobs.record_offset(URLS[2], 512, 2048)
+    jobs.set_setting("quality", "best <=720p")
+    jobs.close()
+
+    jobs = JobQueue(path)
+    assert jobs.add(URLS[0]) is JobState.DONE
+    assert jobs.unfinished() == [URLS[2]]
+    assert jobs.unfinished(include_failed=True) == URLS[1:]
+    assert jobs.job(URLS[1])["reason"] == "HTTPError: 403"
+    assert jobs.job(URLS[2])["bytes_done"] == 512
+    assert jobs.job(URLS[0])["path"] == str(tmp_path / "a.mp4")
+    assert jobs.counts()[JobState.PENDING] == 0
+    assert jobs.setting("quality") == "best <=720p"
+    assert jobs.setting("save_path") is None
+    jobs.close()
+
+    with sqlite3.connect(path) as db:
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_add_many_keeps_submission_order_across_reopen(tmp_path: Path) -> None:
+    path = tmp_path / "jobs.db"
+    jobs = JobQueue(path)
+    assert jobs.add_many(URLS[:2]) == [JobState.PENDING] * 2
+    jobs.mark(URLS[0], JobState.DONE)
+    jobs.close()
+
+    jobs = JobQueue(path)
+    assert jobs.add_many([URLS[2], URLS[0], URLS[1]]) == [
+        JobState.PENDING,
+        JobState.DONE,
+        JobState.PENDING,
+    ]
+    assert jobs.unfinished() == URLS[1:]
+    assert [jobs.job(url)["position"] for url in URLS] == [1, 2, 3]
+    jobs.close()
+
+
+def test_progress_handler_throttles_offset_writes(tmp_path: Path) -> None:
+    jobs = JobQueue(tmp_path / "jobs.db")
+    jobs.add(URLS[0])
+    seen = []
+
+    class Recorder:
+        def on_progress(self, event) -> None:
+            seen.append(event.bytes_downloaded)
+
+    handler = JobProgressHandler(jobs, URLS[0], Recorder(), clock=lambda: 0.0)
+    total = 4 * 1024 * 1024
+    handler.on_progress(ProgressEvent(total, 1000, 0.0))
+    assert jobs.job(URLS[0])["bytes_done"] == 0
+    handler.on_progress(ProgressEvent(total, 2 * 1024 * 1024, 50.0))
+    assert jobs.job(URLS[0])["bytes_done"] == 2 * 1024 * 1024
+    handler.on_progress(ProgressEvent(total, total, 100.0))
+    assert jobs.job(URLS[0])["bytes_done"] == total
+    assert seen == [1000, 2 * 1024 * 1024, total]
+
+
+def test_batch_records_outcome_of_each_url(batch, tmp_path: Path) -> None:
+    jobs = JobQueue(tmp_path / "jobs.db")
+    yd = YoutubeDownloader(youtube_cls=Video)
+    options = DownloadOptions(
+        save_path=tmp_path,
+        job_queue=jobs,
+        retry_policy=RetryPolicy(max_attempts=1),
+        interactive=False,
+    )
+
+    result = yd.download_multiple_videos(URLS[:2], options)
+
+    assert result.failed == [URLS[1]]
+    assert jobs.job(URLS[0])["state"] == "done"
+    assert jobs.job(URLS[0])["path"] == str(tmp_path / f"{'a' * 11}.mp4")
+    failed = jobs.job(URLS[1])
+    assert failed["state"] == "failed"
+    assert failed["reason"] == "OSError: disk full"
+    assert jobs.setting("save_path") == str(tmp_path)
+    assert jobs.setting("quality") == "best video <=360p"
+
+
+def test_cached_video_progress_is_recorded(batch, tmp_path: Path) -> None:
+    class ReportingStream(FakeStream):
+        filesize = 4
+
+        def download(self, output_path: str, filename: str | None = None) -> str:
+            path = super().download(output_path, filename)
+            self.video.callback(self, b"data", 0)
+            return path
+
+    class ReportingVideo(FakeVideo):
+        def make_streams(self, name: str) -> list:
+            return [ReportingStream(self, name)]
+
+    cache = MetadataCache(tmp_path / "cache.json")
+    yd = YoutubeDownloader(youtube_cls=ReportingVideo)
+    for run in ("first", "cached"):
+        (tmp_path / f"{'a' * 11}.mp4").unlink(missing_ok=True)
+        jobs = JobQueue(tmp_path / f"{run}.db")
+        options = DownloadOptions(
+            save_path=tmp_path, job_queue=jobs, metadata_cache=cache, interactive=False
+        )
+        assert yd.download_multiple_videos(URLS[:1], options).ok
+        assert jobs.job(URLS[0])["bytes_done"] == 4
+    assert cache.hits == 1
+
+
+def test_resume_continues_unfinished_jobs(batch, tmp_path: Path) -> None:
+    path = tmp_path / "jobs.db"
+    jobs = JobQueue(path)
+    for url in URLS:
+        jobs.add(url)
+    jobs.mark(URLS[0], JobState.DONE)
+    jobs.mark(URLS[1], JobState.FAILED, reason="OSError: disk full")
+    # The previous run was interrupted during this download.
+    jobs.mark(URLS[2], JobState.DOWNLOADING)
+    jobs.set_setting("save_path", str(tmp_path / "out"))
+    jobs.set_setting("audio", "0")
+    jobs.set_setting("quality", "best <=720p")
+    jobs.close()
+    (tmp_path / "out").mkdir()
+
+    yd = YoutubeDownloader(youtube_cls=Video)
+    assert main(["--headless", "resume", str(path)], downloader=yd) == 0
+    assert FakeVideo.created == [URLS[2]]
+    assert (tmp_path / "out" / f"{'c' * 11}.mp4").exists()
+
+    FakeVideo.created = []
+    assert main(["--headless", "resume", str(path), "--retry-failed"], downloader=yd) == 1
+    assert FakeVideo.created == [URLS[1]]
+
+    jobs = JobQueue(path)
+    assert jobs.counts()[JobState.DONE] == 2
+    assert jobs.unfinished() == []
+
+
+def test_resume_requires_a_queue(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("PYDL_JOB_QUEUE", raising=False)
+    assert main(["--headless", "resume"]) == 1
+    assert main(["--headless", "resume", str(tmp_path / "missing.db")]) == 1
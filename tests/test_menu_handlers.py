@@ -52,6 +52,7 @@ def test_handle_playlist_option(monkeypatch, tmp_path):
     cli.handle_playlist_option(True)
     assert dd.called[0] == ["v1"]
     assert dd.called[1].download_sound_only is True
+    assert dd.called[1].streaming is True
 
 
 def test_handle_playlist_option_error(monkeypatch):
@@ -0,0 +1,170 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.cache import (
+    MetadataCache,
+    StreamInfo,
+    VideoMetadata,
+)
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.exceptions import StreamAccessError
+from program_youtube_downloader.types import YouTubeVideo
+from tests.conftest import FakeQuery, FakeStream
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def entry(video_id: str, fetched_at: float = 1000.0) -> VideoMetadata:
+    return VideoMetadata(
+        video_id=video_id,
+        title=f"title {video_id}",
+        streams=[StreamInfo(itag=18, resolution="360p", filesize=10, default_filename=f"{video_id}.mp4")],
+        fetched_at=fetched_at,
+    )
+
+
+def test_put_get_roundtrip(tmp_path: Path) -> None:
+    cache = MetadataCache(tmp_path / "cache.json", clock=Clock())
+    cache.put(entry("abc"))
+    assert cache.get("abc").title == "title abc"
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire(tmp_path: Path) -> None:
+    clock = Clock()
+    cache = MetadataCache(tmp_path / "cache.json", ttl=60, clock=clock)
+    cache.put(entry("abc"))
+    clock.now += 61
+    assert cache.get("abc") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path: Path) -> None:
+    cache = MetadataCache(tmp_path / "cache.json", max_entries=2, clock=Clock())
+    cache.put(entry("a"))
+    cache.put(entry("b"))
+    cache.get("a")
+    cache.put(entry("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_persistence(tmp_path: Path) -> None:
+    path = tmp_path / "sub" / "cache.json"
+    clock = Clock()
+    cache = MetadataCache(path, clock=clock)
+    cache.put(entry("a"))
+    cache.put(entry("b", fetched_at=0.0))
+    cache.save()
+
+    reloaded = MetadataCache(path, ttl=500, clock=clock)
+    assert reloaded.get("a").streams[0].itag == 18
+    assert reloaded.get("b") is None
+
+
+def test_concurrent_saves_write_whole_files(tmp_path: Path) -> None:
+    path = tmp_path / "cache.json"
+    cache = MetadataCache(path, clock=Clock())
+
+    def work(n: int) -> None:
+        for i in range(20):
+            cache.put(entry(f"{n}-{i}"))
+            cache.save()
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(MetadataCache(path, clock=Clock())) == 80
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_corrupt_file_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "cache.json"
+    path.write_text("{not json")
+    cache = MetadataCache(path)
+    assert len(cache) == 0
+
+
+class CountingStream(FakeStream):
+    abr = None
+    filesize = 4
+
+
+class CountingYT(YouTubeVideo):
+    lookups = 0
+
+    def __init__(self, url: str) -> None:
+        self._name = url.rsplit("/", 1)[-1]
+
+    @property
+    def streams(self):
+        CountingYT.lookups += 1
+        return FakeQuery([CountingStream(self, self._name)])
+
+    @property
+    def title(self):
+        CountingYT.lookups += 1
+        return "video"
+
+    def register_on_progress_callback(self, cb) -> None:
+        pass
+
+
+def test_rerun_skips_metadata_lookups(batch, tmp_path: Path) -> None:
+    cache_file = tmp_path / "cache.json"
+    out = tmp_path / "out"
+    out.mkdir()
+    urls = ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+
+    CountingYT.lookups = 0
+    yd = YoutubeDownloader(youtube_cls=CountingYT)
+    yd.download_multiple_videos(urls, DownloadOptions(save_path=out, metadata_cache=MetadataCache(cache_file)))
+    assert cache_file.exists()
+    first_run = CountingYT.lookups
+
+    for f in out.iterdir():
+        f.unlink()
+    CountingYT.lookups = 0
+    cache = MetadataCache(cache_file)
+    yd = YoutubeDownloader(youtube_cls=CountingYT)
+    yd.download_multiple_videos(urls, DownloadOptions(save_path=out, metadata_cache=cache))
+
+    assert cache.hits == 2
+    # Only the download itself needs the real stream list.
+    assert CountingYT.lookups == 2 < first_run
+    assert (out / "aaaaaaaaaaa.mp4").exists()
+    assert (out / "bbbbbbbbbbb.mp4").exists()
+
+
+def test_cached_stream_missing_itag(tmp_path: Path) -> None:
+    class EmptyStreams(list):
+        def get_by_itag(self, itag):
+            return None
+
+    class Video:
+        streams = EmptyStreams()
+
+        def register_on_progress_callback(self, cb) -> None:
+            pass
+
+    from program_youtube_downloader.cache import CachedVideo
+
+    video = CachedVideo(Video(), entry("abc"))
+    stream = video.streams.get_by_itag(18)
+    assert stream.default_filename == "abc.mp4"
+    with pytest.raises(StreamAccessError):
+        stream.download(output_path=str(tmp_path))
@@ -0,0 +1,132 @@
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.archive import DownloadArchive
+from program_youtube_downloader.cache import MetadataCache
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.main import create_metrics, parse_args
+from program_youtube_downloader.metrics import Counter, Gauge, Histogram, Metrics
+from program_youtube_downloader.retry import RetryPolicy
+from tests.conftest import FakeStream, FakeVideo
+
+
+class Stream(FakeStream):
+    filesize = 300
+    data = "x" * 300
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        if self.name.startswith("b") and self.calls == 0:
+            self.calls += 1
+            raise ConnectionResetError("reset")
+        for remaining in (200, 100, 0):
+            self.video.callback(self, b"x" * 100, remaining)
+        return super().download(output_path, filename)
+
+
+class Video(FakeVideo):
+    def make_streams(self, name: str) -> list:
+        return [Stream(self, name)]
+
+
+def test_render_text_format() -> None:
+    counter = Counter("c_total", "Counted.", ["error"])
+    counter.inc('Bad"Error')
+    counter.inc("X", amount=2)
+    with pytest.raises(ValueError):
+        counter.inc("X", amount=-1)
+    gauge = Gauge("g", "Gauge.")
+    gauge.inc()
+    gauge.dec(amount=3)
+    histogram = Histogram("h_seconds", "Latency.", buckets=(0.5, 1))
+    for value in (0.1, 0.7, 5):
+        histogram.observe(value)
+
+    assert counter.render() == (
+        "# HELP c_total Counted.\n"
+        "# TYPE c_total counter\n"
+        'c_total{error="Bad\\"Error"} 1\n'
+        'c_total{error="X"} 2\n'
+    )
+    assert gauge.render().splitlines()[-1] == "g -2"
+    assert histogram.render().splitlines()[2:] == [
+        'h_seconds_bucket{le="0.5"} 1',
+        'h_seconds_bucket{le="1"} 2',
+        'h_seconds_bucket{le="+Inf"} 3',
+        "h_seconds_sum 5.8",
+        "h_seconds_count 3",
+    ]
+
+
+def test_textfile_writes_are_throttled(tmp_path: Path) -> None:
+    now = [0.0]
+    path = tmp_path / "prom" / "pydl.prom"
+    metrics = Metrics(path, interval=10, clock=lambda: now[0])
+    metrics.flush()
+    assert "pydl_bytes_downloaded_total 0" in path.read_text()
+
+    metrics.bytes_downloaded.inc(amount=5)
+    now[0] = 5
+    metrics.flush()
+    assert "pydl_bytes_downloaded_total 0" in path.read_text()
+    metrics.flush(force=True)
+    assert "pydl_bytes_downloaded_total 5" in path.read_text()
+    assert [p.name for p in path.parent.iterdir()] == ["pydl.prom"]
+
+
+def test_metrics_are_served_over_http() -> None:
+    metrics = Metrics()
+    metrics.downloads.inc("succeeded")
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}"
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert 'pydl_downloads_total{result="succeeded"} 1' in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_batch_feeds_metrics(batch, tmp_path: Path) -> None:
+    metrics = Metrics(tmp_path / "pydl.prom")
+    archive = DownloadArchive(tmp_path / "archive.jsonl")
+    yd = YoutubeDownloader(youtube_cls=Video, metrics=metrics)
+    urls = [f"https://youtu.be/{c * 11}" for c in "ab"]
+    options = DownloadOptions(
+        save_path=tmp_path,
+        archive=archive,
+        metadata_cache=MetadataCache(tmp_path / "cache.json"),
+        retry_policy=RetryPolicy(base_delay=0, jitter=0),
+        interactive=False,
+    )
+
+    assert yd.download_multiple_videos(urls, options).ok
+    yd.download_multiple_videos(urls, options)
+
+    assert metrics.bytes_downloaded.value() == 600
+    assert metrics.downloads.value("succeeded") == 2
+    assert metrics.retries.value("ConnectionResetError") == 1
+    assert metrics.resolve_seconds.count == 2
+    assert metrics.download_seconds.count == 2
+    assert metrics.archive_lookups.value("miss") == 2
+    assert metrics.archive_lookups.value("hit") == 2
+    assert metrics.cache_lookups.value("miss") == 2
+    assert metrics.active_workers.value() == 0
+    assert metrics.queue_depth.value() == 0
+    assert "pydl_downloads_total" in (tmp_path / "pydl.prom").read_text()
+
+
+def test_cli_options_create_metrics(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("PYDL_METRICS_PORT", raising=False)
+    monkeypatch.delenv("PYDL_METRICS_FILE", raising=False)
+    assert create_metrics(parse_args(["menu"])) is None
+
+    monkeypatch.setenv("PYDL_METRICS_FILE", str(tmp_path / "pydl.prom"))
+    metrics = create_metrics(parse_args(["menu"]))
+    assert metrics is not None and metrics.textfile == tmp_path / "pydl.prom"
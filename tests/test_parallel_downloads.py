@@ -1,4 +1,6 @@
 import logging
+import threading
+import time
 from pathlib import Path
 import pytest
 
@@ -137,3 +139,139 @@ def test_invalid_max_workers(tmp_path: Path) -> None:
     options = DownloadOptions(save_path=tmp_path, max_workers=0)
     with pytest.raises(ValueError):
         yd.download_multiple_videos(["https://youtu.be/a"], options)
+
+
+def test_resolution_runs_concurrently(monkeypatch, tmp_path: Path) -> None:
+    """Videos are resolved in parallel when resolve_workers > 1."""
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def constructor(url: str) -> DummyYT:
+        # Both resolutions must be in flight at the same time to pass.
+        barrier.wait()
+        return DummyYT(url)
+
+    yd = YoutubeDownloader(youtube_cls=constructor)
+    options = DownloadOptions(save_path=tmp_path, max_workers=1, resolve_workers=2)
+    yd.download_multiple_videos(["https://youtu.be/a", "https://youtu.be/b"], options)
+    assert (tmp_path / "a.mp4").exists()
+    assert (tmp_path / "b.mp4").exists()
+
+
+def test_download_starts_before_resolution_ends(monkeypatch, tmp_path: Path) -> None:
+    """A resolved video is downloaded while the next one is still resolving."""
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+    first_downloaded = threading.Event()
+
+    def constructor(url: str) -> DummyYT:
+        if url.endswith("b"):
+            assert first_downloaded.wait(timeout=5)
+        return DummyYT(url)
+
+    def download(self, stream, path, url, sound_only):
+        Path(path / stream.default_filename).write_text("ok")
+        if url.endswith("a"):
+            first_downloaded.set()
+
+    monkeypatch.setattr(YoutubeDownloader, "_download_video", download)
+    yd = YoutubeDownloader(youtube_cls=constructor)
+    options = DownloadOptions(save_path=tmp_path, max_workers=1, resolve_workers=1)
+    yd.download_multiple_videos(["https://youtu.be/a", "https://youtu.be/b"], options)
+    assert (tmp_path / "b.mp4").exists()
+
+
+def test_invalid_resolve_workers(tmp_path: Path) -> None:
+    """resolve_workers < 1 should raise an error."""
+    yd = YoutubeDownloader(youtube_cls=fake_constructor)
+    options = DownloadOptions(save_path=tmp_path, resolve_workers=0)
+    with pytest.raises(ValueError):
+        yd.download_multiple_videos(["https://youtu.be/a"], options)
+
+
+def test_streaming_starts_before_source_exhausted(monkeypatch, tmp_path: Path) -> None:
+    """In streaming mode the first video downloads while the source is still paging."""
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+    first_downloaded = threading.Event()
+
+    def source():
+        yield "https://youtu.be/a"
+        assert first_downloaded.wait(timeout=5)
+        yield "https://youtu.be/b"
+
+    def download(self, stream, path, url, sound_only):
+        Path(path / stream.default_filename).write_text("ok")
+        first_downloaded.set()
+
+    monkeypatch.setattr(YoutubeDownloader, "_download_video", download)
+    yd = YoutubeDownloader(youtube_cls=fake_constructor)
+    options = DownloadOptions(save_path=tmp_path, streaming=True)
+    yd.download_multiple_videos(source(), options)
+    assert (tmp_path / "a.mp4").exists()
+    assert (tmp_path / "b.mp4").exists()
+
+
+def test_streaming_source_is_bounded(monkeypatch, tmp_path: Path) -> None:
+    """The producer never runs far ahead of stalled downloads."""
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+    release = threading.Event()
+    produced = []
+
+    def source():
+        for i in range(1000):
+            produced.append(i)
+            yield f"https://youtu.be/{i}"
+
+    def download(self, stream, path, url, sound_only):
+        assert release.wait(timeout=5)
+
+    monkeypatch.setattr(YoutubeDownloader, "_download_video", download)
+    yd = YoutubeDownloader(youtube_cls=fake_constructor)
+    options = DownloadOptions(
+        save_path=tmp_path, max_workers=1, resolve_workers=1, streaming=True, queue_size=2
+    )
+    runner = threading.Thread(target=yd.download_multiple_videos, args=(source(), options))
+    runner.start()
+    time.sleep(0.5)
+    assert len(produced) < 20
+    release.set()
+    runner.join(timeout=10)
+    assert not runner.is_alive()
+    assert len(produced) == 1000
+
+
+def test_streaming_empty_source(tmp_path: Path, caplog) -> None:
+    yd = YoutubeDownloader(youtube_cls=fake_constructor)
+    options = DownloadOptions(save_path=tmp_path, streaming=True)
+    with caplog.at_level(logging.ERROR):
+        yd.download_multiple_videos(iter([]), options)
+    assert "aucune vidéo" in caplog.text
+
+
+def test_invalid_queue_size(tmp_path: Path) -> None:
+    yd = YoutubeDownloader(youtube_cls=fake_constructor)
+    options = DownloadOptions(save_path=tmp_path, queue_size=0)
+    with pytest.raises(ValueError):
+        yd.download_multiple_videos(["https://youtu.be/a"], options)
+
+
+def test_concurrent_batches_on_one_instance_are_refused(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(YoutubeDownloader, "get_video_streams", lambda self, dso, yt: yt.streams)
+    started, release = threading.Event(), threading.Event()
+
+    def source():
+        started.set()
+        assert release.wait(timeout=5)
+        yield "https://youtu.be/a"
+
+    yd = YoutubeDownloader(youtube_cls=fake_constructor)
+    options = DownloadOptions(save_path=tmp_path, streaming=True)
+    runner = threading.Thread(target=yd.download_multiple_videos, args=(source(), options))
+    runner.start()
+    assert started.wait(timeout=5)
+    with pytest.raises(RuntimeError):
+        yd.download_multiple_videos(["https://youtu.be/b"], options)
+    release.set()
+    runner.join(timeout=10)
+
+    assert (tmp_path / "a.mp4").exists() and not (tmp_path / "b.mp4").exists()
+    assert yd.download_multiple_videos(["https://youtu.be/b"], options).ok
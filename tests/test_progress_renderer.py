@@ -0,0 +1,189 @@
+import io
+import re
+from pathlib import Path
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.progress import (
+    MultiProgressRenderer,
+    ProgressBarHandler,
+    ProgressEvent,
+    format_bytes,
+)
+from tests.conftest import FakeVideo
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TtyBuffer(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def event(label: str, downloaded: int, total: int = 1000) -> ProgressEvent:
+    return ProgressEvent(total, downloaded, downloaded * 100 / total, label)
+
+
+def update(e: ProgressEvent, downloaded: int) -> ProgressEvent:
+    # Like ProgressTracker, which reuses the event of a stream.
+    e.bytes_downloaded = downloaded
+    e.percent = downloaded * 100 / e.bytes_total
+    return e
+
+
+def test_on_progress_does_not_write() -> None:
+    out = io.StringIO()
+    renderer = MultiProgressRenderer(refresh_interval=60, output=out)
+    a = event("a.mp4", 0)
+    for n in range(0, 1000, 10):
+        renderer.on_progress(update(a, n))
+    assert out.getvalue() == ""
+    renderer.close()
+    assert out.getvalue().count("\n") == 1
+
+
+def test_render_aggregates_items_and_throughput() -> None:
+    out = TtyBuffer()
+    clock = FakeClock()
+    renderer = MultiProgressRenderer(refresh_interval=60, output=out, clock=clock)
+    a, b = event("a.mp4", 0), event("b.mp4", 0)
+    renderer.on_progress(a)
+    renderer.on_progress(b)
+    renderer.render()
+
+    clock.now += 1
+    renderer.on_progress(update(a, 1000))
+    renderer.on_progress(update(b, 500))
+    renderer.render()
+    renderer.close()
+
+    frame = out.getvalue().split("\x1b[3F")[1]
+    assert "a.mp4" in frame and "100.00%" in frame
+    assert "b.mp4" in frame and "50.00%" in frame
+    assert "Total : 1 en cours, 1 terminé(s), 1.5 Kio" in frame
+    # Smoothed throughput: 30 % of the 1500 o/s sample.
+    assert "450 o/s" in frame
+
+
+def test_non_tty_output_prints_summary_only() -> None:
+    out = io.StringIO()
+    renderer = MultiProgressRenderer(refresh_interval=60, output=out)
+    renderer.on_progress(event("a.mp4", 200))
+    renderer.render()
+    renderer.close()
+    assert "\x1b" not in out.getvalue()
+    assert all(line.startswith("Total") for line in out.getvalue().splitlines())
+
+
+def test_non_tty_output_is_throttled() -> None:
+    out = io.StringIO()
+    clock = FakeClock()
+    renderer = MultiProgressRenderer(
+        refresh_interval=60, output=out, clock=clock, log_interval=30
+    )
+    a, b = event("a.mp4", 0), event("b.mp4", 0)
+    renderer.on_progress(a)
+    renderer.on_progress(b)
+    for n in range(1, 40):
+        clock.now += 0.25
+        renderer.on_progress(update(a, n))
+        renderer.render()
+    assert out.getvalue().count("\n") == 1
+
+    renderer.on_progress(update(a, 1000))
+    renderer.render()
+    assert "1 terminé(s)" in out.getvalue().splitlines()[-1]
+    clock.now += 30
+    renderer.render()
+    assert out.getvalue().count("\n") == 3
+
+    renderer.on_progress(update(b, 1000))
+    renderer.close()
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert "0 en cours, 2 terminé(s)" in lines[-1]
+
+
+def test_streams_sharing_a_name_are_tracked_separately() -> None:
+    out = TtyBuffer()
+    renderer = MultiProgressRenderer(refresh_interval=60, output=out)
+    first, second = event("video.mp4", 1000), event("video.mp4", 250)
+    renderer.on_progress(first)
+    renderer.on_progress(second)
+    renderer.render()
+    renderer.close()
+
+    frame = out.getvalue().split("\x1b[3F")[0]
+    assert "100.00%" in frame and "25.00%" in frame
+    assert "Total : 1 en cours, 1 terminé(s), 1.2 Kio" in frame
+
+
+def test_shorter_frame_erases_previous_lines() -> None:
+    out = TtyBuffer()
+    renderer = MultiProgressRenderer(refresh_interval=60, output=out)
+    renderer.on_progress(event("a.mp4", 1000))
+    renderer.on_progress(event("b.mp4", 0))
+    renderer.render()
+    renderer.render()
+    renderer.close()
+
+    frames = re.split(r"\x1b\[\dF", out.getvalue())
+    assert [frame.count("\n") for frame in frames] == [3, 2, 2]
+    assert "a.mp4" not in frames[1]
+    assert all(frame.endswith("\x1b[J") for frame in frames)
+
+
+def test_streams_of_unknown_size_are_dropped_once_drawn() -> None:
+    out = TtyBuffer()
+    renderer = MultiProgressRenderer(refresh_interval=60, output=out)
+    renderer.on_progress(ProgressEvent(0, 0, 100.0, "a.mp4"))
+    renderer.render()
+    renderer.render()
+    renderer.close()
+
+    first, *rest = out.getvalue().split("\x1b[2F")
+    assert "a.mp4" in first and "Total : 0 en cours, 1 terminé(s)" in first
+    assert all("a.mp4" not in frame and "1 terminé(s)" in frame for frame in rest)
+
+
+def test_format_bytes() -> None:
+    assert format_bytes(512) == "512 o"
+    assert format_bytes(1536) == "1.5 Kio"
+    assert format_bytes(3 * 1024**3) == "3.0 Gio"
+
+
+def test_parallel_batch_uses_renderer(monkeypatch, tmp_path: Path) -> None:
+    yd = YoutubeDownloader()
+    assert isinstance(
+        yd._batch_progress_handler(DownloadOptions(max_workers=4)),
+        MultiProgressRenderer,
+    )
+    assert isinstance(
+        yd._batch_progress_handler(DownloadOptions(max_workers=1)),
+        ProgressBarHandler,
+    )
+
+    custom = YoutubeDownloader(progress_handler=ProgressBarHandler())
+    assert custom._batch_progress_handler(
+        DownloadOptions(max_workers=4)
+    ) is custom.progress_handler
+
+
+def test_renderer_closed_after_batch(batch, monkeypatch, tmp_path: Path) -> None:
+    closed = []
+    monkeypatch.setattr(MultiProgressRenderer, "close", lambda self: closed.append(self))
+    monkeypatch.setattr(YoutubeDownloader, "_download_video", lambda *a: None)
+
+    yd = YoutubeDownloader(youtube_cls=FakeVideo)
+    yd.download_multiple_videos(
+        ["https://youtu.be/a", "https://youtu.be/b"],
+        DownloadOptions(save_path=tmp_path, max_workers=2),
+    )
+    assert len(closed) == 1
+    assert yd._batch_progress is None
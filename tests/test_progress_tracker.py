@@ -0,0 +1,108 @@
+import logging
+
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.progress import ProgressTracker
+
+
+class Stream:
+    default_filename = "clip.mp4"
+
+    def __init__(self, filesize=1000) -> None:
+        self.filesize = filesize
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.events = []
+        self.seen = []
+
+    def on_progress(self, event) -> None:
+        self.events.append(event)
+        self.seen.append(event.bytes_downloaded)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_event_is_reused() -> None:
+    handler = Recorder()
+    tracker = ProgressTracker(Stream(), handler)
+    for n in (100, 500, 1000):
+        tracker.update(n)
+    assert handler.seen == [100, 500, 1000]
+    assert all(e is tracker.event for e in handler.events)
+    assert tracker.event.percent == 100.0
+    assert tracker.event.label == "clip.mp4"
+    with pytest.raises(AttributeError):
+        tracker.event.extra = 1  # slots: no per-instance dict
+
+
+def test_filesize_read_once() -> None:
+    class CountingStream:
+        reads = 0
+
+        @property
+        def filesize(self):
+            type(self).reads += 1
+            return 1000
+
+    tracker = ProgressTracker(CountingStream(), Recorder())
+    for n in range(10, 1000, 10):
+        tracker.update(n)
+    assert CountingStream.reads == 1
+
+
+def test_missing_size_warns_and_reports_once(caplog) -> None:
+    handler = Recorder()
+    with caplog.at_level(logging.WARNING):
+        tracker = ProgressTracker(Stream(None), handler)
+        for _ in range(5):
+            tracker.update(0)
+    assert caplog.text.count("Taille totale manquante") == 1
+    assert len(handler.events) == 1
+    assert handler.events[0].percent == 100.0
+
+
+def test_sampling_every_nth_keeps_final_update() -> None:
+    handler = Recorder()
+    tracker = ProgressTracker(Stream(), handler, every=4)
+    for n in range(100, 1001, 100):
+        tracker.update(n)
+    assert handler.seen == [400, 800, 1000]
+
+
+def test_sampling_by_interval() -> None:
+    handler = Recorder()
+    clock = FakeClock()
+    tracker = ProgressTracker(Stream(), handler, interval=0.5, clock=clock)
+    for n in range(100, 1001, 100):
+        clock.now += 0.2
+        tracker.update(n)
+    # Deliveries at 0.6 s and 1.2 s, plus the final update.
+    assert handler.seen == [300, 600, 900, 1000]
+
+
+def test_pytube_callback_uses_batch_sampling(tmp_path) -> None:
+    class Video:
+        def __init__(self, url: str) -> None:
+            self.callback = None
+
+        def register_on_progress_callback(self, cb) -> None:
+            self.callback = cb
+
+    handler = Recorder()
+    yd = YoutubeDownloader(progress_handler=handler, youtube_cls=Video)
+    yd._options = DownloadOptions(save_path=tmp_path, progress_every=3)
+    yt = yd._create_youtube("https://youtu.be/x", handler)
+    stream = Stream()
+    for remaining in range(900, -1, -100):
+        yt.callback(stream, b"x" * 100, remaining)
+    assert handler.seen == [300, 600, 900, 1000]
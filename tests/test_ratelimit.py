@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.ratelimit import BandwidthLimiter, TokenBucket, parse_rate
+
+
+class FakeTime:
+    """Clock advanced by the sleeps it records."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+        self.lock = threading.Lock()
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        with self.lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [("1000", 1000), ("500K", 500 * 1024), ("2.5M", 2.5 * 1024**2), ("1GB/s", 1024**3)],
+)
+def test_parse_rate(text, expected) -> None:
+    assert parse_rate(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "fast", "-1M", "0"])
+def test_parse_rate_invalid(text) -> None:
+    with pytest.raises(ValueError):
+        parse_rate(text)
+
+
+def test_bucket_allows_burst_then_waits() -> None:
+    t = FakeTime()
+    bucket = TokenBucket(100, clock=t.clock, sleep=t.sleep)
+    bucket.consume(100)
+    assert t.sleeps == []
+    bucket.consume(50)
+    assert t.sleeps == [0.5]
+
+
+def test_bucket_sustained_rate() -> None:
+    t = FakeTime()
+    bucket = TokenBucket(1000, capacity=0, clock=t.clock, sleep=t.sleep)
+    for _ in range(10):
+        bucket.consume(500)
+    assert t.now == pytest.approx(5.0)
+
+
+def test_total_limit_shared_between_threads() -> None:
+    t = FakeTime()
+    limiter = BandwidthLimiter(total_rate=1000, clock=t.clock, sleep=t.sleep)
+    for _ in range(2):
+        worker = threading.Thread(target=limiter.throttle, args=(1000,))
+        worker.start()
+        worker.join()
+    # The second thread pays for the burst consumed by the first one.
+    assert t.sleeps == [1.0]
+
+
+def test_per_worker_limit_is_per_thread() -> None:
+    t = FakeTime()
+    limiter = BandwidthLimiter(per_worker_rate=100, clock=t.clock, sleep=t.sleep)
+    limiter.throttle(100)
+    worker = threading.Thread(target=limiter.throttle, args=(100,))
+    worker.start()
+    worker.join()
+    assert t.sleeps == []
+    limiter.throttle(100)
+    assert t.sleeps == [1.0]
+
+
+def test_progress_callback_throttles_chunks() -> None:
+    throttled = []
+
+    class Limiter:
+        def throttle(self, nbytes: int) -> None:
+            throttled.append(nbytes)
+
+    class Video:
+        def register_on_progress_callback(self, cb) -> None:
+            self.cb = cb
+
+    yd = YoutubeDownloader(youtube_cls=lambda url: Video())
+    yd._options = DownloadOptions(rate_limiter=Limiter())
+    yt = yd._create_youtube("https://youtu.be/x", None)
+    yt.cb(None, b"x" * 42, 0)
+    assert throttled == [42]
+
+
+def test_rate_limit_env(monkeypatch) -> None:
+    monkeypatch.setenv("PYDL_RATE_LIMIT", "1M")
+    monkeypatch.setenv("PYDL_RATE_LIMIT_PER_WORKER", "256K")
+    limiter = DownloadOptions().rate_limiter
+    assert limiter.total_rate == 1024**2
+    assert limiter.per_worker_rate == 256 * 1024
+
+
+def test_rate_limit_env_unset(monkeypatch) -> None:
+    monkeypatch.delenv("PYDL_RATE_LIMIT", raising=False)
+    monkeypatch.delenv("PYDL_RATE_LIMIT_PER_WORKER", raising=False)
+    assert DownloadOptions().rate_limiter is None
+
+
+def test_reserve_does_not_sleep() -> None:
+    fake = FakeTime()
+    limiter = BandwidthLimiter(100, 50, clock=fake.clock, sleep=fake.sleep)
+    bucket = limiter.worker_bucket()
+    assert limiter.reserve(50, bucket) == 0
+    # The per-worker bucket is the tighter one.
+    assert limiter.reserve(50, bucket) == pytest.approx(1.0)
+    assert fake.sleeps == []
+    assert BandwidthLimiter(100).worker_bucket() is None
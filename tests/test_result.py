@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.result import BatchResult, ItemRecord
+from program_youtube_downloader.retry import RetryPolicy
+from tests.conftest import FakeStream, FakeVideo
+
+
+class FlakyStream(FakeStream):
+    itag = 22
+    resolution = "720p"
+    data = "x" * 1000
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        if self.name.startswith("b"):
+            raise PermissionError("read-only")
+        if self.name.startswith("c") and self.calls == 0:
+            self.calls += 1
+            raise ConnectionResetError("reset")
+        return super().download(output_path, filename)
+
+
+class Video(FakeVideo):
+    def __init__(self, url: str) -> None:
+        if "d" * 11 in url:
+            raise KeyError("streamingData")
+        super().__init__(url)
+
+    def make_streams(self, name: str) -> list:
+        return [FlakyStream(self, name)]
+
+
+def test_batch_returns_a_record_per_url(batch, tmp_path: Path) -> None:
+    urls = [f"https://youtu.be/{c * 11}" for c in "abcd"]
+    results = tmp_path / "results.jsonl"
+    options = DownloadOptions(
+        save_path=tmp_path,
+        max_workers=2,
+        retry_policy=RetryPolicy(base_delay=0, jitter=0),
+        results_file=results,
+        interactive=False,
+    )
+
+    result = YoutubeDownloader(youtube_cls=Video).download_multiple_videos(urls, options)
+
+    items = {item.video_id: item for item in result.items}
+    assert len(result.items) == 4
+    ok = items["a" * 11]
+    assert ok.ok and ok.itag == 22 and ok.bytes == 1000 and ok.retries == 0
+    assert ok.path == str(tmp_path / f"{'a' * 11}.mp4")
+    assert ok.resolve_time >= 0 and ok.download_time >= 0 and ok.finished_at
+    assert items["b" * 11].error == "PermissionError"
+    assert items["b" * 11].path is None
+    assert items["c" * 11].ok and items["c" * 11].retries == 1
+    assert items["d" * 11].error == "unresolved"
+    assert items["d" * 11].itag is None
+
+    lines = [json.loads(line) for line in results.read_text().splitlines()]
+    assert [line["url"] for line in lines] == [item.url for item in result.items]
+    assert set(lines[0]) == {
+        "url", "video_id", "itag", "bytes", "resolve_time", "download_time",
+        "retries", "path", "error", "finished_at",
+    }
+
+
+def test_write_jsonl_appends_runs(tmp_path: Path) -> None:
+    path = tmp_path / "out" / "results.jsonl"
+    BatchResult(items=[ItemRecord("u1", "a")]).write_jsonl(path)
+    BatchResult(items=[ItemRecord("u2", "b", error="HTTPError")]).write_jsonl(path)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(line["url"], line["error"]) for line in lines] == [
+        ("u1", None),
+        ("u2", "HTTPError"),
+    ]
+
+
+def test_merge_keeps_items() -> None:
+    merged = BatchResult.merge([
+        BatchResult(succeeded=["a"], items=[ItemRecord("a")]),
+        BatchResult(failed=["b"], items=[ItemRecord("b", error="DownloadError")]),
+    ])
+    assert [item.url for item in merged.items] == ["a", "b"]
+    assert [item.ok for item in merged.items] == [True, False]
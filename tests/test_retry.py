@@ -0,0 +1,113 @@
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+
+import pytest
+from pytubefix import exceptions as pytubefix_exceptions
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.exceptions import DownloadError
+from program_youtube_downloader.retry import RetryPolicy
+
+
+def http_error(code: int, headers=None) -> HTTPError:
+    return HTTPError(url="u", code=code, msg="x", hdrs=headers, fp=None)
+
+
+def wrapped(error: Exception) -> DownloadError:
+    try:
+        raise DownloadError(str(error)) from error
+    except DownloadError as e:
+        return e
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (http_error(429), True),
+        (http_error(403), True),
+        (http_error(503), True),
+        (http_error(404), False),
+        (http_error(410), False),
+        (URLError("reset"), True),
+        (ConnectionResetError(), True),
+        (TimeoutError(), True),
+        (PermissionError("denied"), False),
+        (pytubefix_exceptions.VideoPrivate("abc"), False),
+        (pytubefix_exceptions.BotDetection("abc"), True),
+        (DownloadError("incomplete"), True),
+    ],
+)
+def test_classification(error, expected) -> None:
+    assert RetryPolicy().is_retryable(wrapped(error)) is expected
+
+
+def test_backoff_grows_and_is_capped() -> None:
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+    assert [policy.delay(n) for n in range(1, 5)] == [1, 2, 4, 5]
+
+
+def test_jitter_stays_within_bounds() -> None:
+    policy = RetryPolicy(base_delay=2, jitter=0.5)
+    delays = [policy.delay(1) for _ in range(100)]
+    assert all(1 <= d <= 2 for d in delays)
+
+
+def test_retry_after_header() -> None:
+    policy = RetryPolicy(max_delay=10)
+    assert policy.delay(1, wrapped(http_error(429, {"Retry-After": "7"}))) == 7
+    assert policy.delay(1, wrapped(http_error(429, {"Retry-After": "70"}))) == 10
+
+
+class ScriptedStream:
+    itag = 18
+    default_filename = "clip.mp4"
+
+    def __init__(self, errors) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    def download(self, output_path: str) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        p = Path(output_path) / self.default_filename
+        p.write_text("data")
+        return str(p)
+
+
+def downloader_with_policy(tmp_path: Path, sleeps: list[float], **kwargs) -> YoutubeDownloader:
+    yd = YoutubeDownloader()
+    policy = RetryPolicy(jitter=0, sleep=sleeps.append, **kwargs)
+    yd._options = DownloadOptions(save_path=tmp_path, retry_policy=policy)
+    return yd
+
+
+def test_throttled_download_backs_off(tmp_path: Path) -> None:
+    sleeps: list[float] = []
+    yd = downloader_with_policy(tmp_path, sleeps, max_attempts=4, base_delay=0.5)
+    stream = ScriptedStream([http_error(429), http_error(429)])
+    yd._download_video(stream, tmp_path, "https://youtu.be/x", False)
+    assert stream.calls == 3
+    assert sleeps == [0.5, 1.0]
+    assert (tmp_path / "clip.mp4").exists()
+
+
+def test_fatal_error_is_not_retried(tmp_path: Path) -> None:
+    sleeps: list[float] = []
+    yd = downloader_with_policy(tmp_path, sleeps, max_attempts=5)
+    stream = ScriptedStream([http_error(404)])
+    with pytest.raises(DownloadError):
+        yd._download_video(stream, tmp_path, "https://youtu.be/x", False)
+    assert stream.calls == 1
+    assert sleeps == []
+
+
+def test_gives_up_after_max_attempts(tmp_path: Path) -> None:
+    sleeps: list[float] = []
+    yd = downloader_with_policy(tmp_path, sleeps, max_attempts=2)
+    stream = ScriptedStream([http_error(503)] * 5)
+    with pytest.raises(DownloadError):
+        yd._download_video(stream, tmp_path, "https://youtu.be/x", False)
+    assert stream.calls == 2
+    assert len(sleeps) == 1
@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.selection import Constraint, SelectionPolicy
+from tests.conftest import FakeVideo
+
+
+class Stream:
+    def __init__(self, itag, resolution=None, abr=None, size=None) -> None:
+        self.itag = itag
+        self.resolution = resolution
+        self.abr = abr
+        self._filesize = size
+        self.default_filename = f"{itag}.mp4"
+
+    def download(self, output_path: str) -> str:
+        p = Path(output_path) / self.default_filename
+        p.write_text("data")
+        return str(p)
+
+
+STREAMS = [
+    Stream(137, "1080p", None, 300_000_000),
+    Stream(22, "720p", "192kbps", 90_000_000),
+    Stream(136, "720p", "128kbps", 60_000_000),
+    Stream(18, "360p", "96kbps", 20_000_000),
+    Stream(140, None, "128kbps", 5_000_000),
+]
+
+
+@pytest.mark.parametrize(
+    "spec, itag",
+    [
+        ("best", 137),
+        ("best <=1080p", 137),
+        ("best ≤720p", 22),
+        ("smallest >=720p", 136),
+        ("worst", 18),
+        ("audio >=128kbps", 22),
+        ("smallest audio >=128kbps", 140),
+        ("size <= 80MB", 136),
+        ("best <=720p, <=50MiB", 18),
+    ],
+)
+def test_policy_selects_stream(spec: str, itag: int) -> None:
+    assert SelectionPolicy.parse(spec).select(STREAMS).itag == itag
+
+
+def test_parse_compiles_constraints() -> None:
+    policy = SelectionPolicy.parse("smallest >=720p <=2GB")
+    assert policy == SelectionPolicy(
+        prefer_best=False,
+        constraints=(
+            Constraint("resolution", ">=", 720),
+            Constraint("filesize", "<=", 2e9),
+        ),
+    )
+
+
+@pytest.mark.parametrize("spec", ["fastest", "best <= 10", "best >>720p", "<=abc"])
+def test_parse_rejects_invalid_specs(spec: str) -> None:
+    with pytest.raises(ValueError):
+        SelectionPolicy.parse(spec)
+
+
+def test_no_matching_stream() -> None:
+    assert SelectionPolicy.parse(">=4320p").select(STREAMS) is None
+
+
+def test_sound_only_ranks_by_bitrate() -> None:
+    assert SelectionPolicy().select(STREAMS, download_sound_only=True).itag == 22
+
+
+def test_matching_reproduces_choice() -> None:
+    policy = SelectionPolicy.matching(STREAMS[1], download_sound_only=False)
+    other_video = [Stream(1, "1440p"), Stream(2, "720p"), Stream(3, "480p")]
+    assert policy.select(other_video).itag == 2
+    assert SelectionPolicy.matching(STREAMS[3], True).select(STREAMS, True).itag == 18
+
+
+def make_video(streams):
+    class Video(FakeVideo):
+        def make_streams(self, name: str) -> list:
+            return streams[name]
+
+    return Video
+
+
+def test_batch_applies_choice_per_video(batch, tmp_path: Path) -> None:
+    videos = {
+        "a": [Stream(1, "1080p"), Stream(2, "720p")],
+        "b": [Stream(3, "720p"), Stream(4, "360p")],
+        "c": [Stream(5, "360p")],
+    }
+    choices = []
+
+    def choose(sound_only, streams) -> int:
+        choices.append([s.resolution for s in streams])
+        return 2  # 720p on the first video
+
+    yd = YoutubeDownloader(youtube_cls=make_video(videos))
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/a", "https://youtu.be/b", "https://youtu.be/c"],
+        DownloadOptions(save_path=tmp_path, choice_callback=choose),
+    )
+    assert choices == [["1080p", "720p"]]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2.mp4", "3.mp4", "5.mp4"]
+    assert result.ok
+
+
+def test_out_of_range_choice_falls_back_to_best(batch, tmp_path: Path) -> None:
+    videos = {"a": [Stream(1, "720p"), Stream(2, "360p")]}
+    yd = YoutubeDownloader(youtube_cls=make_video(videos))
+    yd.download_multiple_videos(
+        ["https://youtu.be/a"],
+        DownloadOptions(save_path=tmp_path, choice_callback=lambda s, st: 99),
+    )
+    assert (tmp_path / "1.mp4").exists()
+
+
+def test_unmatched_video_fails_without_stopping_batch(batch, tmp_path: Path) -> None:
+    videos = {"a": [Stream(1, "360p")], "b": [Stream(2, "1080p")]}
+    yd = YoutubeDownloader(youtube_cls=make_video(videos))
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/a", "https://youtu.be/b"],
+        DownloadOptions(save_path=tmp_path, selection=SelectionPolicy.parse(">=720p")),
+    )
+    assert result.failed == ["https://youtu.be/a"]
+    assert result.succeeded == ["https://youtu.be/b"]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    ["best <=1080p", "smallest audio >=128kbps", "size <=1.5GiB, >=720p", ""],
+)
+def test_policy_text_round_trips(spec: str) -> None:
+    policy = SelectionPolicy.parse(spec)
+    assert SelectionPolicy.parse(str(policy)) == policy
@@ -0,0 +1,228 @@
+import http.client
+import json
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.inflight import InFlightDownloads
+from program_youtube_downloader.main import parse_args
+from program_youtube_downloader.server import (
+    DownloadService,
+    JobStatus,
+    serve_http,
+    serve_unix,
+)
+from tests.conftest import FakeStream, FakeVideo
+
+IDS = [f"{c * 10}{i}" for i, c in enumerate("abcdef")]
+
+
+class Stream(FakeStream):
+    filesize = 4
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def download(self, output_path: str, filename: str | None = None) -> str:
+        with Stream.lock:
+            Stream.active += 1
+            Stream.peak = max(Stream.peak, Stream.active)
+        time.sleep(0.05)
+        with Stream.lock:
+            Stream.active -= 1
+        path = super().download(output_path, filename)
+        if self.video.callback:
+            self.video.callback(self, b"data", 0)
+        return path
+
+
+class Video(FakeVideo):
+    def make_streams(self, name: str) -> list:
+        return [Stream(self, name)]
+
+
+@pytest.fixture(autouse=True)
+def setup(batch):
+    Stream.peak = 0
+
+
+@pytest.fixture
+def service(tmp_path: Path):
+    downloader = YoutubeDownloader(youtube_cls=Video, in_flight=InFlightDownloads())
+    collections = {"https://www.youtube.com/playlist?list=PL": [f"https://youtu.be/{i}" for i in IDS[4:]]}
+    svc = DownloadService(
+        downloader,
+        DownloadOptions(save_path=tmp_path, max_workers=4),
+        lambda kind, url: collections[url],
+        max_jobs=2,
+        max_downloads=1,
+    )
+    yield svc
+    svc.close()
+
+
+@pytest.fixture
+def api(service):
+    server = serve_http(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server.server_port
+    server.shutdown()
+    server.server_close()
+
+
+def request(port: int, method: str, path: str, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    data = None if body is None else json.dumps(body)
+    conn.request(method, path, body=data)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+def wait_finished(service: DownloadService, job_id: str):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        job = service.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job not finished")
+
+
+def test_jobs_share_global_download_limit(api, service, tmp_path: Path) -> None:
+    status, first = request(api, "POST", "/jobs", {"urls": [f"https://youtu.be/{i}" for i in IDS[:2]]})
+    assert status == 202 and first["status"] in {"queued", "running"}
+    status, second = request(
+        api,
+        "POST",
+        "/jobs",
+        {"urls": [f"https://youtu.be/{i}" for i in IDS[2:4]], "options": {"save_path": str(tmp_path / "b")}},
+    )
+    assert status == 202
+
+    for job_id in (first["id"], second["id"]):
+        wait_finished(service, job_id)
+    assert Stream.peak == 1
+    assert (tmp_path / "b" / f"{IDS[2]}.mp4").exists()
+
+    status, job = request(api, "GET", f"/jobs/{first['id']}")
+    assert status == 200 and job["status"] == "done"
+    assert job["result"]["succeeded"] == 2
+    assert job["progress"] == {
+        "streams": 2,
+        "streams_done": 2,
+        "bytes_downloaded": 8,
+        "bytes_total": 8,
+        "percent": 100.0,
+    }
+    status, jobs = request(api, "GET", "/jobs")
+    assert [j["id"] for j in jobs] == [first["id"], second["id"]]
+    assert request(api, "GET", "/health") == (200, {"status": "ok", "queued": 0, "running": 0})
+
+
+def test_playlist_job_streams_collection(service, tmp_path: Path) -> None:
+    job = service.submit({"playlist": "https://www.youtube.com/playlist?list=PL", "options": {"download_sound_only": False}})
+    job = wait_finished(service, job.id)
+    assert job.status is JobStatus.DONE
+    assert sorted(job.result.succeeded) == [f"https://youtu.be/{i}" for i in IDS[4:]]
+
+    job = service.submit({"channel": "https://www.youtube.com/@unknown"})
+    job = wait_finished(service, job.id)
+    assert job.status is JobStatus.FAILED and job.error.startswith("KeyError")
+
+
+def test_close_cancels_queued_jobs(tmp_path: Path) -> None:
+    started, release = threading.Event(), threading.Event()
+
+    def load_collection(kind: str, url: str) -> list[str]:
+        started.set()
+        assert release.wait(timeout=5)
+        return [f"https://youtu.be/{IDS[0]}"]
+
+    svc = DownloadService(
+        YoutubeDownloader(youtube_cls=Video, in_flight=InFlightDownloads()),
+        DownloadOptions(save_path=tmp_path),
+        load_collection,
+        max_jobs=1,
+    )
+    running = svc.submit({"playlist": "https://www.youtube.com/playlist?list=PL"})
+    queued = svc.submit({"urls": [f"https://youtu.be/{IDS[1]}"]})
+    assert started.wait(timeout=5)
+
+    svc.close(wait=False)
+    release.set()
+
+    assert wait_finished(svc, running.id).status is JobStatus.DONE
+    assert queued.status is JobStatus.CANCELLED and queued.finished_at is not None
+    assert queued.to_dict()["status"] == "cancelled"
+    assert svc.health() == {"status": "ok", "queued": 0, "running": 0}
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ({}, "exactement un champ"),
+        ({"urls": [], "options": {}}, "non vide"),
+        ({"urls": ["https://example.com/x"]}, "URL invalide"),
+        ({"urls": [f"https://youtu.be/{IDS[0]}"], "options": {"archive": "x"}}, "Option inconnue"),
+        ({"urls": [f"https://youtu.be/{IDS[0]}"], "options": {"max_workers": "2"}}, "max_workers"),
+        ({"urls": [f"https://youtu.be/{IDS[0]}"], "options": {"selection": "nonsense"}}, "selection"),
+    ],
+)
+def test_invalid_jobs_are_rejected(api, body, message) -> None:
+    status, payload = request(api, "POST", "/jobs", body)
+    assert status == 400 and message in payload["error"]
+
+
+def test_unknown_resources(api) -> None:
+    assert request(api, "GET", "/jobs/42")[0] == 404
+    assert request(api, "GET", "/nothing")[0] == 404
+    assert request(api, "POST", "/health", {})[0] == 404
+
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str) -> None:
+        super().__init__("localhost", timeout=5)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def test_unix_socket(service, tmp_path: Path) -> None:
+    path = tmp_path / "pydl.sock"
+    server = serve_unix(service, path)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        assert path.stat().st_mode & 0o777 == 0o600
+        conn = UnixConnection(str(path))
+        conn.request("POST", "/jobs", body=json.dumps({"urls": [f"https://youtu.be/{IDS[0]}"]}))
+        response = conn.getresponse()
+        job = json.loads(response.read())
+        assert response.status == 202
+        assert wait_finished(service, job["id"]).status is JobStatus.DONE
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serve_arguments(monkeypatch) -> None:
+    monkeypatch.setenv("PYDL_SERVE_MAX_DOWNLOADS", "3")
+    args = parse_args(["serve", "--socket", "/tmp/pydl.sock"])
+    assert args.command == "serve"
+    assert args.max_downloads == 3 and args.max_jobs == 4 and args.port == 8765
+    assert args.socket == Path("/tmp/pydl.sock")
+
+
+def test_service_rejects_bad_limits() -> None:
+    with pytest.raises(ValueError):
+        DownloadService(YoutubeDownloader(), DownloadOptions(), lambda k, u: [], max_downloads=0)
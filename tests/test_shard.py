@@ -0,0 +1,201 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader import main as main_module
+from program_youtube_downloader.cache import MetadataCache
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.jobs import JobQueue
+from program_youtube_downloader.metrics import Metrics
+from program_youtube_downloader.result import BatchResult, ItemRecord
+from program_youtube_downloader.selection import SelectionPolicy
+from program_youtube_downloader.shard import (
+    Shard,
+    read_url_file,
+    run_shard,
+    run_sharded,
+    shard_index,
+    split_shards,
+)
+
+URLS = [f"https://youtu.be/video{i:06d}" for i in range(40)]
+
+
+def fake_runner(shard: Shard) -> BatchResult:
+    # Runs in a worker process: must be importable at module level.
+    if "https://youtu.be/crash" in shard.urls:
+        raise RuntimeError("worker crashed")
+    return BatchResult(succeeded=[f"{u}#{os.getpid()}" for u in shard.urls])
+
+
+def recording_runner(shard: Shard) -> BatchResult:
+    return BatchResult(
+        succeeded=list(shard.urls),
+        items=[
+            ItemRecord(u, bytes=10, download_time=0.5, path=str(shard.job_queue))
+            for u in shard.urls
+        ],
+    )
+
+
+def test_shard_index_depends_on_video_id_only() -> None:
+    watch = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10"
+    short = "https://youtu.be/dQw4w9WgXcQ"
+    assert shard_index(watch, 7) == shard_index(short, 7)
+    assert {shard_index(u, 4) for u in URLS} == {0, 1, 2, 3}
+
+
+def test_split_shards_is_complete_and_ordered() -> None:
+    groups = split_shards(URLS, 3)
+    assert sorted(u for g in groups for u in g) == URLS
+    for group in groups:
+        assert group == sorted(group)
+    assert split_shards(URLS, 3) == groups
+    with pytest.raises(ValueError):
+        split_shards(URLS, 0)
+
+
+def test_read_url_file_skips_blank_and_invalid(tmp_path: Path) -> None:
+    path = tmp_path / "urls.txt"
+    path.write_text(f"{URLS[0]}\n\nnot a url\n  {URLS[1]}  \n")
+    assert read_url_file(path) == URLS[:2]
+
+
+def test_merge_results() -> None:
+    merged = BatchResult.merge([
+        BatchResult(succeeded=["a"], skipped=["x"]),
+        BatchResult(succeeded=["b"], failed=["c"]),
+    ])
+    assert merged.succeeded == ["a", "b"]
+    assert merged.failed == ["c"]
+    assert merged.skipped == ["x"]
+
+
+def test_run_sharded_uses_one_process_per_shard(tmp_path: Path) -> None:
+    result = run_sharded(URLS, 3, tmp_path, runner=fake_runner)
+    urls = [u.split("#")[0] for u in result.succeeded]
+    pids = {u.split("#")[1] for u in result.succeeded}
+    assert sorted(urls) == URLS
+    assert len(pids) == 3 and str(os.getpid()) not in pids
+
+
+def test_crashed_shard_counts_as_failed(tmp_path: Path) -> None:
+    urls = ["https://youtu.be/crash", *URLS[:10]]
+    result = run_sharded(urls, 2, tmp_path, runner=fake_runner)
+    crashed = split_shards(urls, 2)[shard_index("https://youtu.be/crash", 2)]
+    assert result.failed == crashed
+    assert {item.error for item in result.items} == {"RuntimeError"}
+    assert len(result.succeeded) == len(urls) - len(crashed)
+
+
+def test_shards_get_own_job_queue_and_feed_metrics(tmp_path: Path) -> None:
+    metrics = Metrics(tmp_path / "metrics.prom")
+    result = run_sharded(
+        URLS,
+        2,
+        tmp_path,
+        job_queue=tmp_path / "jobs.db",
+        metrics=metrics,
+        runner=recording_runner,
+    )
+    assert {item.path for item in result.items} == {
+        str(tmp_path / "jobs.0.db"),
+        str(tmp_path / "jobs.1.db"),
+    }
+    assert metrics.downloads.value("succeeded") == len(URLS)
+    assert metrics.bytes_downloaded.value() == 10 * len(URLS)
+    assert metrics.download_seconds.count == len(URLS)
+    assert "pydl_downloads_total" in (tmp_path / "metrics.prom").read_text()
+
+
+def test_job_queue_keeps_its_shard_count(tmp_path: Path) -> None:
+    jobs = tmp_path / "jobs.db"
+    run_sharded(URLS, 2, tmp_path, job_queue=jobs, runner=recording_runner)
+
+    with pytest.raises(ValueError, match="2 processus"):
+        run_sharded(URLS, 3, tmp_path, job_queue=jobs, runner=recording_runner)
+    assert not (tmp_path / "jobs.2.db").exists()
+    assert run_sharded(URLS, 2, tmp_path, job_queue=jobs, runner=recording_runner).ok
+
+
+def test_run_shard_is_headless(monkeypatch, tmp_path: Path) -> None:
+    captured = {}
+
+    def fake_download(self, urls, options):
+        captured.update(urls=urls, options=options)
+        return BatchResult(succeeded=list(urls))
+
+    monkeypatch.setenv("PYDL_METADATA_CACHE", str(tmp_path / "cache.json"))
+    monkeypatch.setenv("PYDL_JOB_QUEUE", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(YoutubeDownloader, "download_multiple_videos", fake_download)
+    loaded = []
+    load = MetadataCache._load
+    monkeypatch.setattr(MetadataCache, "_load", lambda self: loaded.append(self.path) or load(self))
+    policy = SelectionPolicy.parse("best <=720p")
+    shard = Shard(2, ("https://youtu.be/a",), tmp_path, True, policy, tmp_path / "jobs.2.db")
+    result = run_shard(shard)
+
+    options = captured["options"]
+    assert result.succeeded == ["https://youtu.be/a"]
+    assert options.interactive is False
+    assert options.download_sound_only is True
+    assert options.selection == policy
+    assert isinstance(options.metadata_cache, MetadataCache)
+    assert options.metadata_cache.path == tmp_path / "cache.2.json"
+    assert loaded == []
+    assert len(options.metadata_cache) == 0
+    assert loaded == [tmp_path / "cache.2.json"]
+    assert isinstance(options.job_queue, JobQueue)
+    assert options.job_queue.path == tmp_path / "jobs.2.db"
+    assert not (tmp_path / "jobs.db").exists()
+
+
+def test_batch_command(monkeypatch, tmp_path: Path, capsys) -> None:
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text(f"{URLS[0]}\n{URLS[1]}\n")
+    captured = {}
+
+    def fake_run_sharded(urls, workers, save_path, **kwargs):
+        captured.update(urls=urls, workers=workers, save_path=save_path, **kwargs)
+        return BatchResult(succeeded=["https://youtu.be/a"], failed=["https://youtu.be/b"])
+
+    monkeypatch.setattr(main_module, "run_sharded", fake_run_sharded)
+    monkeypatch.setenv("PYDL_RESULTS_FILE", str(tmp_path / "results.jsonl"))
+    status = main_module.main([
+        "--headless", "--metrics-file", str(tmp_path / "metrics.prom"),
+        "batch", str(url_file), "--workers", "4",
+        "--output-dir", str(tmp_path / "out"), "--audio",
+        "--job-queue", str(tmp_path / "jobs.db"),
+    ])
+
+    assert status == 1
+    assert captured["urls"] == URLS[:2]
+    assert captured["workers"] == 4
+    assert captured["download_sound_only"] is True
+    assert captured["job_queue"] == tmp_path / "jobs.db"
+    assert captured["results_file"] == tmp_path / "results.jsonl"
+    assert captured["metrics"].textfile == tmp_path / "metrics.prom"
+    assert (tmp_path / "out").is_dir()
+    assert json.loads(capsys.readouterr().out)["failed"] == ["https://youtu.be/b"]
+
+
+def test_batch_command_with_other_shard_count(tmp_path: Path, capsys) -> None:
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text(f"{URLS[0]}\n")
+    queue = JobQueue(tmp_path / "jobs.db")
+    queue.set_setting("shards", "8")
+    queue.close()
+
+    status = main_module.main([
+        "batch", str(url_file), "--workers", "2",
+        "--output-dir", str(tmp_path), "--job-queue", str(tmp_path / "jobs.db"),
+    ])
+
+    assert status == 1
+    assert "8 processus" in capsys.readouterr().err
+
+
+def test_batch_command_missing_file(tmp_path: Path) -> None:
+    assert main_module.main(["batch", str(tmp_path / "missing.txt")]) == 1
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from pytube.exceptions import PytubeError
+
+from program_youtube_downloader import progress
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.utils import loaded_errors
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = {"pytubefix", "pytube", "colorama", "aiohttp", "multiprocessing"}
+# Run in a fresh interpreter: this one has already imported the heavy modules.
+HELP = """
+import sys
+from program_youtube_downloader.main import main
+try:
+    main(["--help"])
+except SystemExit:
+    pass
+print(" ".join(sorted({name.split(".")[0] for name in sys.modules})))
+"""
+
+
+def test_cli_help_does_not_import_heavy_modules() -> None:
+    result = subprocess.run(
+        [sys.executable, "-c", HELP],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = set(result.stdout.splitlines()[-1].split())
+    assert "program_youtube_downloader" in imported
+    assert not imported & HEAVY_MODULES
+
+
+def test_colorama_is_initialised_for_terminals_only(monkeypatch, capsys) -> None:
+    calls = []
+    monkeypatch.setattr(progress, "_init_colorama", lambda: calls.append(1))
+    progress.progress_bar(50.0)
+    assert calls == []
+
+    class Terminal:
+        def write(self, text: str) -> None:
+            pass
+
+        def flush(self) -> None:
+            pass
+
+        def isatty(self) -> bool:
+            return True
+
+    monkeypatch.setattr(sys, "stdout", Terminal())
+    progress.progress_bar(50.0)
+    progress.MultiProgressRenderer(output=Terminal())._draw(["ligne"], 0.0, True)
+    assert calls == [1, 1]
+
+
+def test_loaded_errors_only_returns_imported_classes() -> None:
+    assert loaded_errors("pytube.exceptions.PytubeError") == (PytubeError,)
+    assert loaded_errors("not_imported.Error", "pytube.exceptions.missing") == ()
+    assert loaded_errors("os.path") == ()
+
+
+def test_pytube_errors_are_still_handled() -> None:
+    def failing(url: str):
+        raise PytubeError("unavailable")
+
+    yd = YoutubeDownloader(youtube_cls=failing)
+    assert yd._create_youtube("https://youtu.be/aaaaaaaaaaa", None) is None
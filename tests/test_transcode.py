@@ -0,0 +1,226 @@
+import os
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.exceptions import TranscodeError
+from program_youtube_downloader.transcode import (
+    AudioTranscoder,
+    container_extension,
+    copy_container,
+    transcode_audio,
+)
+from tests.conftest import FakeVideo
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="fake ffmpeg is a script")
+
+FAKE_FFMPEG = """#!{python}
+import sys
+args = sys.argv[1:]
+if "fail" in args[-1]:
+    sys.stderr.write("boom")
+    sys.exit(1)
+source = args[args.index("-i") + 1]
+encoder = args[args.index("-c:a") + 1]
+bitrate = args[args.index("-b:a") + 1] if "-b:a" in args else "-"
+with open(source) as f, open(args[-1], "w") as out:
+    out.write(f"{{encoder}}:{{bitrate}}:{{f.read()}}")
+"""
+
+
+@pytest.fixture
+def ffmpeg(tmp_path: Path) -> str:
+    script = tmp_path / "bin" / "ffmpeg"
+    script.parent.mkdir()
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    return str(script)
+
+
+class Stream:
+    def __init__(self, itag, mime_type, abr=None, resolution=None) -> None:
+        self.itag = itag
+        self.mime_type = mime_type
+        self.abr = abr
+        self.resolution = resolution
+        self.only_audio = resolution is None
+        # pytubefix names every audio-only stream ``.m4a``.
+        self.default_filename = "clip.m4a" if self.only_audio else "clip.mp4"
+
+    def download(self, output_path: str) -> str:
+        path = Path(output_path) / self.default_filename
+        path.write_text(str(self.itag))
+        return str(path)
+
+
+class Video(FakeVideo):
+    title = "clip"
+
+    def make_streams(self, name: str) -> list:
+        return [
+            Stream(18, "video/mp4", resolution="360p"),
+            Stream(140, "audio/mp4", abr="128kbps"),
+            Stream(251, "audio/webm", abr="160kbps"),
+        ]
+
+
+def test_container_extension(tmp_path: Path) -> None:
+    path = tmp_path / "clip.m4a"
+    assert container_extension(Stream(140, "audio/mp4"), path) == "m4a"
+    assert container_extension(Stream(251, "audio/webm"), path) == "webm"
+    assert container_extension(object(), tmp_path / "clip.mp4") == "mp4"
+
+
+def test_copy_container_renames_without_clobbering(tmp_path: Path) -> None:
+    source = tmp_path / "clip.m4a"
+    source.write_text("opus")
+    (tmp_path / "clip.webm").write_text("other")
+    assert copy_container(source, "webm") == tmp_path / "clip_1.webm"
+    assert (tmp_path / "clip_1.webm").read_text() == "opus"
+    assert copy_container(tmp_path / "clip.webm", "webm") == tmp_path / "clip.webm"
+
+
+def test_transcode_audio(ffmpeg, tmp_path: Path) -> None:
+    source = tmp_path / "clip.m4a"
+    source.write_text("pcm")
+    out = transcode_audio(source, "mp3", "128k", ffmpeg)
+    assert out == tmp_path / "clip.mp3"
+    assert out.read_text() == "libmp3lame:128k:pcm"
+    assert not source.exists()
+
+    flac = tmp_path / "clip.webm"
+    flac.write_text("pcm")
+    # Lossless codecs ignore the bitrate.
+    assert transcode_audio(flac, "flac", "128k", ffmpeg).read_text() == "flac:-:pcm"
+
+
+def test_transcode_failure_keeps_source(ffmpeg, tmp_path: Path) -> None:
+    source = tmp_path / "fail.m4a"
+    source.write_text("pcm")
+    with pytest.raises(TranscodeError, match="boom"):
+        transcode_audio(source, "opus", "96k", ffmpeg)
+    assert source.exists()
+    assert not (tmp_path / "fail.opus").exists()
+
+
+def test_transcoder_rejects_unknown_codec() -> None:
+    with pytest.raises(ValueError):
+        AudioTranscoder("wav")
+
+
+def test_concurrent_submissions_share_one_pool(monkeypatch) -> None:
+    import concurrent.futures
+    import threading
+    import time
+
+    created = []
+
+    class Pool:
+        def __init__(self, **kwargs) -> None:
+            time.sleep(0.05)
+            created.append(self)
+
+        def submit(self, *args) -> Future:
+            return Future()
+
+        def shutdown(self, wait: bool) -> None:
+            pass
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", Pool)
+    transcoder = AudioTranscoder()
+    threads = [
+        threading.Thread(target=transcoder.submit, args=(Path("a.m4a"),))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    transcoder.close()
+    assert len(created) == 1
+
+
+def test_audio_streams_listed_by_bitrate() -> None:
+    yd = YoutubeDownloader()
+    streams = yd.get_video_streams(True, Video("u"))
+    assert [s.itag for s in streams] == [251, 140]
+
+
+def test_audio_batch_transcodes_best_audio_stream(quiet, ffmpeg, tmp_path: Path) -> None:
+    yd = YoutubeDownloader(youtube_cls=Video)
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/a"],
+        DownloadOptions(
+            save_path=tmp_path,
+            download_sound_only=True,
+            ffmpeg=ffmpeg,
+            audio_codec="opus",
+            audio_bitrate="96k",
+            transcode_workers=1,
+        ),
+    )
+    assert result.ok and result.succeeded == ["https://youtu.be/a"]
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == ["clip.opus"]
+    assert (tmp_path / "clip.opus").read_text() == "libopus:96k:251"
+    assert yd._transcoder is None
+
+
+def test_download_worker_returns_before_conversion(ffmpeg, tmp_path: Path) -> None:
+    yd = YoutubeDownloader()
+    yd._transcoder = AudioTranscoder("mp3", "192k", ffmpeg)
+    try:
+        conversion = yd._download_video(
+            Stream(140, "audio/mp4", abr="128kbps"),
+            tmp_path,
+            "https://youtu.be/a",
+            True,
+        )
+        assert isinstance(conversion, Future)
+        assert conversion.result(timeout=30) == tmp_path / "clip.mp3"
+    finally:
+        yd._transcoder.close()
+
+
+def test_failed_conversion_fails_video(quiet, ffmpeg, tmp_path: Path) -> None:
+    class FailingVideo(Video):
+        title = "fail"
+
+        def __init__(self, url: str) -> None:
+            super().__init__(url)
+            for stream in self.streams:
+                stream.default_filename = "fail.m4a"
+
+    yd = YoutubeDownloader(youtube_cls=FailingVideo)
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/a"],
+        DownloadOptions(save_path=tmp_path, download_sound_only=True, ffmpeg=ffmpeg),
+    )
+    assert result.failed == ["https://youtu.be/a"]
+    assert (tmp_path / "fail.m4a").exists()
+
+
+def test_copy_codec_skips_ffmpeg(quiet, tmp_path: Path) -> None:
+    yd = YoutubeDownloader(youtube_cls=Video)
+    result = yd.download_multiple_videos(
+        ["https://youtu.be/a"],
+        DownloadOptions(
+            save_path=tmp_path,
+            download_sound_only=True,
+            audio_codec="copy",
+            ffmpeg="/nonexistent/ffmpeg",
+        ),
+    )
+    assert result.ok
+    assert [p.name for p in tmp_path.iterdir()] == ["clip.webm"]
+
+
+def test_unknown_codec_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        YoutubeDownloader().download_multiple_videos(
+            ["https://youtu.be/a"],
+            DownloadOptions(save_path=tmp_path, download_sound_only=True, audio_codec="wav"),
+        )
@@ -0,0 +1,282 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError
+
+import pytest
+
+from program_youtube_downloader import transfer
+from program_youtube_downloader.config import DownloadOptions
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.exceptions import DownloadError
+from program_youtube_downloader.retry import RetryPolicy
+from program_youtube_downloader.transfer import (
+    download_resumable,
+    download_segmented,
+    part_paths,
+    split_ranges,
+)
+
+PAYLOAD = bytes(range(256)) * 400  # 102400 bytes
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serve ``PAYLOAD`` honouring ``Range`` and optionally cutting the body."""
+
+    ranges: list[str | None] = []
+    cut_after: int | None = None
+    honour_range = True
+    fail_range: str | None = None
+    fail_when = threading.Event()
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        header = self.headers.get("Range")
+        type(self).ranges.append(header)
+        if header is not None and header == type(self).fail_range:
+            type(self).fail_range = None
+            type(self).fail_when.wait(timeout=5)
+            self.send_error(500)
+            return
+        start, end = 0, len(PAYLOAD) - 1
+        if header and self.honour_range:
+            first, _, last = header.split("=")[1].partition("-")
+            start = int(first)
+            end = int(last) if last else end
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start : end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if type(self).cut_after is not None:
+            self.wfile.write(body[: type(self).cut_after])
+            type(self).cut_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.ranges = []
+    RangeHandler.cut_after = None
+    RangeHandler.honour_range = True
+    RangeHandler.fail_range = None
+    RangeHandler.fail_when = threading.Event()
+    RangeHandler.fail_when.set()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/media"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_complete_download(server, tmp_path: Path) -> None:
+    dest = tmp_path / "video.mp4"
+    seen = []
+    download_resumable(server, dest, len(PAYLOAD), on_chunk=lambda c, n: seen.append(n))
+    assert dest.read_bytes() == PAYLOAD
+    assert seen[-1] == len(PAYLOAD)
+    assert not any(p.exists() for p in part_paths(dest))
+
+
+def test_resume_after_interruption(server, tmp_path: Path) -> None:
+    dest = tmp_path / "video.mp4"
+    RangeHandler.cut_after = 30000
+    with pytest.raises(Exception):
+        download_resumable(server, dest, len(PAYLOAD), chunk_size=1000)
+    part, state = part_paths(dest)
+    assert part.stat().st_size == 30000
+    assert state.exists()
+
+    download_resumable(server, dest, len(PAYLOAD), chunk_size=1000)
+    assert RangeHandler.ranges[-1] == "bytes=30000-"
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_restart_when_range_ignored(server, tmp_path: Path) -> None:
+    dest = tmp_path / "video.mp4"
+    RangeHandler.cut_after = 5000
+    with pytest.raises(Exception):
+        download_resumable(server, dest, len(PAYLOAD))
+    RangeHandler.honour_range = False
+    download_resumable(server, dest, len(PAYLOAD))
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_stale_part_for_other_size_is_discarded(server, tmp_path: Path) -> None:
+    dest = tmp_path / "video.mp4"
+    part, state = part_paths(dest)
+    part.write_bytes(b"x" * 100)
+    state.write_text('{"offset": 100, "total": 42}')
+    download_resumable(server, dest, len(PAYLOAD))
+    assert RangeHandler.ranges == [None]
+    assert dest.read_bytes() == PAYLOAD
+
+
+@pytest.mark.parametrize("total_size", [len(PAYLOAD), None])
+def test_complete_part_is_finalized_on_416(server, tmp_path: Path, total_size) -> None:
+    dest = tmp_path / "video.mp4"
+    part, state = part_paths(dest)
+    part.write_bytes(PAYLOAD)
+    state.write_text(f'{{"offset": {len(PAYLOAD)}, "total": {json.dumps(total_size)}}}')
+
+    download_resumable(server, dest, total_size)
+
+    assert RangeHandler.ranges == [f"bytes={len(PAYLOAD)}-"]
+    assert dest.read_bytes() == PAYLOAD
+    assert not part.exists() and not state.exists()
+
+
+def test_oversized_part_restarts_on_416(server, tmp_path: Path) -> None:
+    dest = tmp_path / "video.mp4"
+    part, state = part_paths(dest)
+    part.write_bytes(PAYLOAD + b"x" * 100)
+    state.write_text(f'{{"offset": {len(PAYLOAD) + 100}, "total": null}}')
+
+    download_resumable(server, dest)
+
+    assert RangeHandler.ranges == [f"bytes={len(PAYLOAD) + 100}-", None]
+    assert dest.read_bytes() == PAYLOAD
+    assert not part.exists() and not state.exists()
+
+
+def test_size_mismatch_raises(server, tmp_path: Path) -> None:
+    with pytest.raises(DownloadError):
+        download_resumable(server, tmp_path / "v.mp4", len(PAYLOAD) + 1)
+
+
+class HttpStream:
+    itag = 18
+    resolution = "360p"
+    abr = None
+    default_filename = "clip.mp4"
+    filesize = len(PAYLOAD)
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+
+def test_retries_continue_from_offset(server, monkeypatch, tmp_path: Path) -> None:
+    """A failed attempt is resumed by the retry loop of _download_video."""
+    monkeypatch.setattr(transfer, "STATE_INTERVAL", 1)
+    RangeHandler.cut_after = 60000
+    events = []
+
+    class Handler:
+        def on_progress(self, event) -> None:
+            events.append(event.bytes_downloaded)
+
+    yd = YoutubeDownloader(progress_handler=Handler())
+    yd._options = DownloadOptions(
+        save_path=tmp_path,
+        resumable=True,
+        retry_policy=RetryPolicy(sleep=lambda delay: None),
+    )
+    yd._download_video(HttpStream(server), tmp_path, "https://youtu.be/x", False)
+
+    assert (tmp_path / "clip.mp4").read_bytes() == PAYLOAD
+    assert RangeHandler.ranges == [None, "bytes=60000-"]
+    assert events[-1] == len(PAYLOAD)
+
+
+def test_split_ranges_cover_file(monkeypatch) -> None:
+    monkeypatch.setattr(transfer, "MIN_SEGMENT_SIZE", 10)
+    ranges = split_ranges(105, 4)
+    assert ranges == [(0, 26), (27, 52), (53, 78), (79, 104)]
+    assert split_ranges(15, 4) == [(0, 14)]
+
+
+def test_segmented_download(server, monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(transfer, "MIN_SEGMENT_SIZE", 1024)
+    dest = tmp_path / "video.mp4"
+    seen = []
+    download_segmented(server, dest, len(PAYLOAD), 4, chunk_size=4096, on_chunk=lambda c, n: seen.append(n))
+    assert dest.read_bytes() == PAYLOAD
+    assert sorted(RangeHandler.ranges) == sorted(
+        f"bytes={s}-{e}" for s, e in split_ranges(len(PAYLOAD), 4)
+    )
+    assert max(seen) == len(PAYLOAD)
+    assert not any(p.exists() for p in part_paths(dest))
+
+
+def test_segmented_download_requires_range_support(server, monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(transfer, "MIN_SEGMENT_SIZE", 1024)
+    RangeHandler.honour_range = False
+    dest = tmp_path / "video.mp4"
+    with pytest.raises(DownloadError):
+        download_segmented(server, dest, len(PAYLOAD), 2)
+    assert not dest.exists()
+    assert not part_paths(dest)[0].exists()
+
+
+def test_segmented_download_resumes_missing_ranges(server, monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(transfer, "MIN_SEGMENT_SIZE", 1024)
+    dest = tmp_path / "video.mp4"
+    ranges = [f"bytes={s}-{e}" for s, e in split_ranges(len(PAYLOAD), 4)]
+    RangeHandler.fail_range = ranges[1]
+    RangeHandler.fail_when.clear()
+
+    def others_done(chunk: bytes, total: int) -> None:
+        # Fail the second range once the three others are received.
+        if total == len(PAYLOAD) * 3 // 4:
+            RangeHandler.fail_when.set()
+
+    with pytest.raises(HTTPError):
+        download_segmented(server, dest, len(PAYLOAD), 4, chunk_size=4096, on_chunk=others_done)
+    part, state = part_paths(dest)
+    assert part.exists() and state.exists()
+
+    RangeHandler.ranges = []
+    seen = []
+    download_segmented(server, dest, len(PAYLOAD), 4, on_chunk=lambda c, n: seen.append(n))
+
+    # Only the failed range is fetched again, over the same connections.
+    start, end = split_ranges(len(PAYLOAD), 4)[1]
+    assert sorted(RangeHandler.ranges) == sorted(
+        f"bytes={start + s}-{start + e}" for s, e in split_ranges(end + 1 - start, 4)
+    )
+    assert seen[-1] == len(PAYLOAD)
+    assert dest.read_bytes() == PAYLOAD
+    assert not part.exists() and not state.exists()
+
+
+def test_failed_segment_stops_the_others(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(transfer, "MIN_SEGMENT_SIZE", 10)
+    started = threading.Event()
+    stopped = []
+
+    def fetch_range(url, part, start, end, chunk_size, timeout, on_chunk, stop):
+        if start == 0:
+            assert started.wait(timeout=5)
+            raise DownloadError("boom")
+        started.set()
+        stopped.append(stop.wait(timeout=5))
+        raise DownloadError("Segment incomplet")
+
+    monkeypatch.setattr(transfer, "_fetch_range", fetch_range)
+    with pytest.raises(DownloadError, match="boom"):
+        download_segmented("http://media", tmp_path / "v.mp4", 100, 2)
+    assert stopped == [True]
+    assert not part_paths(tmp_path / "v.mp4")[0].exists()
+
+
+def test_downloader_uses_segments(server, monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(transfer, "MIN_SEGMENT_SIZE", 1024)
+    yd = YoutubeDownloader(progress_handler=type("H", (), {"on_progress": lambda self, e: None})())
+    yd._options = DownloadOptions(save_path=tmp_path, segments=3)
+    path = yd._attempt_download(HttpStream(server), tmp_path)
+    assert path.read_bytes() == PAYLOAD
+    assert len(RangeHandler.ranges) == 3
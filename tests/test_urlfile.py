@@ -0,0 +1,107 @@
+import gzip
+import io
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+from program_youtube_downloader.downloader import YoutubeDownloader
+from program_youtube_downloader.main import main
+from program_youtube_downloader.urlfile import VideoIdSet, iter_url_file
+from tests.conftest import FakeVideo
+
+IDS = [f"{c * 10}{i}" for i, c in enumerate("abcd")]
+LISTING = "\n".join([
+    "# export du 2024-01-01",
+    f"https://youtu.be/{IDS[0]}",
+    "",
+    f"https://www.youtube.com/watch?v={IDS[0]}&t=30",
+    "pas une url",
+    f"  https://www.youtube.com/watch?v={IDS[1]}  ",
+    f"https://www.youtube.com/shorts/{IDS[1]}",
+    f"https://youtube.com/shorts/{IDS[2]}",
+    "   # commentaire indenté",
+    f"https://youtu.be/{IDS[3]}",
+]) + "\n"
+EXPECTED = [
+    f"https://youtu.be/{IDS[0]}",
+    f"https://www.youtube.com/watch?v={IDS[1]}",
+    f"https://youtube.com/shorts/{IDS[2]}",
+    f"https://youtu.be/{IDS[3]}",
+]
+
+
+def fake_stdin(monkeypatch, data: bytes) -> io.BytesIO:
+    raw = io.BytesIO(data)
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BufferedReader(raw)))
+    return raw
+
+
+def test_reader_skips_comments_invalid_and_duplicates(tmp_path: Path, caplog) -> None:
+    path = tmp_path / "urls.txt"
+    path.write_text(LISTING, encoding="utf-8")
+    with caplog.at_level(logging.INFO):
+        assert list(iter_url_file(path)) == EXPECTED
+    assert "URL invalide à la ligne 5" in caplog.text
+    assert "2 doublon(s) et 1 URL invalide(s)" in caplog.text
+    assert len(list(iter_url_file(path, dedupe=False))) == 6
+
+
+def test_reader_detects_gzip_from_content(tmp_path: Path) -> None:
+    path = tmp_path / "export"
+    path.write_bytes(gzip.compress(LISTING.encode("utf-8")))
+    assert list(iter_url_file(path)) == EXPECTED
+
+
+def test_truncated_gzip_keeps_urls_read(tmp_path: Path, caplog) -> None:
+    lines = "".join(f"https://youtu.be/{i:011d}\n" for i in range(5000))
+    data = gzip.compress(lines.encode("utf-8"))
+    path = tmp_path / "urls.txt.gz"
+    path.write_bytes(data[: len(data) // 2])
+    urls = list(iter_url_file(path))
+    assert 0 < len(urls) < 5000
+    assert "interrompue" in caplog.text
+
+
+def test_reader_accepts_stdin(monkeypatch) -> None:
+    fake_stdin(monkeypatch, LISTING.encode("utf-8"))
+    assert list(iter_url_file("-")) == EXPECTED
+    assert not sys.stdin.closed
+
+    fake_stdin(monkeypatch, gzip.compress(LISTING.encode("utf-8")))
+    assert list(iter_url_file("-")) == EXPECTED
+
+
+def test_reader_is_lazy(monkeypatch) -> None:
+    data = "".join(f"https://youtu.be/{i:011d}\n" for i in range(100_000)).encode()
+    raw = fake_stdin(monkeypatch, data)
+    urls = iter_url_file("-")
+    assert next(urls) == "https://youtu.be/00000000000"
+    assert raw.tell() < len(data) // 10
+
+
+def test_missing_file_fails_before_iterating(tmp_path: Path) -> None:
+    with pytest.raises(OSError):
+        iter_url_file(tmp_path / "missing.txt")
+
+
+def test_video_id_set() -> None:
+    seen = VideoIdSet()
+    assert seen.add("aaaaaaaaaaa")
+    assert seen.add("aaaaaaaaaab")
+    assert not seen.add("aaaaaaaaaaa")
+    assert seen.add("https://example.com/x")
+    assert "aaaaaaaaaab" in seen and "zzzzzzzzzzz" not in seen
+    assert len(seen) == 3
+
+
+def test_file_command_streams_stdin(batch, monkeypatch, tmp_path: Path) -> None:
+    urls = "".join(f"https://youtu.be/{i}\n" for i in IDS[:2] + IDS[:1])
+    fake_stdin(monkeypatch, gzip.compress(urls.encode()))
+
+    yd = YoutubeDownloader(youtube_cls=FakeVideo)
+    argv = ["--headless", "file", "-", "--output-dir", str(tmp_path)]
+    assert main(argv, downloader=yd) == 0
+    assert FakeVideo.created == [f"https://youtu.be/{i}" for i in IDS[:2]]
+    assert main(["--headless", "file", str(tmp_path / "missing.txt")], yd) == 1
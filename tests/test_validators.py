@@ -1,6 +1,12 @@
 import pytest
 
-from program_youtube_downloader.validators import validate_youtube_url
+from program_youtube_downloader.validators import (
+    _parse_video_id,
+    _scan_video_id,
+    extract_video_id,
+    validate_many,
+    validate_youtube_url,
+)
 from program_youtube_downloader.exceptions import InvalidURLError
 
 
@@ -112,3 +118,92 @@ def test_validate_youtube_url_rejects_bad_query() -> None:
         )
     with pytest.raises(InvalidURLError):
         validate_youtube_url(f"https://youtu.be/{VALID_ID}?foo=bar")
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        f"https://www.youtube.com/watch?v={VALID_ID}",
+        f"http://youtube.com/watch?v={VALID_ID}&t=42&list=PL1",
+        f"https://youtu.be/{VALID_ID}",
+        f"https://youtu.be/{VALID_ID}/?t=10",
+        f"https://www.youtube.com/shorts/{VALID_ID}",
+        f"  https://youtube.com/shorts/{VALID_ID}/  ",
+        # Forms only the full parser handles.
+        f"https://www.YouTube.com/watch?v={VALID_ID}",
+        f"https://www.youtube.com/watch?t=5&v={VALID_ID}",
+        f"https://www.youtube.com/playlist?list=abc&v={VALID_ID}",
+        f"https://youtu.be/{VALID_ID}?t=1#start",
+    ],
+)
+def test_extract_video_id(url: str) -> None:
+    assert extract_video_id(url) == VALID_ID
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        f"https://www.youtube.com/watch?v={VALID_ID}&feature=share",
+        f"https://www.youtube.com/watch?v={VALID_ID}x",
+        f"https://youtu.be/{VALID_ID}?foo=bar",
+        f"https://m.youtube.com/watch?v={VALID_ID}",
+    ],
+)
+def test_extract_video_id_matches_full_parser(url: str) -> None:
+    with pytest.raises(InvalidURLError):
+        _parse_video_id(url)
+    with pytest.raises(InvalidURLError):
+        extract_video_id(url)
+
+
+def test_scanner_agrees_with_full_parser() -> None:
+    tails = ["", "/", "&t=1", "?t=1", "&list=PL_1", "?list=a&t=2", "&x=1", "#t", "%20"]
+    prefixes = [
+        "https://www.youtube.com/watch?v=",
+        "http://youtube.com/watch?v=",
+        "https://youtu.be/",
+        "https://www.youtube.com/shorts/",
+    ]
+    for prefix in prefixes:
+        for video_id in (VALID_ID, VALID_ID[:10], VALID_ID + "Q", "dQw4w9WgXc!"):
+            for tail in tails:
+                url = prefix + video_id + tail
+                fast = _scan_video_id(url)
+                try:
+                    slow = _parse_video_id(url)
+                except InvalidURLError:
+                    slow = None
+                assert fast in (None, slow), url
+
+
+def test_validate_many() -> None:
+    lines = [
+        f"https://youtu.be/{VALID_ID}",
+        "notaurl",
+        f"https://www.YouTube.com/watch?v={VALID_ID}",
+    ]
+    assert validate_many(iter(lines)) == [VALID_ID, None, VALID_ID]
+    assert validate_many([]) == []
+
+
+def test_validate_many_matches_full_parser() -> None:
+    forms = [
+        "https://www.youtube.com/watch?v={}",
+        "https://www.youtube.com/watch?v={}&t=42",
+        "https://youtu.be/{}?t=10",
+        "https://www.youtube.com/shorts/{}",
+        "https://www.YouTube.com/watch?v={}",
+        "https://www.youtube.com/watch?t=5&v={}",
+        "https://example.com/watch?v={}",
+        "not a url {}",
+    ]
+    ids = [VALID_ID, VALID_ID[:10], "a-b_c" * 2 + "Z", "dQw4w9WgXc!"]
+    lines = [form.format(video_id) for form in forms for video_id in ids]
+    expected = []
+    for line in lines:
+        try:
+            expected.append(_parse_video_id(line))
+        except InvalidURLError:
+            expected.append(None)
+    assert validate_many(lines) == expected
+    assert expected.count(None) < len(lines)
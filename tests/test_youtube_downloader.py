@@ -32,3 +32,10 @@ def test_conversion_mp4_in_mp3_overwrite(tmp_path: Path) -> None:
     assert mp3_new.exists()
     assert mp3_new.read_text() == "dummy-data"
     assert not mp4_path.exists()
+
+
+def test_conversion_mp4_in_mp3_returns_new_path(tmp_path: Path) -> None:
+    mp4_path = tmp_path / "clip.mp4"
+    mp4_path.write_text("x")
+    yd = YoutubeDownloader()
+    assert yd.conversion_mp4_in_mp3(mp4_path) == tmp_path / "clip.mp3"